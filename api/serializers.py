@@ -267,7 +267,7 @@ class OnuInventorySerializer(serializers.ModelSerializer):
         NOTA: Si no proporciona raw_index_key_input, lo generará automáticamente
         desde slot/port/logical usando la fórmula SNMP de la OLT.
         """
-        from snmp_formulas.models import IndexFormula
+        from snmp_formulas.services import get_formula_for_olt
         from discovery.models import OnuStatus
         
         # Extraer campos de entrada (write-only)
@@ -295,35 +295,11 @@ class OnuInventorySerializer(serializers.ModelSerializer):
                     'non_field_errors': 'Se requiere slot, port y logical (o raw_index_key_input) para crear una ONU'
                 })
             
-            # Buscar la fórmula de esta OLT con prioridad:
+            # Buscar la fórmula de esta OLT con prioridad (cacheada por proceso):
             # 1. Marca + Modelo específico
             # 2. Solo Marca (modelo=None)
             # 3. Fórmula universal (marca=None, modelo=None)
-            formula = None
-            
-            # Intento 1: Buscar fórmula específica de marca + modelo
-            if olt.modelo:
-                formula = IndexFormula.objects.filter(
-                    marca=olt.marca,
-                    modelo=olt.modelo,
-                    activo=True
-                ).first()
-            
-            # Intento 2: Buscar fórmula genérica de la marca (sin modelo específico)
-            if not formula and olt.marca:
-                formula = IndexFormula.objects.filter(
-                    marca=olt.marca,
-                    modelo__isnull=True,
-                    activo=True
-                ).first()
-            
-            # Intento 3: Buscar fórmula universal (sin marca ni modelo)
-            if not formula:
-                formula = IndexFormula.objects.filter(
-                    marca__isnull=True,
-                    modelo__isnull=True,
-                    activo=True
-                ).first()
+            formula = get_formula_for_olt(olt)
             
             if not formula:
                 error_msg = f'No se encontró fórmula SNMP activa para '
@@ -442,9 +418,17 @@ class OnuInventorySerializer(serializers.ModelSerializer):
         return "ACTIVO"
     
     def get_last_seen_at(self, obj):
-        """Obtener último visto desde OnuStatus"""
+        """
+        Obtener último visto efectivo: anotado por el ViewSet (época del walk de
+        la OLT con persistencia delta) o, si no viene anotado, desde OnuStatus
+        """
+        if hasattr(obj, 'last_seen_at'):
+            return obj.last_seen_at
         if hasattr(obj, 'onu_index') and hasattr(obj.onu_index, 'status'):
-            return obj.onu_index.status.last_seen_at
+            from discovery.models import OnuStatus
+            return OnuStatus.objects.with_last_seen().filter(
+                pk=obj.onu_index.status.pk
+            ).values_list('effective_last_seen_at', flat=True).first()
         return None
 
 
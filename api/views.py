@@ -19,7 +19,7 @@ from brands.models import Brand
 from olt_models.models import OLTModel
 from snmp_jobs.models import SnmpJob
 from executions.models import Execution
-from discovery.models import OnuIndexMap, OnuStateLookup, OnuInventory
+from discovery.models import OnuIndexMap, OnuStateLookup, OnuInventory, effective_last_seen
 from oids.models import OID
 from snmp_formulas.models import IndexFormula
 from odf_management.models import ODF, ODFHilos, ZabbixPortData
@@ -285,7 +285,10 @@ class OnuInventoryViewSet(viewsets.ModelViewSet):
         'olt', 
         'onu_index', 
         'onu_index__status'
-    ).all()
+    ).annotate(
+        # Último visto efectivo (onu_status + época del walk de la OLT)
+        last_seen_at=effective_last_seen('onu_index__status__')
+    )
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = {
@@ -298,7 +301,7 @@ class OnuInventoryViewSet(viewsets.ModelViewSet):
         'onu_index__logical': ['exact'],  # Filtrar por logical desde OnuIndexMap
     }
     search_fields = ['serial_number', 'mac_address', 'subscriber_id', 'snmp_description']
-    ordering_fields = ['created_at', 'updated_at', 'snmp_last_collected_at']
+    ordering_fields = ['created_at', 'updated_at', 'snmp_last_collected_at', 'last_seen_at']
     ordering = ['-created_at']
     
     def get_serializer_class(self):
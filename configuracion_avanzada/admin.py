@@ -106,7 +106,7 @@ class ConfiguracionSNMPAdmin(admin.ModelAdmin):
             'description': 'Configuración general de SNMP por tipo de operación'
         }),
         ('Configuración SNMP Base', {
-            'fields': ('version', 'comunidad', 'timeout', 'reintentos'),
+            'fields': ('version', 'comunidad', 'timeout', 'reintentos', 'metodo_ingesta', 'max_repeticiones'),
             'description': 'Aplica a: Todas las operaciones SNMP'
         }),
         ('Configuración de Pollers GET', {
@@ -116,7 +116,8 @@ class ConfiguracionSNMPAdmin(admin.ModelAdmin):
                 'tamano_subdivision',
                 'max_reintentos_individuales',
                 'delay_entre_reintentos',
-                'max_consultas_snmp_simultaneas'
+                'max_consultas_snmp_simultaneas',
+                'varbinds_por_pdu'
             ),
             'description': 'Aplica solo a: Operaciones GET con sistema de pollers',
             'classes': ('collapse',)  # Colapsado por defecto
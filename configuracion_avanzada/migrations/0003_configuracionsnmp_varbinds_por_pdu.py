@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-16 10:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuracion_avanzada', '0002_alter_configuracionsnmp_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuracionsnmp',
+            name='varbinds_por_pdu',
+            field=models.PositiveSmallIntegerField(default=25, help_text='OIDs empaquetados en cada PDU GET (1 = un GET por ONU). La subdivisión solo se aplica si falla un PDU (solo para GET)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)]),
+        ),
+    ]
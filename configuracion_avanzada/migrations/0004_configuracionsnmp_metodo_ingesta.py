@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuracion_avanzada', '0003_configuracionsnmp_varbinds_por_pdu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuracionsnmp',
+            name='metodo_ingesta',
+            field=models.CharField(choices=[('orm', 'ORM (bulk_create / bulk_update)'), ('copy', 'COPY + merge SQL (solo PostgreSQL)')], default='orm', help_text='Cómo se persisten los resultados: ORM, o COPY a una tabla de staging + merge con INSERT ... ON CONFLICT / UPDATE ... FROM (solo PostgreSQL; en otras bases se usa ORM)', max_length=10),
+        ),
+    ]
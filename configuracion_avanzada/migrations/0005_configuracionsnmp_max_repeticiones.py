@@ -0,0 +1,17 @@
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configuracion_avanzada', '0004_configuracionsnmp_metodo_ingesta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuracionsnmp',
+            name='max_repeticiones',
+            field=models.PositiveSmallIntegerField(default=25, help_text='max-repetitions de los GETBULK de los walks (0 = GETNEXT, una fila por PDU). Si el agente falla con GETBULK el walk sigue con GETNEXT', validators=[django.core.validators.MaxValueValidator(200)]),
+        ),
+    ]
@@ -124,6 +124,11 @@ class ConfiguracionSNMP(models.Model):
         ('general', 'General (Todas las operaciones)'),
     ]
     
+    METODO_INGESTA_CHOICES = [
+        ('orm', 'ORM (bulk_create / bulk_update)'),
+        ('copy', 'COPY + merge SQL (solo PostgreSQL)'),
+    ]
+    
     nombre = models.CharField(
         max_length=100,
         unique=True,
@@ -192,6 +197,22 @@ class ConfiguracionSNMP(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(20)],
         help_text="Máximo de consultas SNMP simultáneas por poller (Semaphore)"
     )
+    varbinds_por_pdu = models.PositiveSmallIntegerField(
+        default=25,
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        help_text="OIDs empaquetados en cada PDU GET (1 = un GET por ONU). La subdivisión solo se aplica si falla un PDU (solo para GET)"
+    )
+    metodo_ingesta = models.CharField(
+        max_length=10,
+        choices=METODO_INGESTA_CHOICES,
+        default='orm',
+        help_text="Cómo se persisten los resultados: ORM, o COPY a una tabla de staging + merge con INSERT ... ON CONFLICT / UPDATE ... FROM (solo PostgreSQL; en otras bases se usa ORM)"
+    )
+    max_repeticiones = models.PositiveSmallIntegerField(
+        default=25,
+        validators=[MaxValueValidator(200)],
+        help_text="max-repetitions de los GETBULK de los walks (0 = GETNEXT, una fila por PDU). Si el agente falla con GETBULK el walk sigue con GETNEXT"
+    )
     
     activo = models.BooleanField(
         default=True,
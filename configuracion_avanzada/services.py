@@ -239,6 +239,42 @@ def get_snmp_retries(tipo_operacion='descubrimiento'):
     # 3) Default
     return 0
 
+def get_snmp_max_concurrent_queries(tipo_operacion='descubrimiento'):
+    """
+    Obtener máximo de consultas SNMP simultáneas por OLT (semáforo distribuido).
+    
+    Args:
+        tipo_operacion: 'descubrimiento', 'get', 'bulk', 'table', o 'general'
+    """
+    config = ConfiguracionSNMP.get_config_for_tipo(tipo_operacion)
+    if config:
+        return config.max_consultas_snmp_simultaneas
+    return 5
+
+def get_snmp_ingest_method(tipo_operacion='descubrimiento'):
+    """
+    Obtener método de persistencia de resultados ('orm' o 'copy').
+    
+    Args:
+        tipo_operacion: 'descubrimiento', 'get', 'bulk', 'table', o 'general'
+    """
+    config = ConfiguracionSNMP.get_config_for_tipo(tipo_operacion)
+    if config:
+        return config.metodo_ingesta
+    return 'orm'
+
+def get_snmp_max_repetitions(tipo_operacion='descubrimiento'):
+    """
+    Obtener max-repetitions de los GETBULK de los walks (0 = GETNEXT).
+    
+    Args:
+        tipo_operacion: 'descubrimiento', 'get', 'bulk', 'table', o 'general'
+    """
+    config = ConfiguracionSNMP.get_config_for_tipo(tipo_operacion)
+    if config:
+        return config.max_repeticiones
+    return 25
+
 def get_dispatcher_interval():
     """Obtener intervalo del dispatcher"""
     return ConfiguracionService.get_config('dispatcher_interval', 10)
@@ -254,3 +290,79 @@ def get_log_level():
 def is_retry_system_enabled():
     """Verificar si el sistema de reintentos está habilitado"""
     return ConfiguracionService.get_config('enable_retry_system', True)
+
+def is_discovery_bulk_reconcile_enabled():
+    """Verificar si discovery usa reconciliación masiva (bulk) en lugar de fila por fila"""
+    return ConfiguracionService.get_config('discovery_bulk_reconcile', True)
+
+def get_discovery_bulk_chunk_size():
+    """Obtener tamaño de lote para bulk_create/bulk_update en discovery"""
+    return ConfiguracionService.get_config('discovery_bulk_chunk_size', 1000)
+
+def is_get_planner_enabled():
+    """Verificar si GET elige entre walk de columna y GETs dirigidos (planner)"""
+    return ConfiguracionService.get_config('get_planner_enabled', True)
+
+def get_get_walk_min_ratio():
+    """Obtener proporción mínima ONUs pedidas / ONUs conocidas para considerar un walk de columna"""
+    return ConfiguracionService.get_config('get_walk_min_ratio', 0.5)
+
+def get_get_bulk_flush_size():
+    """Obtener cada cuántas ONUs los pollers GET vacían su buffer de escrituras"""
+    return ConfiguracionService.get_config('get_bulk_flush_size', 500)
+
+def get_scheduling_mode():
+    """Obtener modo de programación: 'aligned' (todas las OLTs en el tick) o 'spread' (fases por job/OLT)"""
+    return ConfiguracionService.get_config('scheduling_mode', 'aligned')
+
+def get_schedule_spread_ratio():
+    """Obtener fracción del intervalo del job sobre la que se reparten las fases (modo spread)"""
+    return ConfiguracionService.get_config('schedule_spread_ratio', 0.8)
+
+def get_schedule_spread_max_seconds():
+    """Obtener ventana máxima de reparto en segundos (acota jobs de intervalo largo)"""
+    return ConfiguracionService.get_config('schedule_spread_max_seconds', 900)
+
+def get_schedule_olt_stagger_seconds():
+    """Obtener separación mínima en segundos entre ejecuciones de distintos jobs en la misma OLT"""
+    return ConfiguracionService.get_config('schedule_olt_stagger_seconds', 5)
+
+def is_snmp_async_enabled():
+    """Verificar si discovery y GET usan el motor SNMP asíncrono (snmp_client)"""
+    return ConfiguracionService.get_config('snmp_async_enabled', False)
+
+def get_snmp_async_backend():
+    """Obtener backend del motor SNMP asíncrono ('asyncio' nativo o 'easysnmp' en hilos)"""
+    return ConfiguracionService.get_config('snmp_async_backend', 'asyncio')
+
+def is_get_adaptive_enabled():
+    """Verificar si la concurrencia y el tamaño de lote GET se ajustan por OLT (AIMD)"""
+    return ConfiguracionService.get_config('get_adaptive_enabled', True)
+
+def is_discovery_delta_persistence_enabled():
+    """Verificar si discovery solo escribe las filas de onu_status que cambiaron (last_seen_at por época de walk)"""
+    return ConfiguracionService.get_config('discovery_delta_persistence', True)
+
+def get_discovery_last_seen_flush_interval():
+    """Obtener cada cuántos segundos se vuelca la época del walk a onu_status.last_seen_at"""
+    return ConfiguracionService.get_config('discovery_last_seen_flush_interval', 3600)
+
+def get_discovery_parallel_walks():
+    """Obtener cuántos rangos de slots recorre en paralelo el walk de discovery (1 = walk único)"""
+    return ConfiguracionService.get_config('discovery_parallel_walks', 1)
+
+def is_job_fusion_enabled():
+    """Verificar si el dispatcher fusiona los jobs vencidos de una misma OLT en una sola unidad de trabajo"""
+    return ConfiguracionService.get_config('job_fusion_enabled', True)
+
+def is_olt_breaker_enabled():
+    """Verificar si el circuit breaker por OLT corta el trabajo contra OLTs que no responden"""
+    return ConfiguracionService.get_config('olt_breaker_enabled', True)
+
+def get_olt_breaker_failure_threshold():
+    """Obtener cuántos fallos seguidos por OLT inalcanzable abren el breaker"""
+    return ConfiguracionService.get_config('olt_breaker_failure_threshold', 3)
+
+def get_olt_breaker_open_seconds():
+    """Obtener cuántos segundos queda abierto el breaker antes de la primera sonda (se duplica si la sonda falla)"""
+    return ConfiguracionService.get_config('olt_breaker_open_seconds', 60)
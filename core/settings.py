@@ -66,6 +66,7 @@ INSTALLED_APPS = [
     "configuracion_avanzada",
     "snmp_get",
     "snmp_formulas",
+    "snmp_client",
     "olt_models",
     "zabbix_config",
     "api",  # App de la REST API
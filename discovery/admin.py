@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import OnuIndexMap, OnuStatus, OnuInventory, OnuStateLookup
+from .models import OnuIndexMap, OnuStatus, OnuInventory, OnuStateLookup, OltWalkEpoch
 
 
 @admin.register(OnuStateLookup)
@@ -29,17 +29,29 @@ class OnuIndexMapAdmin(admin.ModelAdmin):
 class OnuStatusAdmin(admin.ModelAdmin):
     """Admin para estado actual de ONUs"""
     list_display = (
-        'id', 'get_onu_info', 'olt', 'last_seen_at', 'get_state_info', 
+        'id', 'get_onu_info', 'olt', 'get_last_seen', 'get_state_info', 
         'presence', 'consecutive_misses', 'updated_at'
     )
     list_filter = ('olt', 'presence', 'last_state_label', 'last_seen_at')
     search_fields = ('onu_index__raw_index_key', 'onu_index__normalized_id')
     readonly_fields = (
-        'onu_index', 'olt', 'last_seen_at', 'last_state_value', 
+        'onu_index', 'olt', 'last_seen_at', 'get_last_seen', 'last_state_value', 
         'last_state_label', 'consecutive_misses', 'last_change_execution', 'updated_at'
     )
     ordering = ('-last_seen_at',)
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_last_seen()
+    
+    def get_ordering(self, request):
+        # Ordenar por último visto efectivo (anotación, no campo del modelo)
+        return ('-effective_last_seen_at',)
+    
+    def get_last_seen(self, obj):
+        return obj.effective_last_seen_at
+    get_last_seen.short_description = 'Último visto'
+    get_last_seen.admin_order_field = 'effective_last_seen_at'
+    
     def get_onu_info(self, obj):
         return f"{obj.onu_index.normalized_id} ({obj.onu_index.raw_index_key})"
     get_onu_info.short_description = 'ONU'
@@ -302,3 +314,13 @@ class OnuInventoryInfoAdmin(admin.ModelAdmin):
     
     def has_add_permission(self, request):
         return False  # Solo se crean automáticamente por las tareas
+
+
+@admin.register(OltWalkEpoch)
+class OltWalkEpochAdmin(admin.ModelAdmin):
+    """Admin para épocas de walk (último visto de las ONUs ENABLED)"""
+    list_display = ('olt', 'last_walk_at', 'last_flushed_at', 'last_execution')
+    readonly_fields = ('olt', 'last_walk_at', 'last_flushed_at', 'last_execution')
+    
+    def has_add_permission(self, request):
+        return False  # Solo se crean automáticamente por las tareas
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('executions', '0004_add_interrupted_status'),
+        ('hosts', '0003_alter_olt_modelo'),
+        ('discovery', '0004_fix_onu_state_lookup_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OltWalkEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_walk_at', models.DateTimeField()),
+                ('last_flushed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_execution', models.ForeignKey(blank=True, db_column='last_execution_id', null=True, on_delete=django.db.models.deletion.SET_NULL, to='executions.execution')),
+                ('olt', models.OneToOneField(db_column='olt_id', on_delete=django.db.models.deletion.CASCADE, related_name='walk_epoch', to='hosts.olt')),
+            ],
+            options={
+                'verbose_name': 'Época de Walk por OLT',
+                'verbose_name_plural': 'Épocas de Walk por OLT',
+                'db_table': 'olt_walk_epoch',
+            },
+        ),
+    ]
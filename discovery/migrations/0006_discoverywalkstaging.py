@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('executions', '0004_add_interrupted_status'),
+        ('hosts', '0003_alter_olt_modelo'),
+        ('discovery', '0005_oltwalkepoch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscoveryWalkStaging',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_index_key', models.CharField(max_length=255)),
+                ('state_value', models.SmallIntegerField()),
+                ('execution', models.ForeignKey(db_column='execution_id', on_delete=django.db.models.deletion.CASCADE, to='executions.execution')),
+                ('olt', models.ForeignKey(db_column='olt_id', on_delete=django.db.models.deletion.CASCADE, to='hosts.olt')),
+            ],
+            options={
+                'verbose_name': 'Staging de Walk',
+                'verbose_name_plural': 'Staging de Walks',
+                'db_table': 'discovery_walk_staging',
+                'indexes': [models.Index(fields=['execution', 'raw_index_key'], name='discovery_w_executi_1cdd66_idx')],
+            },
+        ),
+    ]
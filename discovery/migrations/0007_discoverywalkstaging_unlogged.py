@@ -0,0 +1,33 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def set_unlogged(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE discovery_walk_staging SET UNLOGGED')
+
+
+def set_logged(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE discovery_walk_staging SET LOGGED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discovery', '0006_discoverywalkstaging'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='discoverywalkstaging',
+            name='execution',
+            field=models.ForeignKey(db_column='execution_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='executions.execution'),
+        ),
+        migrations.AlterField(
+            model_name='discoverywalkstaging',
+            name='olt',
+            field=models.ForeignKey(db_column='olt_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='hosts.olt'),
+        ),
+        migrations.RunPython(set_unlogged, set_logged),
+    ]
@@ -39,6 +39,35 @@ class OnuIndexMap(models.Model):
     def __str__(self):
         return f"{self.olt.abreviatura} - {self.raw_index_key}"
     
+    @staticmethod
+    def find_formula_for_olt(olt):
+        """
+        Devuelve la fórmula compilada aplicable a la OLT con prioridad:
+        marca + modelo → marca (genérica) → completamente genérica
+        
+        La resolución se cachea por proceso (ver snmp_formulas.services).
+        """
+        from snmp_formulas.services import get_formula_for_olt
+        return get_formula_for_olt(olt)
+    
+    def apply_formula(self, formula):
+        """
+        Calcula slot, port, logical y normalized_id usando la fórmula indicada
+        """
+        components = formula.calculate_components(self.raw_index_key)
+        
+        if components['slot'] is not None:
+            self.slot = components['slot']
+            self.port = components['port']
+            self.logical = components['logical']
+            
+            # Actualizar normalized_id usando el formato de la fórmula
+            self.normalized_id = formula.get_normalized_id(
+                self.slot, 
+                self.port, 
+                self.logical
+            )
+    
     def save(self, *args, **kwargs):
         """
         Calcula automáticamente slot, port y logical usando fórmulas configurables de BD
@@ -46,48 +75,11 @@ class OnuIndexMap(models.Model):
         # Solo calcular si no están ya calculados
         if self.slot is None or self.port is None or self.logical is None:
             # Buscar fórmula configurada para esta marca/modelo
-            from snmp_formulas.models import IndexFormula
-            
-            # Intentar primero con marca + modelo específico
-            formula = None
-            if self.olt.modelo:
-                formula = IndexFormula.objects.filter(
-                    marca=self.olt.marca,
-                    modelo=self.olt.modelo,
-                    activo=True
-                ).first()
-            
-            # Si no hay fórmula específica, buscar fórmula genérica para la marca
-            if not formula:
-                formula = IndexFormula.objects.filter(
-                    marca=self.olt.marca,
-                    modelo__isnull=True,  # Fórmula genérica (sin modelo específico)
-                    activo=True
-                ).first()
-            
-            # Si no hay fórmula para la marca, buscar fórmula completamente genérica (sin marca)
-            if not formula:
-                formula = IndexFormula.objects.filter(
-                    marca__isnull=True,  # Fórmula completamente genérica (sin marca)
-                    modelo__isnull=True,  # Sin modelo específico
-                    activo=True
-                ).first()
+            formula = self.find_formula_for_olt(self.olt)
             
             # Si hay fórmula, calcular componentes
             if formula:
-                components = formula.calculate_components(self.raw_index_key)
-                
-                if components['slot'] is not None:
-                    self.slot = components['slot']
-                    self.port = components['port']
-                    self.logical = components['logical']
-                    
-                    # Actualizar normalized_id usando el formato de la fórmula
-                    self.normalized_id = formula.get_normalized_id(
-                        self.slot, 
-                        self.port, 
-                        self.logical
-                    )
+                self.apply_formula(formula)
         
         super().save(*args, **kwargs)
 
@@ -117,6 +109,37 @@ class OnuStateLookup(models.Model):
         return f"{self.value} - {self.label}"
 
 
+def effective_last_seen(prefix=''):
+    """
+    Expresión del último visto efectivo de una ONU.
+
+    Con persistencia delta, las ONUs ENABLED que no cambiaron no reescriben
+    last_seen_at en cada walk: su último visto es el último walk exitoso de su
+    OLT (OltWalkEpoch), si es posterior al valor guardado.
+
+    Args:
+        prefix: Ruta desde el modelo consultado hasta OnuStatus (p. ej. 'onu_index__status__')
+    """
+    return models.Case(
+        models.When(
+            **{
+                f'{prefix}presence': 'ENABLED',
+                f'{prefix}olt__walk_epoch__last_walk_at__gt': models.F(f'{prefix}last_seen_at'),
+            },
+            then=models.F(f'{prefix}olt__walk_epoch__last_walk_at')
+        ),
+        default=models.F(f'{prefix}last_seen_at'),
+        output_field=models.DateTimeField()
+    )
+
+
+class OnuStatusQuerySet(models.QuerySet):
+
+    def with_last_seen(self):
+        """Anota effective_last_seen_at (ver effective_last_seen)"""
+        return self.annotate(effective_last_seen_at=effective_last_seen())
+
+
 class OnuStatus(models.Model):
     """
     Tabla ligera que representa el estado actual (sin histórico).
@@ -137,6 +160,8 @@ class OnuStatus(models.Model):
     last_change_execution = models.ForeignKey("executions.Execution", on_delete=models.SET_NULL, db_column="last_change_execution_id", null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OnuStatusQuerySet.as_manager()
+
     class Meta:
         db_table = "onu_status"
         ordering = ["-last_seen_at"]
@@ -152,6 +177,56 @@ class OnuStatus(models.Model):
         return f"{self.onu_index.normalized_id} - {self.presence}"
 
 
+class OltWalkEpoch(models.Model):
+    """
+    Último walk de descubrimiento exitoso por OLT ("época").
+
+    Con persistencia delta es la fuente del last_seen_at de las ONUs ENABLED;
+    cada tanto se vuelca en bloque a onu_status.last_seen_at (last_flushed_at).
+    """
+    olt = models.OneToOneField("hosts.OLT", on_delete=models.CASCADE, db_column="olt_id", related_name="walk_epoch")
+    last_walk_at = models.DateTimeField()
+    last_execution = models.ForeignKey("executions.Execution", on_delete=models.SET_NULL, db_column="last_execution_id", null=True, blank=True)
+    last_flushed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "olt_walk_epoch"
+        verbose_name = "Época de Walk por OLT"
+        verbose_name_plural = "Épocas de Walk por OLT"
+
+    def __str__(self):
+        return f"{self.olt} - {self.last_walk_at}"
+
+
+class DiscoveryWalkStaging(models.Model):
+    """
+    Filas de un walk de descubrimiento en curso (staging).
+
+    El walk se vuelca aquí en lotes mientras llega; solo si termina con éxito
+    se aplica a onu_index_map / onu_inventory / onu_status en una única
+    transacción y luego se borra. Un walk fallido nunca toca las tablas vivas.
+
+    En PostgreSQL la tabla es UNLOGGED (no escribe WAL: su contenido es
+    descartable) y sus FKs no tienen constraint en la BD para que la carga
+    con COPY no pague un chequeo por fila; el CASCADE lo resuelve Django.
+    """
+    execution = models.ForeignKey("executions.Execution", on_delete=models.CASCADE, db_column="execution_id", db_constraint=False)
+    olt = models.ForeignKey("hosts.OLT", on_delete=models.CASCADE, db_column="olt_id", db_constraint=False)
+    raw_index_key = models.CharField(max_length=255)
+    state_value = models.SmallIntegerField()
+
+    class Meta:
+        db_table = "discovery_walk_staging"
+        verbose_name = "Staging de Walk"
+        verbose_name_plural = "Staging de Walks"
+        indexes = [
+            models.Index(fields=["execution", "raw_index_key"]),
+        ]
+
+    def __str__(self):
+        return f"{self.execution_id} - {self.raw_index_key} = {self.state_value}"
+
+
 class OnuInventory(models.Model):
     """
     Registro maestro (único por ONU conocida). Aquí se guarda la descripción y metadatos
@@ -3,16 +3,28 @@ Servicios para lógica de descubrimiento SNMP Walk
 """
 import logging
 import time
-from typing import Dict, List, Tuple, Optional
-from django.db import transaction
+from array import array
+from datetime import timedelta
+from itertools import islice
+from typing import Dict, Iterable, List, Tuple, Optional
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, F, Q, Value, When
 from django.utils import timezone
-from easysnmp import Session
 from django.conf import settings
 
-from .models import OnuIndexMap, OnuStatus, OnuInventory, OnuStateLookup
+import numpy as np
+
+from .models import OnuIndexMap, OnuStatus, OnuInventory, OnuStateLookup, OltWalkEpoch, DiscoveryWalkStaging
+from .pg_ingest import use_copy_ingest, copy_rows, temp_staging_table
 from executions.models import Execution
 from hosts.models import OLT
-from configuracion_avanzada.services import get_snmp_timeout, get_snmp_retries
+from configuracion_avanzada.services import (
+    is_discovery_bulk_reconcile_enabled, get_discovery_bulk_chunk_size,
+    is_snmp_async_enabled, get_snmp_max_concurrent_queries, get_snmp_max_repetitions,
+    is_discovery_delta_persistence_enabled, get_discovery_last_seen_flush_interval,
+    get_discovery_parallel_walks,
+)
+from redis import Redis
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +32,114 @@ logger = logging.getLogger(__name__)
 
 # Configuraciones 
 CONSECUTIVE_MISSES_THRESHOLD = 1  # Basta que no aparezca UNA VEZ para marcarla como DISABLED
+GETNEXT_ONLY_TTL = 24 * 3600      # Una OLT cuyo agente falló con GETBULK se recorre con GETNEXT por 24 h
+
+redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def _chunks(items: List, size: int):
+    """Divide una lista en lotes de tamaño fijo"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _chunks_of(iterable: Iterable, size: int):
+    """Agrupa un iterable (p. ej. un generador) en listas de tamaño fijo sin materializarlo"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _elapsed_ms(start: float) -> int:
+    """Milisegundos transcurridos desde start (time.perf_counter)"""
+    return int((time.perf_counter() - start) * 1000)
+
+
+class WalkResults:
+    """
+    Resultados de un walk de descubrimiento en arrays paralelos:
+    snmp_index y onu_number en array('I') y estado en array('h') (el rango de
+    DiscoveryWalkStaging.state_value), 10 bytes por ONU frente a los ~200 de
+    una tupla (str, int) de Python.
+    
+    snmp_index y onu_number son sub-identificadores de OID (32 bits sin
+    signo), así que la clave "snmp_index.onu_number" se empaqueta sin
+    pérdida en un uint64 (snmp_index << 32 | onu_number) y el diff
+    presente/ausente contra el snapshot de la BD se resuelve con np.isin.
+    No hace falta tabla de strings: raw_index_key se formatea solo al
+    escribir en la BD.
+    """
+    
+    MAX_SUBID = (1 << 32) - 1
+    
+    __slots__ = ('snmp_index', 'onu_number', 'state')
+    
+    def __init__(self):
+        self.snmp_index = array('I')
+        self.onu_number = array('I')
+        self.state = array('h')
+    
+    @classmethod
+    def from_staging(cls, queryset, chunk_size: int) -> 'WalkResults':
+        """Carga el staging de una ejecución (p. ej. ejecución procesada desde un script) con un cursor del servidor"""
+        walked = cls()
+        rows = queryset.values_list('raw_index_key', 'state_value').iterator(chunk_size=chunk_size)
+        for raw_index_key, state_value in rows:
+            snmp_index, _, onu_number = raw_index_key.partition('.')
+            walked.append(int(snmp_index), int(onu_number), state_value)
+        return walked
+    
+    def append(self, snmp_index: int, onu_number: int, state_value: int):
+        self.snmp_index.append(snmp_index)
+        self.onu_number.append(onu_number)
+        self.state.append(state_value)
+    
+    def extend(self, rows):
+        """Agrega tuplas (snmp_index, onu_number, state) como las del parser del walk"""
+        for snmp_index, onu_number, state_value in rows:
+            self.append(snmp_index, onu_number, state_value)
+    
+    def __len__(self):
+        return len(self.state)
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(len(column) * column.itemsize for column in (self.snmp_index, self.onu_number, self.state))
+    
+    def packed_keys(self) -> np.ndarray:
+        """Claves empaquetadas (uint64) de todas las filas, en el orden del walk"""
+        snmp_index = np.frombuffer(self.snmp_index, dtype=np.uintc).astype(np.uint64)
+        onu_number = np.frombuffer(self.onu_number, dtype=np.uintc).astype(np.uint64)
+        return (snmp_index << np.uint64(32)) | onu_number
+    
+    def contains_keys(self, raw_index_keys) -> np.ndarray:
+        """
+        Máscara bool: qué raw_index_key aparecieron en el walk. Las claves que
+        no son "snmp_index.onu_number" con dos sub-identificadores válidos
+        nunca están.
+        """
+        keys = np.asarray([str(key) for key in raw_index_keys], dtype=np.str_).reshape(-1)
+        if not len(keys):
+            return np.zeros(0, dtype=bool)
+        parts = np.char.partition(keys, '.').reshape(-1, 3)
+        head, dot, tail = parts[:, 0], parts[:, 1], parts[:, 2]
+        # Hasta 10 dígitos: entra en uint64 sin desbordar antes del chequeo de rango
+        valid = (
+            (dot == '.')
+            & np.char.isdigit(head) & (np.char.str_len(head) <= 10)
+            & np.char.isdigit(tail) & (np.char.str_len(tail) <= 10)
+        )
+        snmp_index = np.where(valid, head, '0').astype(np.uint64)
+        onu_number = np.where(valid, tail, '0').astype(np.uint64)
+        valid &= (snmp_index <= self.MAX_SUBID) & (onu_number <= self.MAX_SUBID)
+        packed = (snmp_index << np.uint64(32)) | onu_number
+        return valid & np.isin(packed, self.packed_keys())
+    
+    def __contains__(self, raw_index_key) -> bool:
+        return bool(self.contains_keys([raw_index_key])[0])
 
 
 class DiscoveryService:
@@ -27,16 +147,31 @@ class DiscoveryService:
     Servicio principal para ejecutar descubrimiento SNMP Walk
     """
     
-    def __init__(self, execution_id: int):
-        self.execution = Execution.objects.get(pk=execution_id)
+    def __init__(self, execution):
+        """
+        Args:
+            execution: Execution ya cargada (execute_discovery la tiene bajo
+                select_for_update, con su OLT y su job) o su ID
+        """
+        if not isinstance(execution, Execution):
+            execution = Execution.objects.select_related('olt', 'snmp_job').get(pk=execution)
+        self.execution = execution
         self.olt = self.execution.olt
         self.job = self.execution.snmp_job
         self.logger = logging.getLogger(f"{__name__}.{self.olt.abreviatura}")
+        self.walk_stats = {}
+        self.walk_results = None
         
     def execute_discovery_walk(self) -> Dict:
         """
-        Ejecuta el walk completo de descubrimiento para la OLT
-        SOLO actualiza la base de datos si la tarea es SUCCESS
+        Ejecuta el walk completo de descubrimiento para la OLT en streaming:
+        walk (páginas de varbinds) → parser (tuplas compactas) → staging en lotes.
+        Fuera de PostgreSQL las claves quedan además en self.walk_results
+        (WalkResults, ~10 bytes por ONU) para el diff de ausentes; en
+        PostgreSQL ese diff es un anti-join contra el staging.
+        
+        SOLO actualiza las tablas vivas process_staged_walk(), y solo si la
+        tarea es SUCCESS; si el walk falla, el staging se descarta.
         """
         self.logger.info(f"🔍 Iniciando descubrimiento SNMP Walk para OLT {self.olt.abreviatura}")
         
@@ -49,35 +184,58 @@ class DiscoveryService:
             'errors': [],
             'duration_ms': 0,
             'walk_successful': False,
-            'memory_data': []
         }
         
         try:
             # Verificar que la OLT esté habilitada antes de continuar
             if not self.olt.habilitar_olt:
                 raise Exception(f"OLT {self.olt.abreviatura} está deshabilitada")
-                
-            # Ejecutar SNMP Walk y guardar en memoria
-            walk_results = self._execute_snmp_walk()
-            self.logger.info(f"📊 Walk completado: {len(walk_results)} resultados obtenidos")
             
-            # Guardar resultados en memoria (sin procesar aún) - convertir a tipos básicos
-            # Asegurar que memory_data sea serializable (solo strings e ints)
-            memory_data = []
-            for raw_index_key, state_value in walk_results:
-                memory_data.append([str(raw_index_key), int(state_value)])
+            # Staging huérfano de walks anteriores de esta OLT (worker caído):
+            # el lock de la OLT garantiza que no hay otro walk en curso
+            DiscoveryWalkStaging.objects.filter(olt=self.olt).delete()
             
-            results['memory_data'] = memory_data
-            results['total_found'] = len(walk_results)
-            results['walk_successful'] = True
+            # Walk → parser → staging, de a un lote por vez
+            self.walk_results = WalkResults() if connection.vendor != 'postgresql' else None
+            chunk_size = get_discovery_bulk_chunk_size()
+            copy_ingest = use_copy_ingest('descubrimiento')
+            for chunk in _chunks_of(self._parse_walk(self._iter_walk_pages()), chunk_size):
+                if copy_ingest:
+                    with connection.cursor() as cursor:
+                        copy_rows(
+                            cursor, DiscoveryWalkStaging._meta.db_table,
+                            ['execution_id', 'olt_id', 'raw_index_key', 'state_value'],
+                            (
+                                (self.execution.id, self.olt.id, f"{snmp_index}.{onu_number}", state_value)
+                                for snmp_index, onu_number, state_value in chunk
+                            )
+                        )
+                else:
+                    DiscoveryWalkStaging.objects.bulk_create([
+                        DiscoveryWalkStaging(
+                            execution_id=self.execution.id,
+                            olt_id=self.olt.id,
+                            raw_index_key=f"{snmp_index}.{onu_number}",
+                            state_value=state_value
+                        )
+                        for snmp_index, onu_number, state_value in chunk
+                    ])
+                if self.walk_results is not None:
+                    self.walk_results.extend(chunk)
+                results['total_found'] += len(chunk)
             
-            self.logger.info(f"💾 Resultados guardados en memoria. Total: {len(walk_results)}")
+            results['walk_successful'] = True
+            self.logger.info(
+                f"📊 Walk completado: {results['total_found']} resultados en staging "
+                f"({self.walk_stats['mode']}, {self.walk_stats['pages']} PDUs, SNMP {self.walk_stats['snmp_ms']}ms)"
+            )
             
         except Exception as e:
             # Log del error sin traceback para mantener logs limpios
             self.logger.error(f"❌ Error en SNMP Walk: {str(e)}")
             results['errors'].append(str(e))
             results['walk_successful'] = False
+            self.discard_staged_walk()
             # IMPORTANTE: Re-lanzar la excepción para que execute_discovery la capture
             raise
         
@@ -85,12 +243,116 @@ class DiscoveryService:
             # Calcular duración
             end_time = timezone.now()
             results['duration_ms'] = int((end_time - start_time).total_seconds() * 1000)
+            if self.walk_stats:
+                results['walk'] = dict(self.walk_stats)
             
         return results
     
-    def process_successful_walk(self, walk_results: List[List]) -> Dict:
+    def staged_walk(self):
+        """QuerySet del staging de esta ejecución"""
+        return DiscoveryWalkStaging.objects.filter(execution_id=self.execution.id)
+    
+    def walked_results(self) -> WalkResults:
+        """
+        Claves del walk para el diff de ausentes fuera de PostgreSQL: las que
+        juntó el propio walk o, si el staging lo llenó otro servicio
+        (scripts), las del staging
+        """
+        if self.walk_results is None:
+            self.walk_results = WalkResults.from_staging(self.staged_walk(), get_discovery_bulk_chunk_size())
+        return self.walk_results
+    
+    def discard_staged_walk(self):
+        """Descarta el staging de esta ejecución (walk fallido o ya aplicado) y sus claves"""
+        self.walk_results = None
+        deleted, _ = self.staged_walk().delete()
+        if deleted:
+            self.logger.debug(f"🧹 Staging descartado: {deleted} filas")
+    
+    def skip_reason(self) -> Optional[str]:
+        """Motivo para no tocar las tablas de discovery (OID de otro espacio) o None"""
+        if self.job.oid.espacio != 'descubrimiento':
+            return f'OID no es de tipo descubrimiento (espacio: {self.job.oid.espacio})'
+        return None
+    
+    def process_staged_walk(self) -> Dict:
         """
-        Procesa los resultados del walk SOLO cuando la tarea es SUCCESS
+        Aplica el walk en staging a las tablas vivas SOLO cuando la tarea es
+        SUCCESS: toda la reconciliación va en una única transacción, así que
+        los demás procesos ven el walk anterior o el nuevo completo, nunca uno
+        a medias. El staging se borra al terminar (haya error o no).
+        """
+        try:
+            reason = self.skip_reason()
+            if reason:
+                logger.info(f"⚠️ OID {self.job.oid.nombre}: {reason}, no se procesarán las tablas de discovery")
+                return {
+                    'status': 'skipped',
+                    'reason': reason,
+                    'processed_records': 0,
+                    'updated_records': 0,
+                    'disabled_records': 0
+                }
+            
+            if use_copy_ingest('descubrimiento'):
+                self._prepare_reconcile()
+                return self._merge_staged_walk()
+            
+            chunk_size = get_discovery_bulk_chunk_size()
+            return self._reconcile(self._iter_staged_chunks(chunk_size))
+        finally:
+            self.discard_staged_walk()
+    
+    def _reconcile(self, walk_chunks) -> Dict:
+        """
+        Reconcilia los lotes del walk contra la BD.
+        Usa reconciliación masiva (bulk) salvo que esté deshabilitada en configuración.
+        
+        Con persistencia delta solo se escriben las filas de onu_status cuyo
+        estado, label, presencia o faltas cambiaron; el last_seen_at de las
+        demás lo da la época del walk de la OLT (OltWalkEpoch).
+        
+        Args:
+            walk_chunks: Iterable de lotes [(raw_index_key, state_value), ...] sin índices repetidos
+        """
+        self._prepare_reconcile()
+        
+        if is_discovery_bulk_reconcile_enabled():
+            return self._bulk_reconcile_walk(walk_chunks)
+        return self._reconcile_row_by_row(walk_chunks)
+    
+    def _prepare_reconcile(self):
+        """Parámetros comunes a todos los modos de reconciliación"""
+        self.delta_persistence = is_discovery_delta_persistence_enabled()
+        # Walk exitoso anterior: último visto de las ONUs que dejan de aparecer en este
+        self.previous_walk_at = OltWalkEpoch.objects.filter(olt=self.olt).values_list(
+            'last_walk_at', flat=True
+        ).first()
+    
+    def _iter_staged_chunks(self, chunk_size: int):
+        """
+        Lee el staging en lotes (cursor del servidor, sin cargarlo entero) y
+        colapsa índices repetidos: gana la última fila recibida.
+        """
+        rows = self.staged_walk().order_by('raw_index_key', 'id').values_list(
+            'raw_index_key', 'state_value'
+        ).iterator(chunk_size=chunk_size)
+        
+        chunk = []
+        for raw_index_key, state_value in rows:
+            if chunk and chunk[-1][0] == raw_index_key:
+                chunk[-1] = (raw_index_key, state_value)
+                continue
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+            chunk.append((raw_index_key, state_value))
+        if chunk:
+            yield chunk
+    
+    def _reconcile_row_by_row(self, walk_chunks) -> Dict:
+        """
+        Procesa los resultados del walk ONU por ONU (modo original, 6-8 consultas por ONU)
         """
         self.logger.info(f"🔄 Procesando resultados exitosos para OLT {self.olt.abreviatura}")
         
@@ -98,25 +360,26 @@ class DiscoveryService:
             'new_index_created': 0,
             'enabled_count': 0,
             'disabled_count': 0,
-            'errors': []
+            'unchanged_count': 0,
+            'errors': [],
+            'reconcile_mode': 'row_by_row'
         }
         
         try:
             # Procesar resultados en transacción atómica
             with transaction.atomic():
-                processed_indices = set()
-                
-                for item in walk_results:
-                    raw_index_key, state_value = item[0], item[1]
-                    try:
-                        self._process_walk_result(raw_index_key, state_value, results)
-                        processed_indices.add(raw_index_key)
-                    except Exception as e:
-                        self.logger.error(f"❌ Error procesando {raw_index_key}: {e}")
-                        results['errors'].append(f"{raw_index_key}: {str(e)}")
+                for chunk in walk_chunks:
+                    for raw_index_key, state_value in chunk:
+                        try:
+                            self._process_walk_result(raw_index_key, state_value, results)
+                        except Exception as e:
+                            self.logger.error(f"❌ Error procesando {raw_index_key}: {e}")
+                            results['errors'].append(f"{raw_index_key}: {str(e)}")
                 
                 # Post-proceso: marcar ausentes
-                self._mark_missing_onus(processed_indices, results)
+                self._mark_missing_onus(results)
+                
+                self._record_walk_epoch(timezone.now(), results)
                 
             self.logger.info(f"✅ Procesamiento completado: {results}")
                 
@@ -127,68 +390,533 @@ class DiscoveryService:
         
         return results
     
-    def _execute_snmp_walk(self) -> List[Tuple[str, int]]:
+    def _bulk_reconcile_walk(self, walk_chunks) -> Dict:
         """
-        Ejecuta el SNMP Walk y retorna lista de (raw_index_key, state_value)
-        Usa el OID de la tarea, no un OID hardcodeado
+        Reconciliación masiva del walk contra la BD, lote por lote:
+        1. Carga los índices, estados e inventarios de las ONUs del lote
+        2. Calcula las diferencias en memoria
+        3. Aplica inserts/updates con bulk_create/bulk_update
+        La memoria queda acotada por el tamaño del lote, no por el de la OLT.
+        Registra el tiempo acumulado de cada fase en results['timings_ms'].
         """
+        self.logger.info(f"🔄 Procesando resultados exitosos para OLT {self.olt.abreviatura} (modo bulk)")
+        
+        chunk_size = get_discovery_bulk_chunk_size()
+        results = {
+            'new_index_created': 0,
+            'enabled_count': 0,
+            'disabled_count': 0,
+            'unchanged_count': 0,
+            'errors': [],
+            'reconcile_mode': 'bulk',
+            'timings_ms': {'load': 0, 'index_map': 0, 'inventory': 0, 'status': 0}
+        }
+        timings = results['timings_ms']
+        total_start = time.perf_counter()
+        
         try:
-            session = Session(
-                hostname=self.olt.ip_address,
-                community=self.olt.comunidad,
-                version=2,
-                timeout=get_snmp_timeout(),
-                retries=get_snmp_retries()
+            with transaction.atomic():
+                state_labels = self._load_state_labels()
+                unknown_states = set()
+                now = timezone.now()
+                
+                for chunk in walk_chunks:
+                    self._bulk_reconcile_chunk(chunk, state_labels, unknown_states, now, chunk_size, results)
+                
+                if unknown_states:
+                    self.logger.warning(f"⚠️ Estados desconocidos {sorted(unknown_states)} para marca {self.job.marca.nombre}")
+                if results['new_index_created']:
+                    self.logger.info(f"📝 Nuevos índices creados: {results['new_index_created']}")
+                
+                # Post-proceso: marcar ausentes
+                phase_start = time.perf_counter()
+                self._mark_missing_onus(results)
+                timings['missing'] = _elapsed_ms(phase_start)
+                
+                # Época del walk (y volcado periódico de last_seen_at)
+                phase_start = time.perf_counter()
+                self._record_walk_epoch(now, results)
+                timings['epoch'] = _elapsed_ms(phase_start)
+            
+            timings['total'] = _elapsed_ms(total_start)
+            self.logger.info(f"✅ Procesamiento bulk completado: {results}")
+            
+        except Exception as e:
+            self.logger.error(f"❌ Error procesando resultados: {e}")
+            results['errors'].append(str(e))
+            raise
+        
+        return results
+    
+    def _bulk_reconcile_chunk(self, chunk, state_labels: Dict[int, str], unknown_states: set,
+                              now, chunk_size: int, results: Dict):
+        """Reconcilia un lote [(raw_index_key, state_value), ...] del walk"""
+        timings = results['timings_ms']
+        
+        # FASE 1: Snapshot del estado actual de las ONUs del lote
+        phase_start = time.perf_counter()
+        keys = [raw_index_key for raw_index_key, _ in chunk]
+        index_ids = dict(
+            OnuIndexMap.objects.filter(olt=self.olt, raw_index_key__in=keys).values_list('raw_index_key', 'id')
+        )
+        statuses = {
+            status.onu_index_id: status
+            for status in OnuStatus.objects.filter(onu_index_id__in=list(index_ids.values()))
+        }
+        inventories = dict(
+            OnuInventory.objects.filter(onu_index_id__in=list(index_ids.values())).values_list('onu_index_id', 'active')
+        )
+        timings['load'] += _elapsed_ms(phase_start)
+        
+        # FASE 2: Crear índices nuevos
+        phase_start = time.perf_counter()
+        new_keys = [key for key in keys if key not in index_ids]
+        if new_keys:
+            self._bulk_create_index_maps(new_keys, index_ids, chunk_size)
+            results['new_index_created'] += len(new_keys)
+        timings['index_map'] += _elapsed_ms(phase_start)
+        
+        # FASE 3: Inventario (crear faltantes y reactivar las que volvieron a aparecer)
+        phase_start = time.perf_counter()
+        inventories_to_create = []
+        inventories_to_reactivate = []
+        for raw_index_key in keys:
+            onu_index_id = index_ids[raw_index_key]
+            active = inventories.get(onu_index_id)
+            if active is None:
+                inventories_to_create.append(OnuInventory(
+                    onu_index_id=onu_index_id,
+                    olt=self.olt,
+                    active=True,
+                    snmp_last_execution=self.execution,
+                ))
+            elif not active:
+                inventories_to_reactivate.append(onu_index_id)
+        
+        OnuInventory.objects.bulk_create(inventories_to_create, batch_size=chunk_size)
+        if inventories_to_reactivate:
+            OnuInventory.objects.filter(onu_index_id__in=inventories_to_reactivate).update(
+                active=True,
+                snmp_last_execution=self.execution,
+                updated_at=now
             )
+            self.logger.info(f"📦 Inventarios reactivados (ONU volvió a aparecer): {len(inventories_to_reactivate)}")
+        timings['inventory'] += _elapsed_ms(phase_start)
+        
+        # FASE 4: Estados
+        phase_start = time.perf_counter()
+        statuses_to_create = []
+        statuses_to_update = []
+        for raw_index_key, state_value in chunk:
+            onu_index_id = index_ids[raw_index_key]
+            state_label = state_labels.get(state_value)
+            if state_label is None:
+                state_label = 'UNKNOWN'
+                unknown_states.add(state_value)
             
-            # Usar el OID de la tarea
-            task_oid = self.job.oid.oid
-            self.logger.info(f"🌐 Ejecutando walk en {task_oid}")
-            self.logger.info(f"🔍 ANTES DEL WALK - OLT: {self.olt.abreviatura}, IP: {self.olt.ip_address}")
-            raw_results = session.walk(task_oid)
-            self.logger.info(f"🔍 DESPUÉS DEL WALK - Resultados: {len(raw_results)}")
+            # Contabilizar
+            if state_value == 1:  # ACTIVO
+                results['enabled_count'] += 1
+            elif state_value == 2:  # SUSPENDIDO
+                results['disabled_count'] += 1
             
-            self.logger.info(f"📡 Raw results obtenidos: {len(raw_results)} elementos")
+            onu_status = statuses.get(onu_index_id)
+            if onu_status is None:
+                onu_status = OnuStatus(onu_index_id=onu_index_id, olt=self.olt)
+                statuses_to_create.append(onu_status)
+            elif self.delta_persistence and not self._status_differs(onu_status, state_value, state_label):
+                # Sin cambios: last_seen_at lo da la época del walk
+                results['unchanged_count'] += 1
+                continue
+            else:
+                statuses_to_update.append(onu_status)
             
-            results = []
-            for i, item in enumerate(raw_results):
-                try:
-                    # Extraer índice del OID completo usando el OID de la tarea
-                    # Ejemplo: .1.3.6.1.4.1.2011.6.128.1.1.2.46.1.1.4194312192.2 -> 4194312192.2
-                    full_oid = str(item.oid)  # Convertir a string para evitar problemas
-                    self.logger.debug(f"   Elemento {i+1}: {full_oid} = {item.value}")
-                    
-                    # Para job tipo 'descubrimiento', solo extraer el snmpindexonu
-                    # Los OIDs vienen como: iso.3.6.1.4.1.2011.6.128.1.1.2.46.1.1.4194338304.6
-                    # Solo necesitamos: 4194338304.6
-                    
-                    # Buscar el patrón del OID base y extraer lo que viene después
-                    oid_parts = full_oid.split('.')
-                    if len(oid_parts) >= 2:
-                        # Tomar los últimos 2 elementos como snmpindexonu (ej: 4194338304.6)
-                        raw_index_key = f"{oid_parts[-2]}.{oid_parts[-1]}"
-                        
-                        # Convertir value a int de forma segura
-                        try:
-                            state_value = int(str(item.value))
-                            results.append((raw_index_key, state_value))
-                            self.logger.debug(f"   ✅ Procesado: {raw_index_key} = {state_value}")
-                        except (ValueError, TypeError):
-                            # Si no se puede convertir a int, saltar este resultado
-                            self.logger.warning(f"⚠️ Valor SNMP no es entero: {item.value}")
-                            continue
-                    else:
-                        self.logger.warning(f"⚠️ OID con formato inesperado: {full_oid}")
-                        
-                except (ValueError, AttributeError) as e:
-                    self.logger.warning(f"⚠️ Error parseando resultado SNMP {item}: {e}")
-                    continue
-                    
-            return results
+            # Detectar cambio de estado
+            state_changed = (
+                onu_status.last_state_value != state_value or
+                onu_status.presence != 'ENABLED'
+            )
+            
+            onu_status.last_seen_at = now
+            onu_status.last_state_value = state_value
+            onu_status.last_state_label = state_label
+            onu_status.presence = 'ENABLED'  # Si aparece en walk, está habilitado
+            onu_status.consecutive_misses = 0  # Reset contador de faltas
+            onu_status.updated_at = now  # bulk_update no aplica auto_now
+            if state_changed:
+                onu_status.last_change_execution = self.execution
+        
+        OnuStatus.objects.bulk_create(statuses_to_create, batch_size=chunk_size)
+        OnuStatus.objects.bulk_update(
+            statuses_to_update,
+            [
+                'last_seen_at', 'last_state_value', 'last_state_label', 'presence',
+                'consecutive_misses', 'last_change_execution', 'updated_at'
+            ],
+            batch_size=chunk_size
+        )
+        timings['status'] += _elapsed_ms(phase_start)
+    
+    def _merge_staged_walk(self) -> Dict:
+        """
+        Reconciliación del staging con SQL set-based (ingesta COPY, solo PostgreSQL).
+        
+        Mismo resultado que _bulk_reconcile_walk, pero cada tabla se actualiza
+        con una única sentencia sobre el walk deduplicado (DISTINCT ON):
+        1. onu_index_map: índices nuevos decodificados en Python, COPY a una
+           tabla temporal e INSERT ... SELECT ... ON CONFLICT DO NOTHING
+        2. onu_inventory: INSERT ... ON CONFLICT DO UPDATE (reactiva las inactivas)
+        3. onu_status: INSERT ... ON CONFLICT DO UPDATE, con persistencia delta
+           en el WHERE del DO UPDATE (las filas sin cambios no se escriben)
+        4. Ausentes y época del walk, igual que el resto de los modos
+        """
+        self.logger.info(f"🔄 Procesando resultados exitosos para OLT {self.olt.abreviatura} (modo copy)")
+        
+        results = {
+            'new_index_created': 0,
+            'enabled_count': 0,
+            'disabled_count': 0,
+            'unchanged_count': 0,
+            'errors': [],
+            'reconcile_mode': 'copy',
+            'timings_ms': {}
+        }
+        timings = results['timings_ms']
+        total_start = time.perf_counter()
+        
+        staging_table = DiscoveryWalkStaging._meta.db_table
+        index_table = OnuIndexMap._meta.db_table
+        walk_sql = f"""
+            SELECT DISTINCT ON (st.raw_index_key) st.raw_index_key, st.state_value
+            FROM {staging_table} st
+            WHERE st.execution_id = %s
+            ORDER BY st.raw_index_key, st.id DESC
+        """
+        walk_join = f"""
+            FROM ({walk_sql}) w
+            JOIN {index_table} m ON m.olt_id = %s AND m.raw_index_key = w.raw_index_key
+        """
+        walk_params = [self.execution.id, self.olt.id]
+        
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                now = timezone.now()
+                
+                # FASE 1: Índices nuevos
+                phase_start = time.perf_counter()
+                cursor.execute(
+                    f"""
+                    SELECT DISTINCT st.raw_index_key FROM {staging_table} st
+                    WHERE st.execution_id = %s AND NOT EXISTS (
+                        SELECT 1 FROM {index_table} m
+                        WHERE m.olt_id = %s AND m.raw_index_key = st.raw_index_key
+                    )
+                    """,
+                    walk_params
+                )
+                new_keys = [row[0] for row in cursor.fetchall()]
+                if new_keys:
+                    self._copy_index_maps(cursor, new_keys, now)
+                    results['new_index_created'] = len(new_keys)
+                    self.logger.info(f"📝 Nuevos índices creados: {len(new_keys)}")
+                timings['index_map'] = _elapsed_ms(phase_start)
+                
+                # Conteos y estados sin label
+                phase_start = time.perf_counter()
+                cursor.execute(
+                    f"""
+                    SELECT count(*),
+                           count(*) FILTER (WHERE w.state_value = 1),
+                           count(*) FILTER (WHERE w.state_value = 2)
+                    FROM ({walk_sql}) w
+                    """,
+                    [self.execution.id]
+                )
+                walked_count, results['enabled_count'], results['disabled_count'] = cursor.fetchone()
+                
+                lookup_table = OnuStateLookup._meta.db_table
+                state_label_sql = f"""
+                    LEFT JOIN {lookup_table} lb ON lb.value = w.state_value AND lb.marca_id = %s
+                    LEFT JOIN {lookup_table} lg ON lg.value = w.state_value AND lg.marca_id IS NULL
+                """
+                cursor.execute(
+                    f"""
+                    SELECT DISTINCT w.state_value FROM ({walk_sql}) w {state_label_sql}
+                    WHERE lb.id IS NULL AND lg.id IS NULL
+                    """,
+                    [self.execution.id, self.job.marca_id]
+                )
+                unknown_states = sorted(row[0] for row in cursor.fetchall())
+                if unknown_states:
+                    self.logger.warning(f"⚠️ Estados desconocidos {unknown_states} para marca {self.job.marca.nombre}")
+                timings['load'] = _elapsed_ms(phase_start)
+                
+                # FASE 2: Inventario (crear faltantes y reactivar las que volvieron a aparecer)
+                phase_start = time.perf_counter()
+                inventory_table = OnuInventory._meta.db_table
+                cursor.execute(
+                    f"""
+                    INSERT INTO {inventory_table} AS i
+                        (onu_index_id, olt_id, active, snmp_metadata, snmp_last_execution_id, created_at, updated_at)
+                    SELECT m.id, m.olt_id, TRUE, '{{}}'::jsonb, %s, %s, %s
+                    {walk_join}
+                    ON CONFLICT (onu_index_id) DO UPDATE
+                    SET active = TRUE,
+                        snmp_last_execution_id = EXCLUDED.snmp_last_execution_id,
+                        updated_at = EXCLUDED.updated_at
+                    WHERE NOT i.active
+                    RETURNING (xmax = 0)
+                    """,
+                    [self.execution.id, now, now] + walk_params
+                )
+                reactivated = sum(1 for (inserted,) in cursor.fetchall() if not inserted)
+                if reactivated:
+                    self.logger.info(f"📦 Inventarios reactivados (ONU volvió a aparecer): {reactivated}")
+                timings['inventory'] = _elapsed_ms(phase_start)
+                
+                # FASE 3: Estados
+                phase_start = time.perf_counter()
+                delta_sql = ''
+                if self.delta_persistence:
+                    # Sin cambios: last_seen_at lo da la época del walk
+                    delta_sql = """
+                    WHERE s.last_state_value IS DISTINCT FROM EXCLUDED.last_state_value
+                       OR s.last_state_label IS DISTINCT FROM EXCLUDED.last_state_label
+                       OR s.presence <> 'ENABLED'
+                       OR s.consecutive_misses <> 0
+                       OR s.last_seen_at IS NULL
+                    """
+                cursor.execute(
+                    f"""
+                    INSERT INTO {OnuStatus._meta.db_table} AS s
+                        (onu_index_id, olt_id, last_seen_at, last_state_value, last_state_label,
+                         presence, consecutive_misses, last_change_execution_id, updated_at)
+                    SELECT m.id, m.olt_id, %s, w.state_value, COALESCE(lb.label, lg.label, 'UNKNOWN'),
+                           'ENABLED', 0, %s, %s
+                    {walk_join}
+                    {state_label_sql}
+                    ON CONFLICT (onu_index_id) DO UPDATE
+                    SET last_seen_at = EXCLUDED.last_seen_at,
+                        last_state_value = EXCLUDED.last_state_value,
+                        last_state_label = EXCLUDED.last_state_label,
+                        presence = 'ENABLED',
+                        consecutive_misses = 0,
+                        last_change_execution_id = CASE
+                            WHEN s.last_state_value IS DISTINCT FROM EXCLUDED.last_state_value
+                                 OR s.presence <> 'ENABLED'
+                            THEN EXCLUDED.last_change_execution_id
+                            ELSE s.last_change_execution_id
+                        END,
+                        updated_at = EXCLUDED.updated_at
+                    {delta_sql}
+                    RETURNING 1
+                    """,
+                    [now, self.execution.id, now] + walk_params + [self.job.marca_id]
+                )
+                results['unchanged_count'] = walked_count - len(cursor.fetchall())
+                timings['status'] = _elapsed_ms(phase_start)
+                
+                # Post-proceso: marcar ausentes (anti-join contra el staging)
+                phase_start = time.perf_counter()
+                self._mark_missing_onus(results)
+                timings['missing'] = _elapsed_ms(phase_start)
+                
+                # Época del walk (y volcado periódico de last_seen_at)
+                phase_start = time.perf_counter()
+                self._record_walk_epoch(now, results)
+                timings['epoch'] = _elapsed_ms(phase_start)
+            
+            timings['total'] = _elapsed_ms(total_start)
+            self.logger.info(f"✅ Procesamiento copy completado: {results}")
             
         except Exception as e:
-            self.logger.error(f"❌ Error en SNMP Walk: {e}")
+            self.logger.error(f"❌ Error procesando resultados: {e}")
+            results['errors'].append(str(e))
             raise
+        
+        return results
+    
+    def _copy_index_maps(self, cursor, new_keys: List[str], now):
+        """Inserta los OnuIndexMap nuevos con COPY a una tabla temporal + INSERT ... SELECT"""
+        temp_staging_table(
+            cursor, 'discovery_index_map_ingest',
+            'raw_index_key varchar(255), slot integer, port integer, logical integer, normalized_id varchar(255)'
+        )
+        copy_rows(
+            cursor, 'discovery_index_map_ingest',
+            ['raw_index_key', 'slot', 'port', 'logical', 'normalized_id'],
+            (
+                (m.raw_index_key, m.slot, m.port, m.logical, m.normalized_id)
+                for m in self._build_index_maps(new_keys)
+            )
+        )
+        # ON CONFLICT: si otro proceso creó el mismo índice, se reutiliza el existente
+        cursor.execute(
+            f"""
+            INSERT INTO {OnuIndexMap._meta.db_table}
+                (olt_id, raw_index_key, slot, port, logical, normalized_id, marca_formula, created_at, updated_at)
+            SELECT %s, t.raw_index_key, t.slot, t.port, t.logical, t.normalized_id, %s, %s, %s
+            FROM discovery_index_map_ingest t
+            ON CONFLICT (olt_id, raw_index_key) DO NOTHING
+            """,
+            [self.olt.id, f'marca_{self.job.marca.nombre}', now, now]
+        )
+    
+    @staticmethod
+    def _status_differs(onu_status: OnuStatus, state_value: int, state_label: str) -> bool:
+        """True si el walk cambia algo persistido de la fila (además de last_seen_at)"""
+        return (
+            onu_status.last_state_value != state_value or
+            onu_status.last_state_label != state_label or
+            onu_status.presence != 'ENABLED' or
+            onu_status.consecutive_misses != 0 or
+            onu_status.last_seen_at is None
+        )
+    
+    def _record_walk_epoch(self, walk_at, results: Dict):
+        """
+        Registra el walk exitoso como época de la OLT y, con persistencia delta,
+        vuelca la época a onu_status.last_seen_at de las ONUs ENABLED cada
+        discovery_last_seen_flush_interval segundos (un solo UPDATE por OLT).
+        """
+        epoch, _ = OltWalkEpoch.objects.get_or_create(
+            olt=self.olt,
+            defaults={'last_walk_at': walk_at, 'last_execution': self.execution}
+        )
+        epoch.last_walk_at = walk_at
+        epoch.last_execution = self.execution
+        
+        flush_interval = timedelta(seconds=get_discovery_last_seen_flush_interval())
+        if self.delta_persistence and (epoch.last_flushed_at is None or walk_at - epoch.last_flushed_at >= flush_interval):
+            # update() no toca updated_at: solo refleja cambios reales de la ONU
+            flushed = OnuStatus.objects.filter(
+                olt=self.olt,
+                presence='ENABLED',
+                last_seen_at__lt=walk_at
+            ).update(last_seen_at=walk_at)
+            epoch.last_flushed_at = walk_at
+            results['last_seen_flushed'] = flushed
+            self.logger.info(f"🕒 last_seen_at volcado para {flushed} ONUs de {self.olt.abreviatura}")
+        
+        epoch.save()
+    
+    def _load_state_labels(self) -> Dict[int, str]:
+        """
+        Carga OnuStateLookup una sola vez con la misma prioridad que _update_onu_status:
+        específico por marca del job → general (sin marca)
+        """
+        state_labels = dict(
+            OnuStateLookup.objects.filter(marca__isnull=True).values_list('value', 'label')
+        )
+        state_labels.update(
+            OnuStateLookup.objects.filter(marca=self.job.marca).values_list('value', 'label')
+        )
+        return state_labels
+    
+    def _build_index_maps(self, new_keys: List[str]) -> List[OnuIndexMap]:
+        """
+        OnuIndexMap nuevos (sin guardar). La fórmula de la OLT se resuelve una
+        sola vez y slot/port/logical se decodifican en lote (vectorizado).
+        """
+        formula = OnuIndexMap.find_formula_for_olt(self.olt)
+        marca_formula = f'marca_{self.job.marca.nombre}'  # Usar marca del job
+        
+        components = None
+        if formula:
+            decoded = formula.calculate_components_batch(new_keys)
+            components = zip(
+                decoded['valid'].tolist(),
+                decoded['slot'].tolist(),
+                decoded['port'].tolist(),
+                decoded['logical'].tolist(),
+                decoded['normalized_id']
+            )
+        
+        new_maps = []
+        for raw_index_key in new_keys:
+            onu_index_map = OnuIndexMap(
+                olt=self.olt,
+                raw_index_key=raw_index_key,
+                normalized_id=f"OLT{self.olt.id}-{raw_index_key}",
+                marca_formula=marca_formula,
+            )
+            if components is not None:
+                valid, slot, port, logical, normalized_id = next(components)
+                if valid:
+                    onu_index_map.slot = slot
+                    onu_index_map.port = port
+                    onu_index_map.logical = logical
+                    onu_index_map.normalized_id = normalized_id
+            new_maps.append(onu_index_map)
+        return new_maps
+    
+    def _bulk_create_index_maps(self, new_keys: List[str], index_ids: Dict[str, int], chunk_size: int):
+        """
+        Crea los OnuIndexMap nuevos con bulk_create.
+        Actualiza index_ids con los IDs creados.
+        """
+        new_maps = self._build_index_maps(new_keys)
+        
+        # ignore_conflicts: si otro proceso creó el mismo índice, se reutiliza el existente
+        OnuIndexMap.objects.bulk_create(new_maps, batch_size=chunk_size, ignore_conflicts=True)
+        
+        for chunk in _chunks(new_keys, chunk_size):
+            index_ids.update(
+                OnuIndexMap.objects.filter(
+                    olt=self.olt,
+                    raw_index_key__in=chunk
+                ).values_list('raw_index_key', 'id')
+            )
+    
+    def _iter_walk_pages(self):
+        """
+        Etapa 1 del pipeline: walk del OID de la tarea en streaming, una página
+        de varbinds por PDU. Usa el OID de la tarea, no un OID hardcodeado.
+        
+        El walk ocupa lugares del semáforo SNMP de la OLT (compartido con los
+        pollers GET) mientras se consumen las páginas: uno, o uno por rango en
+        vuelo si discovery_parallel_walks > 1. Los rangos terminan en el mismo
+        staging; si cualquiera falla, falla el walk completo y no se aplica nada.
+        """
+        task_oid = self.job.oid.oid
+        self.logger.info(f"🌐 Ejecutando walk en {task_oid} (OLT {self.olt.abreviatura}, IP: {self.olt.ip_address})")
+        
+        # Walk partido por slots: un permiso del semáforo por rango en vuelo,
+        # acotado por max_consultas_snmp_simultaneas de descubrimiento
+        parallel_walks = get_discovery_parallel_walks()
+        ranges = walk_ranges(self.olt, task_oid) if parallel_walks > 1 else None
+        permits = parallel_walks if ranges and len(ranges) > 1 else 1
+        
+        from snmp_client.semaphore import olt_snmp_slot
+        with olt_snmp_slot(self.olt.id, get_snmp_max_concurrent_queries('descubrimiento'),
+                           lease_seconds=200, permits=permits) as semaphore:
+            yield from iter_olt_walk(self.olt, task_oid, self.walk_stats, ranges, semaphore.permits)
+    
+    def _parse_walk(self, pages):
+        """
+        Etapa 2 del pipeline: varbinds → tuplas compactas (snmp_index, onu_number, state).
+        
+        Los OIDs vienen como: .1.3.6.1.4.1.2011.6.128.1.1.2.46.1.15.4194338304.6
+        y solo se necesita el snmpindexonu: 4194338304.6 → (4194338304, 6).
+        """
+        for page in pages:
+            for item in page:
+                oid_parts = str(item.oid).split('.')
+                if len(oid_parts) < 2:
+                    self.logger.warning(f"⚠️ OID con formato inesperado: {item.oid}")
+                    continue
+                try:
+                    snmp_index, onu_number = int(oid_parts[-2]), int(oid_parts[-1])
+                    state_value = int(str(item.value))
+                except (ValueError, TypeError):
+                    # Si no se puede convertir a int, saltar este resultado
+                    self.logger.warning(f"⚠️ Valor SNMP no es entero: {item.oid} = {item.value}")
+                    continue
+                if snmp_index > WalkResults.MAX_SUBID or onu_number > WalkResults.MAX_SUBID:
+                    # Un sub-identificador de OID es de 32 bits: agente roto
+                    self.logger.warning(f"⚠️ Índice fuera de rango: {item.oid}")
+                    continue
+                yield snmp_index, onu_number, state_value
     
     def _process_walk_result(self, raw_index_key: str, state_value: int, results: Dict):
         """
@@ -277,6 +1005,17 @@ class DiscoveryService:
             }
         )
         
+        # Contabilizar
+        if state_value == 1:  # ACTIVO
+            results['enabled_count'] += 1
+        elif state_value == 2:  # SUSPENDIDO
+            results['disabled_count'] += 1
+        
+        # Persistencia delta: sin cambios no se reescribe la fila
+        if not created and self.delta_persistence and not self._status_differs(onu_status, state_value, state_label):
+            results['unchanged_count'] += 1
+            return
+        
         # Detectar cambio de estado
         state_changed = (
             onu_status.last_state_value != state_value or 
@@ -294,92 +1033,293 @@ class DiscoveryService:
             onu_status.last_change_execution = self.execution
             
         onu_status.save()
-        
-        # Contabilizar
-        if state_value == 1:  # ACTIVO
-            results['enabled_count'] += 1
-        elif state_value == 2:  # SUSPENDIDO
-            results['disabled_count'] += 1
             
         if created:
             self.logger.debug(f"📊 Nuevo estado creado: {onu_index_map.normalized_id}")
     
-    def _mark_missing_onus(self, processed_indices: set, results: Dict):
+    def _mark_missing_onus(self, results: Dict):
         """
-        Marca ONUs que no aparecieron en este walk como ausentes
-        """
-        # Obtener todos los índices conocidos para esta OLT con la marca del job
-        existing_maps = OnuIndexMap.objects.filter(
-            olt=self.olt,
-            marca_formula=f'marca_{self.job.marca.nombre}'
-        ).select_related('status')
+        Marca ONUs que no aparecieron en este walk como ausentes, por conjuntos,
+        con tres UPDATE (faltas de las ya DISABLED, ENABLED → DISABLED,
+        inventario inactivo), sin cargar ni guardar las ONUs de a una.
         
-        missing_count = 0
-        disabled_count = 0
+        En PostgreSQL el conjunto de ausentes es un anti-join de los índices
+        de la OLT/marca contra el staging del walk, dentro de los mismos
+        UPDATE (nada viaja a Python); en otras bases, un diff vectorizado
+        contra las claves del walk (WalkResults).
+        """
+        now = timezone.now()
+        marca_formula = f'marca_{self.job.marca.nombre}'
         
-        for onu_map in existing_maps:
-            if onu_map.raw_index_key not in processed_indices:
-                # Esta ONU no apareció en el walk
-                try:
-                    status = onu_map.status
-                    status.consecutive_misses += 1
-                    
-                    # Basta que no aparezca UNA VEZ para marcarla como DISABLED
-                    if status.presence == 'ENABLED':
-                        status.presence = 'DISABLED'
-                        status.last_change_execution = self.execution
-                        disabled_count += 1
-                        self.logger.info(f"🔴 ONU marcada como DISABLED (no apareció): {onu_map.normalized_id}")
-                        
-                        # SINCRONIZAR: También marcar el inventario como inactivo
-                        try:
-                            inventory = OnuInventory.objects.get(onu_index=onu_map)
-                            if inventory.active:
-                                inventory.active = False
-                                inventory.snmp_last_execution = self.execution
-                                inventory.save()
-                                self.logger.info(f"📦 Inventario marcado como inactivo: {onu_map.normalized_id}")
-                        except OnuInventory.DoesNotExist:
-                            # No tiene inventario, no hay problema
-                            pass
-                    
-                    status.save()
-                    missing_count += 1
-                    
-                except OnuStatus.DoesNotExist:
-                    # No tiene estado, probablemente es muy antigua
-                    continue
+        if connection.vendor == 'postgresql':
+            missing_count, disabled_ids = self._mark_missing_onus_pg(marca_formula, now)
+        else:
+            missing_ids = self._missing_index_ids(self.walked_results(), marca_formula)
+            missing_count, disabled_ids = self._mark_missing_onus_orm(missing_ids, now) if missing_ids else (0, [])
         
+        results['missing_count'] = missing_count
+        results['newly_disabled_count'] = len(disabled_ids)
         if missing_count > 0:
-            self.logger.info(f"👻 ONUs ausentes en walk: {missing_count} (nuevas DISABLED: {disabled_count})")
+            self.logger.info(f"👻 ONUs ausentes en walk: {missing_count} (nuevas DISABLED: {len(disabled_ids)})")
+    
+    def _missing_index_ids(self, walked: WalkResults, marca_formula: str) -> List[int]:
+        """Fallback sin PostgreSQL: IDs de OnuIndexMap de la OLT/marca cuya clave no está en el walk (una consulta + np.isin)"""
+        rows = list(OnuIndexMap.objects.filter(
+            olt=self.olt, marca_formula=marca_formula
+        ).values_list('id', 'raw_index_key'))
+        if not rows:
+            return []
+        index_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        present = walked.contains_keys([row[1] for row in rows])
+        return index_ids[~present].tolist()
+    
+    def _mark_missing_onus_pg(self, marca_formula: str, now) -> Tuple[int, List[int]]:
+        """
+        PostgreSQL: los ausentes se calculan en SQL (NOT EXISTS contra
+        discovery_walk_staging, por el índice execution + raw_index_key), así
+        que el costo en Python no depende del tamaño de la OLT.
+        
+        Returns:
+            tuple: (ONUs ausentes con estado, IDs de índice que pasaron a DISABLED)
+        """
+        status_table = OnuStatus._meta.db_table
+        missing_sql = f"""
+            SELECT m.id FROM {OnuIndexMap._meta.db_table} m
+            WHERE m.olt_id = %s AND m.marca_formula = %s AND NOT EXISTS (
+                SELECT 1 FROM {DiscoveryWalkStaging._meta.db_table} st
+                WHERE st.execution_id = %s AND st.raw_index_key = m.raw_index_key
+            )
+        """
+        missing_params = [self.olt.id, marca_formula, self.execution.id]
+        
+        with connection.cursor() as cursor:
+            # 1. Ya DISABLED: solo suman una falta
+            cursor.execute(
+                f"""
+                UPDATE {status_table} s
+                SET consecutive_misses = s.consecutive_misses + 1, updated_at = %s
+                WHERE s.presence <> 'ENABLED' AND s.onu_index_id IN ({missing_sql})
+                """,
+                [now] + missing_params
+            )
+            missing_count = cursor.rowcount
+            
+            # 2. ENABLED → DISABLED (basta que no aparezca UNA VEZ); el último
+            #    visto se congela en la época del walk anterior
+            # 3. SINCRONIZAR: inventario inactivo para las que pasaron a DISABLED,
+            #    en la misma sentencia (CTE) para no devolver los IDs a la base
+            last_seen_sql = 's.last_seen_at'
+            last_seen_params = []
+            if self.previous_walk_at:
+                last_seen_sql = 'GREATEST(s.last_seen_at, %s)'
+                last_seen_params = [self.previous_walk_at]
+            cursor.execute(
+                f"""
+                WITH disabled AS (
+                    UPDATE {status_table} s
+                    SET consecutive_misses = s.consecutive_misses + 1,
+                        presence = 'DISABLED',
+                        last_change_execution_id = %s,
+                        last_seen_at = {last_seen_sql},
+                        updated_at = %s
+                    WHERE s.presence = 'ENABLED' AND s.onu_index_id IN ({missing_sql})
+                    RETURNING s.onu_index_id
+                ), inventory AS (
+                    UPDATE {OnuInventory._meta.db_table} i
+                    SET active = FALSE, snmp_last_execution_id = %s, updated_at = %s
+                    FROM disabled d
+                    WHERE i.active AND i.onu_index_id = d.onu_index_id
+                )
+                SELECT onu_index_id FROM disabled
+                """,
+                [self.execution.id] + last_seen_params + [now] + missing_params + [self.execution.id, now]
+            )
+            disabled_ids = [row[0] for row in cursor.fetchall()]
+            missing_count += len(disabled_ids)
+        
+        return missing_count, disabled_ids
+    
+    def _mark_missing_onus_orm(self, missing_ids: List[int], now) -> Tuple[int, List[int]]:
+        """
+        Fallback genérico (otras bases): mismo algoritmo con el ORM, con los
+        UPDATE en lotes para no superar el límite de parámetros.
+        """
+        chunk_size = get_discovery_bulk_chunk_size()
+        missing_count = 0
+        disabled_ids = []
+        for chunk in _chunks(missing_ids, chunk_size):
+            missing_count += OnuStatus.objects.filter(
+                onu_index_id__in=chunk
+            ).exclude(presence='ENABLED').update(
+                consecutive_misses=F('consecutive_misses') + 1,
+                updated_at=now
+            )
+            
+            newly_disabled = list(OnuStatus.objects.filter(
+                onu_index_id__in=chunk, presence='ENABLED'
+            ).values_list('onu_index_id', flat=True))
+            if not newly_disabled:
+                continue
+            
+            last_seen = F('last_seen_at')
+            if self.previous_walk_at:
+                last_seen = Case(
+                    When(Q(last_seen_at__isnull=True) | Q(last_seen_at__lt=self.previous_walk_at),
+                         then=Value(self.previous_walk_at)),
+                    default=F('last_seen_at'),
+                    output_field=DateTimeField()
+                )
+            OnuStatus.objects.filter(onu_index_id__in=newly_disabled).update(
+                consecutive_misses=F('consecutive_misses') + 1,
+                presence='DISABLED',
+                last_change_execution=self.execution,
+                last_seen_at=last_seen,
+                updated_at=now
+            )
+            OnuInventory.objects.filter(onu_index_id__in=newly_disabled, active=True).update(
+                active=False,
+                snmp_last_execution=self.execution,
+                updated_at=now
+            )
+            missing_count += len(newly_disabled)
+            disabled_ids.extend(newly_disabled)
+        
+        return missing_count, disabled_ids
+
 
+def _getnext_only_key(olt_id):
+    return f"discovery:getnext_only:{olt_id}"
 
-def execute_discovery_task(execution_id: int) -> Dict:
+
+def walk_max_repetitions(olt) -> int:
+    """max-repetitions de los walks de la OLT: 0 (GETNEXT) si su agente falló con GETBULK hace poco"""
+    max_repetitions = get_snmp_max_repetitions('descubrimiento')
+    if max_repetitions:
+        try:
+            if redis_client.exists(_getnext_only_key(olt.id)):
+                return 0
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el modo de walk de la OLT {olt.id}: {e}")
+    return max_repetitions
+
+
+def reset_walk_mode(olt_ids):
+    """Vuelve a intentar GETBULK en las OLTs (p. ej. tras actualizar su firmware)"""
+    keys = [_getnext_only_key(olt_id) for olt_id in olt_ids]
+    if keys:
+        redis_client.delete(*keys)
+
+
+def walk_ranges(olt, oid: str) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Parte el subárbol oid en rangos (start_oid, end_oid) por slot según la
+    IndexFormula de la OLT. El primero y el último quedan abiertos, así que
+    los rangos cubren todo el subárbol aunque haya índices fuera de la fórmula.
+    
+    Returns:
+        list: Rangos en orden; un único (None, None) si la fórmula no separa slots
+    """
+    from snmp_formulas.services import get_formula_for_olt
+    formula = get_formula_for_olt(olt)
+    boundaries = [f"{oid}.{index}" for index in formula.slot_boundaries()] if formula else []
+    edges = [None] + boundaries + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def iter_olt_walk(olt, oid: str, stats: Optional[Dict] = None, ranges=None, concurrency: int = 1):
+    """
+    Walk en streaming de oid en la OLT, una página de varbinds por PDU, con
+    el motor asíncrono o con el pool de sesiones easysnmp.
+    
+    Usa GETBULK con max_repeticiones de la ConfiguracionSNMP de descubrimiento.
+    Si el agente rechaza GETBULK (error-status como tooBig, PDU ilegible o
+    fuera de orden), el walk sigue con GETNEXT desde la última fila recibida
+    y, si así termina, la OLT queda en GETNEXT por GETNEXT_ONLY_TTL. Un
+    timeout o un error de conexión no cambia de modo: se propaga como fallo
+    del walk (y cuenta para el breaker), sin fijar la OLT en GETNEXT.
+    
+    Con ranges (walk_ranges) y concurrency > 1 el motor asíncrono recorre los
+    rangos en paralelo; las páginas llegan sin orden entre rangos. El pool
+    easysnmp (sincrónico) siempre hace un walk único.
+    
+    stats (dict) se completa con el modo, max_repetitions, rangos, páginas,
+    filas y el tiempo de espera SNMP (sin el de quien consume las páginas),
+    para ajustar max_repeticiones con datos reales.
+    """
+    max_repetitions = walk_max_repetitions(olt)
+    parallel = bool(ranges) and len(ranges) > 1 and concurrency > 1 and is_snmp_async_enabled()
+    stats = {} if stats is None else stats
+    stats.update({
+        'mode': 'getbulk' if max_repetitions else 'getnext',
+        'max_repetitions': max_repetitions,
+        'ranges': len(ranges) if parallel else 1,
+        'concurrency': concurrency if parallel else 1,
+        'pages': 0,
+        'rows': 0,
+        'snmp_ms': 0,
+    })
+
+    def on_fallback(error):
+        logger.warning(f"⚠️ OLT {olt.abreviatura}: GETBULK falló ({error}), el walk sigue con GETNEXT")
+        stats['mode'] = 'getbulk→getnext'
+        stats['fallback_error'] = str(error)
+
+    def session_pages():
+        from snmp_client.pool import session_pool, get_cached_snmp_params
+        from snmp_client.services import iter_session_walk
+        timeout, retries = get_cached_snmp_params()
+        with session_pool.session(olt.ip_address, olt.comunidad, 2, timeout, retries) as session:
+            yield from iter_session_walk(session, oid, max_repetitions or None, on_fallback=on_fallback)
+
+    if parallel:
+        from snmp_client.services import olt_target, iter_walk_ranges_sync
+        pages = iter_walk_ranges_sync(
+            olt_target(olt), oid, ranges, concurrency, max_repetitions or None, on_fallback=on_fallback
+        )
+    elif is_snmp_async_enabled():
+        from snmp_client.services import olt_target, iter_walk_sync
+        pages = iter_walk_sync(olt_target(olt), oid, max_repetitions or None, on_fallback=on_fallback)
+    else:
+        pages = session_pages()
+
+    snmp_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        for page in pages:
+            snmp_seconds += time.perf_counter() - start
+            stats['pages'] += 1
+            stats['rows'] += len(page)
+            yield page
+            start = time.perf_counter()
+        snmp_seconds += time.perf_counter() - start
+    finally:
+        stats['snmp_ms'] = int(snmp_seconds * 1000)
+    
+    # Solo si GETNEXT completó el walk: si también falló, es la OLT la que no responde
+    if 'fallback_error' in stats:
+        try:
+            redis_client.set(_getnext_only_key(olt.id), stats['fallback_error'][:200], ex=GETNEXT_ONLY_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar el modo de walk de la OLT {olt.id}: {e}")
+
+
+def execute_discovery_task(execution) -> Dict:
     """
     Función principal para ejecutar tarea de descubrimiento
-    Retorna los resultados del walk para que la tarea decida si es SUCCESS o FAILED
+    Retorna los resultados del walk (ya en staging) para que la tarea decida si es SUCCESS o FAILED
+    
+    execute_discovery usa directamente un DiscoveryService sobre la ejecución
+    ya cargada; estos atajos (Execution o ID) quedan para scripts y shell.
     """
-    service = DiscoveryService(execution_id)
+    service = DiscoveryService(execution)
     return service.execute_discovery_walk()
 
 
-def process_successful_discovery(execution_id: int, walk_results: List[List]) -> Dict:
+def process_successful_discovery(execution) -> Dict:
     """
-    Procesa los resultados del walk SOLO cuando la tarea es marcada como SUCCESS
+    Aplica el walk en staging SOLO cuando la tarea es marcada como SUCCESS
     y SOLO si el OID tiene espacio 'descubrimiento'
     """
-    service = DiscoveryService(execution_id)
-    
-    # Verificar que el OID tenga espacio 'descubrimiento'
-    if service.job.oid.espacio != 'descubrimiento':
-        logger.info(f"⚠️ OID {service.job.oid.nombre} tiene espacio '{service.job.oid.espacio}', no se procesarán las tablas de discovery")
-        return {
-            'status': 'skipped',
-            'reason': f'OID no es de tipo descubrimiento (espacio: {service.job.oid.espacio})',
-            'processed_records': 0,
-            'updated_records': 0,
-            'disabled_records': 0
-        }
-    
-    logger.info(f"✅ OID {service.job.oid.nombre} tiene espacio 'descubrimiento', procesando tablas de discovery")
-    return service.process_successful_walk(walk_results)
+    service = DiscoveryService(execution)
+    return service.process_staged_walk()
+
@@ -6,11 +6,12 @@ from .models import OLT
 
 @admin.register(OLT)
 class OLTAdmin(admin.ModelAdmin):
-    list_display = ('abreviatura', 'marca', 'get_modelo_display', 'ip_address', 'get_status_icon')
+    list_display = ('abreviatura', 'marca', 'get_modelo_display', 'ip_address', 'get_status_icon', 'get_breaker_display', 'get_adaptive_display')
     list_filter = ('marca', 'modelo', 'habilitar_olt')
     search_fields = ('abreviatura', 'ip_address', 'descripcion', 'modelo__nombre')
     list_per_page = 20
-    actions = ['deshabilitar_olts_seleccionadas', 'habilitar_olts_seleccionadas']
+    actions = ['deshabilitar_olts_seleccionadas', 'habilitar_olts_seleccionadas', 'reiniciar_control_adaptativo', 'cerrar_circuito']
+    readonly_fields = ('get_breaker_display', 'get_adaptive_display')
     
     # Configuración para formulario de selección limitado
     autocomplete_fields = ['marca', 'modelo']
@@ -29,8 +30,15 @@ class OLTAdmin(admin.ModelAdmin):
         ('Configuración', {
             'fields': (
                 'habilitar_olt',
+                'get_breaker_display',
             )
         }),
+        ('Control adaptativo GET', {
+            'fields': (
+                'get_adaptive_display',
+            ),
+            'description': 'Concurrencia y tamaño de lote ajustados por OLT (AIMD), acotados por la Configuración SNMP de GET'
+        }),
     )
 
     def get_modelo_display(self, obj):
@@ -49,6 +57,22 @@ class OLTAdmin(admin.ModelAdmin):
     get_status_icon.short_description = 'Estado'
     get_status_icon.admin_order_field = 'habilitar_olt'
 
+    def get_adaptive_display(self, obj):
+        """Estado del control adaptativo GET de la OLT (Redis)"""
+        if not obj.pk:
+            return '-'
+        from snmp_get.adaptive import describe_state, get_configured_bounds
+        return describe_state(obj.pk, get_configured_bounds('get'))
+    get_adaptive_display.short_description = 'Control GET'
+
+    def get_breaker_display(self, obj):
+        """Estado del circuit breaker de la OLT (Redis)"""
+        if not obj.pk:
+            return '-'
+        from snmp_client.breaker import describe_state
+        return describe_state(obj.pk)
+    get_breaker_display.short_description = 'Circuito SNMP'
+
     def deshabilitar_olts_seleccionadas(self, request, queryset):
         """Acción para deshabilitar OLTs seleccionadas"""
         # Filtrar solo las OLTs que están habilitadas
@@ -136,4 +160,30 @@ class OLTAdmin(admin.ModelAdmin):
                 messages.INFO
             )
     
-    habilitar_olts_seleccionadas.short_description = _('Habilitar OLTs seleccionadas')
\ No newline at end of file
+    habilitar_olts_seleccionadas.short_description = _('Habilitar OLTs seleccionadas')
+
+    def reiniciar_control_adaptativo(self, request, queryset):
+        """Acción para volver el control adaptativo GET a las cotas superiores"""
+        from snmp_get.adaptive import reset_state
+        olt_ids = list(queryset.values_list('id', flat=True))
+        reset_state(olt_ids)
+        self.message_user(
+            request,
+            _('Control adaptativo reiniciado para {} OLTs.').format(len(olt_ids)),
+            messages.SUCCESS
+        )
+
+    reiniciar_control_adaptativo.short_description = _('Reiniciar control adaptativo GET')
+
+    def cerrar_circuito(self, request, queryset):
+        """Acción para cerrar el circuit breaker (volver a despachar trabajo sin esperar la sonda)"""
+        from snmp_client.breaker import reset_state
+        olt_ids = list(queryset.values_list('id', flat=True))
+        reset_state(olt_ids)
+        self.message_user(
+            request,
+            _('Circuito cerrado para {} OLTs.').format(len(olt_ids)),
+            messages.SUCCESS
+        )
+
+    cerrar_circuito.short_description = _('Cerrar circuito SNMP')
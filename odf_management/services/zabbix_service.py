@@ -948,42 +948,16 @@ class ZabbixService:
             olt: Instancia de OLT
             
         Returns:
-            IndexFormula instance o None si no hay fórmula para esta marca/modelo
+            CompiledFormula o None si no hay fórmula para esta marca/modelo
         """
         try:
-            from snmp_formulas.models import IndexFormula
+            from snmp_formulas.services import get_formula_for_olt
             
-            # Buscar fórmula específica para esta marca y modelo
-            formula = IndexFormula.objects.filter(
-                marca=olt.marca,
-                modelo=olt.modelo,
-                activo=True
-            ).first()
+            # Resolución marca + modelo → marca → universal, cacheada por proceso
+            formula = get_formula_for_olt(olt)
             
             if formula:
-                logger.debug(f"Fórmula encontrada para OLT {olt.abreviatura}: {formula.nombre}")
-                return formula
-            
-            # Si no hay fórmula específica, buscar por marca solamente
-            formula = IndexFormula.objects.filter(
-                marca=olt.marca,
-                modelo__isnull=True,
-                activo=True
-            ).first()
-            
-            if formula:
-                logger.debug(f"Fórmula genérica de marca encontrada para OLT {olt.abreviatura}: {formula.nombre}")
-                return formula
-            
-            # Fórmula universal (sin marca ni modelo)
-            formula = IndexFormula.objects.filter(
-                marca__isnull=True,
-                modelo__isnull=True,
-                activo=True
-            ).first()
-            
-            if formula:
-                logger.debug(f"Fórmula universal encontrada para OLT {olt.abreviatura}: {formula.nombre}")
+                logger.debug(f"Fórmula ({formula.priority}) encontrada para OLT {olt.abreviatura}: {formula.nombre}")
                 return formula
             
             logger.warning(f"No se encontró fórmula para OLT {olt.abreviatura} (marca: {olt.marca}, modelo: {olt.modelo})")
@@ -0,0 +1,2 @@
+# snmp_client/__init__.py
+default_app_config = 'snmp_client.apps.SnmpClientConfig'
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SnmpClientConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'snmp_client'
+    verbose_name = 'Cliente SNMP asíncrono'
+
+    def ready(self):
+        # Registrar signals de invalidación del pool de sesiones
+        from . import signals  # noqa: F401
@@ -0,0 +1,395 @@
+"""
+Backends SNMP asíncronos intercambiables.
+
+- 'asyncio': cliente SNMPv1/v2c nativo sobre un socket UDP de asyncio. Un solo
+  socket por event loop multiplexa todas las consultas por request-id, así que
+  cientos de requests concurrentes no ocupan hilos ni sockets extra.
+- 'easysnmp': delega cada operación bloqueante de easysnmp.Session a un pool de
+  hilos. Sirve para SNMPv3 o como respaldo si el backend nativo da problemas.
+
+Ambos devuelven SnmpVarbind con los mismos atributos que usa el código que
+consume easysnmp (oid, oid_index, value, snmp_type).
+"""
+import asyncio
+import itertools
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from . import ber
+
+logger = logging.getLogger(__name__)
+
+
+class SnmpError(Exception):
+    """Error SNMP reportado por el agente o por el backend"""
+
+
+class SnmpTimeoutError(SnmpError):
+    """El agente no respondió dentro de timeout × (retries + 1)"""
+
+
+class SnmpConnectionError(SnmpError):
+    """No se pudo hablar con el agente (conexión rechazada, socket cerrado)"""
+
+
+def is_getbulk_agent_error(exc) -> bool:
+    """
+    True si un GETBULK falló del lado del agente: error-status en la
+    respuesta (tooBig, genErr, ...), PDU ilegible u OIDs fuera de orden. Solo
+    entonces tiene sentido seguir el walk con GETNEXT; un timeout o un error
+    de conexión es de la OLT o de la red, y GETNEXT no lo arregla.
+    """
+    if isinstance(exc, (SnmpTimeoutError, SnmpConnectionError, OSError)):
+        return False
+    if isinstance(exc, (SnmpError, ber.BerDecodeError)):
+        return True
+    # easysnmp (sesiones del pool) no tiene una jerarquía de errores común
+    if type(exc).__name__ in ('EasySNMPTimeoutError', 'EasySNMPConnectionError'):
+        return False
+    message = str(exc).lower()
+    return 'timeout' not in message and 'timed out' not in message
+
+
+class SnmpTarget(NamedTuple):
+    """Destino SNMP; es hashable para usarlo como clave de semáforos y pools"""
+    host: str
+    community: str = 'public'
+    version: int = 2
+    timeout: float = 3
+    retries: int = 1
+    port: int = 161
+
+
+def split_host_port(address: str, default_port: int = 161) -> Tuple[str, int]:
+    """
+    Separa "host:puerto" (o "[ipv6]:puerto") como acepta net-snmp en
+    OLT.ip_address; sin puerto, o una IPv6 sin corchetes, usa default_port.
+    """
+    address = address.strip()
+    if address.startswith('['):
+        host, _, rest = address[1:].partition(']')
+        port = rest[1:] if rest.startswith(':') else ''
+    elif address.count(':') == 1:
+        host, _, port = address.partition(':')
+    else:
+        host, port = address, ''
+    return host, int(port) if port.isdigit() else default_port
+
+
+class SnmpVarbind(NamedTuple):
+    """Resultado de una consulta, compatible con SNMPVariable de easysnmp"""
+    oid: str
+    oid_index: str
+    value: str
+    snmp_type: str
+
+
+def _format_value(tag, value) -> str:
+    if isinstance(value, bytes):
+        try:
+            return value.decode('utf-8')
+        except UnicodeDecodeError:
+            return value.decode('latin-1')
+    if value is None:
+        # Igual que easysnmp: NOSUCHINSTANCE / NOSUCHOBJECT / ENDOFMIBVIEW
+        return ber.TYPE_NAMES.get(tag, 'NULL')
+    return str(value)
+
+
+def make_varbind(oid, tag, value) -> SnmpVarbind:
+    return SnmpVarbind(ber.oid_to_str(oid), '', _format_value(tag, value), ber.TYPE_NAMES.get(tag, 'UNKNOWN'))
+
+
+MAX_SUBID = 0xFFFFFFFF
+
+
+def walk_start(start: tuple) -> tuple:
+    """
+    OID desde el que pedir GETNEXT para que la primera fila sea >= start
+    (incluido el propio start). Un OID no tiene predecesor exacto: se usa
+    el hermano anterior seguido del sub-identificador máximo.
+    """
+    if start[-1] == 0:
+        return start[:-1]
+    return start[:-1] + (start[-1] - 1, MAX_SUBID)
+
+
+def walk_page(base: tuple, current: tuple, batch: List[SnmpVarbind], end: Optional[tuple] = None):
+    """
+    Filtra una respuesta GETNEXT/GETBULK de un walk.
+
+    El walk termina al salir del subárbol base (o al llegar a end, excluido),
+    en endOfMibView / noSuch* o si la respuesta viene vacía; un OID que no
+    avanza es un error del agente.
+
+    Returns:
+        tuple: (filas dentro del subárbol, último OID recorrido, walk terminado)
+    """
+    rows = []
+    if not batch:
+        return rows, current, True
+    for varbind in batch:
+        row_oid = ber.oid_to_tuple(varbind.oid)
+        if (
+            varbind.snmp_type in ('ENDOFMIBVIEW', 'NOSUCHOBJECT', 'NOSUCHINSTANCE')
+            or row_oid[:len(base)] != base
+            or (end is not None and row_oid >= end)
+        ):
+            return rows, current, True
+        if row_oid <= current:
+            raise SnmpError(f"El agente devolvió OIDs fuera de orden en {ber.oid_to_str(row_oid)}")
+        rows.append(varbind)
+        current = row_oid
+    return rows, current, False
+
+
+class SnmpBackend:
+    """
+    Interfaz de backend. Solo get / get_next / get_bulk son obligatorios;
+    walk se implementa encima de ellos.
+    """
+    name = None
+
+    async def get(self, target: SnmpTarget, oids: List[str]) -> List[SnmpVarbind]:
+        raise NotImplementedError
+
+    async def get_next(self, target: SnmpTarget, oids: List[str]) -> List[SnmpVarbind]:
+        raise NotImplementedError
+
+    async def get_bulk(self, target: SnmpTarget, oids: List[str], max_repetitions: int) -> List[SnmpVarbind]:
+        raise NotImplementedError
+
+    async def iter_walk(self, target: SnmpTarget, oid: str, max_repetitions: Optional[int] = None,
+                        on_fallback: Optional[Callable[[Exception], None]] = None,
+                        start_oid: Optional[str] = None, end_oid: Optional[str] = None):
+        """
+        Recorre el subárbol de oid con GETBULK (v2c) o GETNEXT (v1 o sin
+        max_repetitions) y entrega una página (lista de varbinds) por PDU, sin
+        acumular el walk completo.
+
+        Con on_fallback, si el agente rechaza un GETBULK (error-status,
+        respuesta ilegible o fuera de orden, ver is_getbulk_agent_error) el
+        walk sigue con GETNEXT desde el último OID recibido y se llama
+        on_fallback(error) una vez. Los timeouts y errores de conexión se
+        propagan sin fallback.
+
+        start_oid / end_oid limitan el walk al rango [start_oid, end_oid) del
+        subárbol (None = sin límite), para recorrer partes en paralelo.
+        """
+        base = ber.oid_to_tuple(oid)
+        end = ber.oid_to_tuple(end_oid) if end_oid else None
+        use_bulk = bool(max_repetitions) and target.version != 1
+        current = walk_start(ber.oid_to_tuple(start_oid)) if start_oid else base
+
+        while True:
+            if use_bulk:
+                try:
+                    batch = await self.get_bulk(target, [ber.oid_to_str(current)], max_repetitions)
+                    rows, next_oid, done = walk_page(base, current, batch, end)
+                except (SnmpError, ber.BerDecodeError) as e:
+                    if on_fallback is None or not is_getbulk_agent_error(e):
+                        raise
+                    use_bulk = False
+                    on_fallback(e)
+                    continue
+                current = next_oid
+            else:
+                batch = await self.get_next(target, [ber.oid_to_str(current)])
+                rows, current, done = walk_page(base, current, batch, end)
+            if rows:
+                yield rows
+            if done:
+                return
+
+    async def walk(self, target: SnmpTarget, oid: str, max_repetitions: Optional[int] = None) -> List[SnmpVarbind]:
+        """Walk completo del subárbol (ver iter_walk)"""
+        rows = []
+        async for page in self.iter_walk(target, oid, max_repetitions=max_repetitions):
+            rows.extend(page)
+        return rows
+
+    async def close(self):
+        """Libera recursos del backend (sockets, hilos)"""
+
+
+class _UdpDemux(asyncio.DatagramProtocol):
+    """Protocolo UDP que entrega cada respuesta al future de su request-id"""
+
+    def __init__(self):
+        self.transport = None
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            message = ber.decode_message(data)
+        except ber.BerDecodeError as e:
+            logger.debug(f"📭 Paquete SNMP inválido de {addr}: {e}")
+            return
+        future = self.pending.pop(message['request_id'], None)
+        if future and not future.done():
+            future.set_result(message)
+
+    def error_received(self, exc):
+        logger.debug(f"⚠️ Error UDP SNMP: {exc}")
+
+    def connection_lost(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(SnmpConnectionError("Socket SNMP cerrado"))
+        self.pending.clear()
+
+
+class AsyncioUdpBackend(SnmpBackend):
+    """Cliente SNMPv1/v2c nativo sobre asyncio (sin hilos)"""
+    name = 'asyncio'
+
+    def __init__(self):
+        self._protocol: Optional[_UdpDemux] = None
+        self._loop = None
+        self._request_ids = itertools.count(random.randint(1, 2 ** 30))
+
+    async def _get_protocol(self) -> _UdpDemux:
+        loop = asyncio.get_running_loop()
+        if self._protocol is None or self._loop is not loop or self._protocol.transport.is_closing():
+            _, self._protocol = await loop.create_datagram_endpoint(_UdpDemux, local_addr=('0.0.0.0', 0))
+            self._loop = loop
+        return self._protocol
+
+    async def _request(self, target: SnmpTarget, pdu_type: int, oids: List[str],
+                       non_repeaters: int = 0, max_repetitions: int = 0) -> List[SnmpVarbind]:
+        if target.version not in (1, 2):
+            raise SnmpError(f"El backend asyncio solo soporta SNMPv1/v2c (versión {target.version})")
+        if pdu_type == ber.PDU_GETBULK and target.version == 1:
+            raise SnmpError("SNMPv1 no soporta GETBULK")
+
+        protocol = await self._get_protocol()
+        version = ber.VERSION_V1 if target.version == 1 else ber.VERSION_V2C
+        request_id = next(self._request_ids) & 0x7FFFFFFF
+        packet = ber.encode_message(
+            version, target.community, pdu_type, request_id,
+            [(oid, ber.TAG_NULL, None) for oid in oids],
+            error_status=non_repeaters, error_index=max_repetitions
+        )
+
+        loop = asyncio.get_running_loop()
+        for attempt in range(int(target.retries) + 1):
+            future = loop.create_future()
+            protocol.pending[request_id] = future
+            protocol.transport.sendto(packet, (target.host, target.port))
+            try:
+                message = await asyncio.wait_for(future, timeout=target.timeout)
+                break
+            except asyncio.TimeoutError:
+                protocol.pending.pop(request_id, None)
+        else:
+            raise SnmpTimeoutError(f"Timeout SNMP en {target.host} ({int(target.retries) + 1} intentos)")
+
+        if message['error_status']:
+            status = ber.ERROR_STATUS_NAMES.get(message['error_status'], message['error_status'])
+            raise SnmpError(f"{status} en varbind {message['error_index']} ({target.host})")
+
+        return [make_varbind(oid, tag, value) for oid, tag, value in message['varbinds']]
+
+    async def get(self, target, oids):
+        return await self._request(target, ber.PDU_GET, oids)
+
+    async def get_next(self, target, oids):
+        try:
+            return await self._request(target, ber.PDU_GETNEXT, oids)
+        except SnmpError as e:
+            # En SNMPv1 el fin de la MIB se informa como noSuchName
+            if target.version == 1 and 'noSuchName' in str(e):
+                return []
+            raise
+
+    async def get_bulk(self, target, oids, max_repetitions):
+        return await self._request(target, ber.PDU_GETBULK, oids, max_repetitions=max_repetitions)
+
+    async def close(self):
+        if self._protocol and self._protocol.transport:
+            self._protocol.transport.close()
+        self._protocol = None
+
+
+class EasySnmpBackend(SnmpBackend):
+    """Ejecuta easysnmp.Session en un pool de hilos (soporta todo lo que soporta net-snmp)"""
+    name = 'easysnmp'
+
+    def __init__(self, max_workers: int = 32):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='snmp')
+
+    @staticmethod
+    def _session(target: SnmpTarget):
+        from easysnmp import Session
+        return Session(
+            hostname=target.host,
+            remote_port=target.port,
+            community=target.community,
+            version=target.version,
+            timeout=target.timeout,
+            retries=target.retries
+        )
+
+    async def _run(self, target, method, *args, **kwargs):
+        def call():
+            try:
+                return getattr(self._session(target), method)(*args, **kwargs)
+            except Exception as e:
+                if type(e).__name__ == 'EasySNMPTimeoutError':
+                    raise SnmpTimeoutError(str(e)) from e
+                if type(e).__name__ == 'EasySNMPConnectionError':
+                    raise SnmpConnectionError(str(e)) from e
+                raise SnmpError(str(e)) from e
+
+        result = await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        if not isinstance(result, list):
+            result = [result]
+        return [
+            SnmpVarbind(str(item.oid), str(item.oid_index or ''), str(item.value), str(item.snmp_type))
+            for item in result
+        ]
+
+    async def get(self, target, oids):
+        return await self._run(target, 'get', list(oids))
+
+    async def get_next(self, target, oids):
+        return await self._run(target, 'get_next', list(oids))
+
+    async def get_bulk(self, target, oids, max_repetitions):
+        return await self._run(target, 'get_bulk', list(oids), max_repetitions=max_repetitions)
+
+    async def walk(self, target, oid, max_repetitions=None):
+        # net-snmp ya implementa el recorrido completo; una sola llamada bloqueante por walk
+        if max_repetitions and target.version != 1:
+            return await self._run(target, 'bulkwalk', oid, max_repetitions=max_repetitions)
+        return await self._run(target, 'walk', oid)
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+
+
+BACKENDS: Dict[str, Type[SnmpBackend]] = {
+    AsyncioUdpBackend.name: AsyncioUdpBackend,
+    EasySnmpBackend.name: EasySnmpBackend,
+}
+
+
+def register_backend(name: str, backend_class: Type[SnmpBackend]):
+    """Registra un backend adicional (p. ej. uno basado en pysnmp) bajo un nombre configurable"""
+    BACKENDS[name] = backend_class
+
+
+def create_backend(name: Optional[str] = None) -> SnmpBackend:
+    """Instancia el backend por nombre (por defecto el configurado en snmp_async_backend)"""
+    if name is None:
+        from configuracion_avanzada.services import get_snmp_async_backend
+        name = get_snmp_async_backend()
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise SnmpError(f"Backend SNMP desconocido: {name} (disponibles: {', '.join(sorted(BACKENDS))})")
@@ -0,0 +1,253 @@
+"""
+Codificador/decodificador BER mínimo para mensajes SNMPv1/v2c.
+
+Solo cubre lo que necesitan el backend asyncio y el responder local:
+GET, GETNEXT, GETBULK y RESPONSE con los tipos de valor de SNMPv2-SMI.
+"""
+from typing import List, Tuple
+
+# Tipos universales
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+
+# Tipos de aplicación (SNMPv2-SMI)
+TAG_IPADDRESS = 0x40
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_OPAQUE = 0x44
+TAG_COUNTER64 = 0x46
+
+# Excepciones de varbind (SNMPv2)
+TAG_NO_SUCH_OBJECT = 0x80
+TAG_NO_SUCH_INSTANCE = 0x81
+TAG_END_OF_MIB_VIEW = 0x82
+
+# PDUs
+PDU_GET = 0xA0
+PDU_GETNEXT = 0xA1
+PDU_RESPONSE = 0xA2
+PDU_SET = 0xA3
+PDU_GETBULK = 0xA5
+
+VERSION_V1 = 0
+VERSION_V2C = 1
+
+# Nombres de tipo compatibles con SNMPVariable.snmp_type de easysnmp
+TYPE_NAMES = {
+    TAG_INTEGER: 'INTEGER',
+    TAG_OCTET_STRING: 'OCTETSTR',
+    TAG_NULL: 'NULL',
+    TAG_OID: 'OBJECTID',
+    TAG_IPADDRESS: 'IPADDR',
+    TAG_COUNTER32: 'COUNTER',
+    TAG_GAUGE32: 'GAUGE',
+    TAG_TIMETICKS: 'TICKS',
+    TAG_OPAQUE: 'OPAQUE',
+    TAG_COUNTER64: 'COUNTER64',
+    TAG_NO_SUCH_OBJECT: 'NOSUCHOBJECT',
+    TAG_NO_SUCH_INSTANCE: 'NOSUCHINSTANCE',
+    TAG_END_OF_MIB_VIEW: 'ENDOFMIBVIEW',
+}
+
+ERROR_STATUS_NAMES = {
+    0: 'noError', 1: 'tooBig', 2: 'noSuchName', 3: 'badValue', 4: 'readOnly', 5: 'genErr',
+    6: 'noAccess', 7: 'wrongType', 8: 'wrongLength', 9: 'wrongEncoding', 10: 'wrongValue',
+    11: 'noCreation', 12: 'inconsistentValue', 13: 'resourceUnavailable', 14: 'commitFailed',
+    15: 'undoFailed', 16: 'authorizationError', 17: 'notWritable', 18: 'inconsistentName',
+}
+
+
+class BerDecodeError(ValueError):
+    """Paquete SNMP mal formado"""
+
+
+# ---------------------------------------------------------------- encoding
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes([length])
+    body = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(body)]) + body
+
+
+def encode_tlv(tag: int, body: bytes) -> bytes:
+    return bytes([tag]) + _encode_length(len(body)) + body
+
+
+def encode_integer(value: int, tag: int = TAG_INTEGER) -> bytes:
+    size = max(1, (value.bit_length() + 8) // 8)
+    return encode_tlv(tag, value.to_bytes(size, 'big', signed=True))
+
+
+def encode_unsigned(value: int, tag: int) -> bytes:
+    size = max(1, (value.bit_length() + 8) // 8)  # Byte extra para que no quede negativo
+    return encode_tlv(tag, value.to_bytes(size, 'big'))
+
+
+def oid_to_tuple(oid) -> Tuple[int, ...]:
+    """'.1.3.6.1' / '1.3.6.1' / 'iso.3.6.1' → (1, 3, 6, 1)"""
+    if isinstance(oid, tuple):
+        return oid
+    oid = str(oid).strip().lstrip('.')
+    if oid.startswith('iso.'):
+        oid = '1.' + oid[4:]
+    return tuple(int(part) for part in oid.split('.') if part)
+
+
+def oid_to_str(oid: Tuple[int, ...]) -> str:
+    return '.' + '.'.join(str(part) for part in oid)
+
+
+def encode_oid(oid) -> bytes:
+    parts = oid_to_tuple(oid)
+    if len(parts) < 2:
+        parts = parts + (0,) * (2 - len(parts))
+    body = bytearray([parts[0] * 40 + parts[1]])
+    for part in parts[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        body.extend(reversed(chunk))
+    return encode_tlv(TAG_OID, bytes(body))
+
+
+def encode_value(tag: int, value) -> bytes:
+    """Codifica un valor de varbind según su tag"""
+    if tag == TAG_INTEGER:
+        return encode_integer(int(value))
+    if tag in (TAG_COUNTER32, TAG_GAUGE32, TAG_TIMETICKS, TAG_COUNTER64):
+        return encode_unsigned(int(value), tag)
+    if tag in (TAG_OCTET_STRING, TAG_OPAQUE):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        return encode_tlv(tag, bytes(value))
+    if tag == TAG_IPADDRESS:
+        return encode_tlv(tag, bytes(int(part) for part in str(value).split('.')))
+    if tag == TAG_OID:
+        return encode_oid(value)
+    # NULL y excepciones de varbind no tienen contenido
+    return encode_tlv(tag, b'')
+
+
+def encode_message(version: int, community: str, pdu_type: int, request_id: int,
+                   varbinds: List[Tuple], error_status: int = 0, error_index: int = 0) -> bytes:
+    """
+    Arma un mensaje SNMP completo.
+
+    Args:
+        varbinds: Lista de (oid, tag, valor); para requests usar (oid, TAG_NULL, None)
+        error_status/error_index: En GETBULK son non-repeaters/max-repetitions
+    """
+    varbind_list = b''.join(
+        encode_tlv(TAG_SEQUENCE, encode_oid(oid) + encode_value(tag, value))
+        for oid, tag, value in varbinds
+    )
+    pdu = encode_tlv(
+        pdu_type,
+        encode_integer(request_id) + encode_integer(error_status) + encode_integer(error_index)
+        + encode_tlv(TAG_SEQUENCE, varbind_list)
+    )
+    return encode_tlv(
+        TAG_SEQUENCE,
+        encode_integer(version) + encode_value(TAG_OCTET_STRING, community) + pdu
+    )
+
+
+# ---------------------------------------------------------------- decoding
+
+def decode_tlv(data: bytes, offset: int = 0) -> Tuple[int, bytes, int]:
+    """Devuelve (tag, contenido, offset siguiente)"""
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            size = length & 0x7F
+            length = int.from_bytes(data[offset:offset + size], 'big')
+            offset += size
+    except IndexError:
+        raise BerDecodeError("TLV truncado")
+    end = offset + length
+    if end > len(data):
+        raise BerDecodeError("Longitud TLV fuera de rango")
+    return tag, data[offset:end], end
+
+
+def _decode_sequence(body: bytes) -> List[Tuple[int, bytes]]:
+    items = []
+    offset = 0
+    while offset < len(body):
+        tag, content, offset = decode_tlv(body, offset)
+        items.append((tag, content))
+    return items
+
+
+def decode_oid(body: bytes) -> Tuple[int, ...]:
+    if not body:
+        return ()
+    first = body[0]
+    parts = [first // 40, first % 40] if first < 80 else [2, first - 80]
+    value = 0
+    for byte in body[1:]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(value)
+            value = 0
+    return tuple(parts)
+
+
+def decode_value(tag: int, body: bytes):
+    """Convierte el contenido de un varbind a un valor Python"""
+    if tag == TAG_INTEGER:
+        return int.from_bytes(body, 'big', signed=True)
+    if tag in (TAG_COUNTER32, TAG_GAUGE32, TAG_TIMETICKS, TAG_COUNTER64):
+        return int.from_bytes(body, 'big')
+    if tag == TAG_IPADDRESS:
+        return '.'.join(str(byte) for byte in body)
+    if tag == TAG_OID:
+        return oid_to_str(decode_oid(body))
+    if tag in (TAG_OCTET_STRING, TAG_OPAQUE):
+        return bytes(body)
+    return None
+
+
+def decode_message(data: bytes) -> dict:
+    """
+    Decodifica un mensaje SNMP.
+
+    Returns:
+        dict con version, community, pdu_type, request_id, error_status,
+        error_index y varbinds [(oid_tuple, tag, valor)]
+    """
+    tag, body, _ = decode_tlv(data)
+    if tag != TAG_SEQUENCE:
+        raise BerDecodeError("El mensaje no es un SEQUENCE")
+    items = _decode_sequence(body)
+    if len(items) != 3:
+        raise BerDecodeError("Mensaje SNMP incompleto")
+
+    (_, version), (_, community), (pdu_type, pdu_body) = items
+    fields = _decode_sequence(pdu_body)
+    if len(fields) != 4:
+        raise BerDecodeError("PDU SNMP incompleto")
+
+    varbinds = []
+    for _, varbind in _decode_sequence(fields[3][1]):
+        (oid_tag, oid_body), (value_tag, value_body) = _decode_sequence(varbind)
+        varbinds.append((decode_oid(oid_body), value_tag, decode_value(value_tag, value_body)))
+
+    return {
+        'version': int.from_bytes(version, 'big', signed=True),
+        'community': community.decode('utf-8', 'replace'),
+        'pdu_type': pdu_type,
+        'request_id': int.from_bytes(fields[0][1], 'big', signed=True),
+        'error_status': int.from_bytes(fields[1][1], 'big', signed=True),
+        'error_index': int.from_bytes(fields[2][1], 'big', signed=True),
+        'varbinds': varbinds,
+    }
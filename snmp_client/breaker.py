@@ -0,0 +1,276 @@
+"""
+Circuit breaker por OLT.
+
+Una OLT caída hacía que cada discovery agotara el timeout SNMP completo y
+programara dos reintentos más, y que cada GET encolara pollers que también
+terminaban en timeout. El breaker corta ese trabajo:
+
+- closed    → funcionamiento normal. Cada fallo por OLT inalcanzable (timeout
+              o conexión) suma uno; un éxito vuelve el contador a cero. Al
+              llegar a olt_breaker_failure_threshold fallos seguidos se abre.
+- open      → el dispatcher no crea ejecuciones para la OLT y los reintentos
+              y pollers pendientes se descartan. Pasado open_seconds pasa a
+              half_open.
+- half_open → el dispatcher manda UNA sola sonda (GET de sysUpTime.0, un
+              varbind, sin reintentos). Si responde se cierra; si no, se
+              vuelve a abrir con el doble de espera (hasta MAX_OPEN_SECONDS).
+
+El estado vive en un hash de Redis por OLT para que todos los workers lo
+compartan (igual que snmp_get.adaptive) y se muestra en el admin de OLTs.
+"""
+import logging
+import time
+
+from django.conf import settings
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+SYS_UPTIME_OID = '1.3.6.1.2.1.1.3.0'
+PROBE_TIMEOUT = 2               # Segundos de espera de la sonda (sin reintentos)
+PROBE_LEASE = 60                # Si la sonda no informa en este plazo, se permite otra
+MAX_OPEN_SECONDS = 900          # Tope de la espera entre sondas con la OLT caída
+STATE_TTL = 7 * 24 * 3600       # Expirar estado de OLTs que ya no se consultan
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+DECISION_RUN = 'run'            # Despachar normalmente
+DECISION_SKIP = 'skip'          # OLT abierta: no despachar
+DECISION_PROBE = 'probe'        # Turno de la sonda: despachar solo la sonda
+
+redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def _state_key(olt_id):
+    return f"snmp:breaker:olt:{olt_id}"
+
+
+def _decode_state(stored):
+    def field(name, cast, default):
+        value = stored.get(name.encode()) if stored else None
+        return default if value is None else cast(value)
+
+    return {
+        'state': field('state', bytes.decode, STATE_CLOSED),
+        'failures': field('failures', int, 0),
+        'open_seconds': field('open_seconds', float, 0.0),
+        'retry_at': field('retry_at', float, 0.0),
+        'probe_until': field('probe_until', float, 0.0),
+        'last_error': field('last_error', bytes.decode, ''),
+        'updated_at': field('updated_at', float, None),
+    }
+
+
+def _encode_state(state):
+    return {
+        name: (round(value, 3) if isinstance(value, float) else value)
+        for name, value in state.items() if value is not None
+    }
+
+
+def get_state(olt_id):
+    """Estado actual del breaker de la OLT (closed si no hay historial)"""
+    try:
+        stored = redis_client.hgetall(_state_key(olt_id))
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo leer el breaker de la OLT {olt_id}: {e}")
+        stored = None
+    return _decode_state(stored)
+
+
+def _update(olt_id, transition):
+    """
+    Lectura-modificación-escritura optimista (WATCH/MULTI) del estado.
+    transition(state, now) devuelve el nuevo estado, o None si no hay cambios.
+
+    Returns:
+        tuple: (estado anterior, estado nuevo) o (None, None) si Redis falló
+    """
+    key = _state_key(olt_id)
+    result = {}
+
+    def update(pipe):
+        old = _decode_state(pipe.hgetall(key))
+        new = transition(dict(old), time.time())
+        result['old'], result['new'] = old, new or old
+        pipe.multi()
+        if new is None:
+            return
+        if new['state'] == STATE_CLOSED and not new['failures']:
+            pipe.delete(key)
+            return
+        pipe.hset(key, mapping=_encode_state(new))
+        pipe.expire(key, STATE_TTL)
+
+    try:
+        redis_client.transaction(update, key)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo actualizar el breaker de la OLT {olt_id}: {e}")
+        return None, None
+    return result['old'], result['new']
+
+
+def is_unreachable_error(exc):
+    """
+    True si el error indica que la OLT no responde (timeout o conexión SNMP).
+    Se clasifica solo por tipo: errores locales como SemaphoreTimeout (OLT sana
+    pero ocupada) o fallos de BD/Redis no deben abrir el circuito.
+    """
+    from easysnmp import EasySNMPConnectionError, EasySNMPTimeoutError
+    from .backends import SnmpConnectionError, SnmpTimeoutError
+
+    return isinstance(exc, (SnmpTimeoutError, SnmpConnectionError, EasySNMPTimeoutError, EasySNMPConnectionError))
+
+
+def record_success(olt_id):
+    """La OLT respondió: cierra el breaker"""
+    from configuracion_avanzada.services import is_olt_breaker_enabled
+
+    if not is_olt_breaker_enabled():
+        return
+
+    def transition(state, now):
+        if state['state'] == STATE_CLOSED and not state['failures']:
+            return None
+        return {'state': STATE_CLOSED, 'failures': 0, 'updated_at': now}
+
+    old, new = _update(olt_id, transition)
+    if old and old['state'] != STATE_CLOSED:
+        logger.info(f"🟢 Breaker OLT {olt_id}: responde de nuevo, circuito cerrado")
+
+
+def record_failure(olt_id, error=''):
+    """
+    La OLT no respondió. Abre el breaker al llegar al umbral de fallos
+    seguidos; en half_open (falló la sonda) lo reabre con el doble de espera.
+    """
+    from configuracion_avanzada.services import (
+        is_olt_breaker_enabled, get_olt_breaker_failure_threshold, get_olt_breaker_open_seconds
+    )
+
+    if not is_olt_breaker_enabled():
+        return
+
+    threshold = max(1, int(get_olt_breaker_failure_threshold()))
+    base_seconds = max(1.0, float(get_olt_breaker_open_seconds()))
+
+    def transition(state, now):
+        state['failures'] += 1
+        state['last_error'] = str(error)[:200]
+        state['updated_at'] = now
+        if state['state'] == STATE_OPEN:
+            # Trabajo que ya estaba en vuelo al abrirse: no extiende la espera
+            return state
+        if state['state'] == STATE_HALF_OPEN:
+            state['open_seconds'] = min(MAX_OPEN_SECONDS, max(base_seconds, state['open_seconds'] * 2))
+        elif state['failures'] >= threshold:
+            state['open_seconds'] = base_seconds
+        else:
+            return state
+        state['state'] = STATE_OPEN
+        state['retry_at'] = now + state['open_seconds']
+        state['probe_until'] = 0.0
+        return state
+
+    old, new = _update(olt_id, transition)
+    if new and new['state'] == STATE_OPEN and old['state'] != STATE_OPEN:
+        logger.warning(
+            f"🔴 Breaker OLT {olt_id}: abierto por {new['open_seconds']:.0f}s tras {new['failures']} fallos ({new['last_error']})"
+        )
+
+
+def dispatch_decision(olt_id):
+    """
+    Qué hacer con el trabajo programado para la OLT en este tick.
+
+    Cuando vence la espera de un breaker abierto, solo el primer llamador
+    recibe DECISION_PROBE (pasa a half_open y toma el turno de la sonda).
+
+    Returns:
+        str: DECISION_RUN, DECISION_SKIP o DECISION_PROBE
+    """
+    from configuracion_avanzada.services import is_olt_breaker_enabled
+
+    if not is_olt_breaker_enabled():
+        return DECISION_RUN
+
+    decision = {}
+
+    def transition(state, now):
+        if state['state'] == STATE_CLOSED:
+            decision['value'] = DECISION_RUN
+            return None
+        if state['state'] == STATE_OPEN and now < state['retry_at']:
+            decision['value'] = DECISION_SKIP
+            return None
+        if state['state'] == STATE_HALF_OPEN and now < state['probe_until']:
+            # Sonda en curso
+            decision['value'] = DECISION_SKIP
+            return None
+        decision['value'] = DECISION_PROBE
+        state['state'] = STATE_HALF_OPEN
+        state['probe_until'] = now + PROBE_LEASE
+        state['updated_at'] = now
+        return state
+
+    old, _ = _update(olt_id, transition)
+    if old is None:
+        # Sin Redis no se bloquea el trabajo
+        return DECISION_RUN
+    return decision['value']
+
+
+def allows_requests(olt_id):
+    """False si el breaker de la OLT está abierto (o con una sonda en curso)"""
+    from configuracion_avanzada.services import is_olt_breaker_enabled
+
+    if not is_olt_breaker_enabled():
+        return True
+    return get_state(olt_id)['state'] == STATE_CLOSED
+
+
+def probe_olt(olt):
+    """
+    Sonda de alcanzabilidad: GET de sysUpTime.0 (un varbind, sin reintentos)
+    que alimenta el breaker.
+
+    Returns:
+        bool: True si la OLT respondió
+    """
+    from .engine import run_sync
+    from .services import olt_target
+
+    target = olt_target(olt, timeout=PROBE_TIMEOUT, retries=0)
+    start_time = time.time()
+    try:
+        run_sync(lambda engine: engine.get(target, [SYS_UPTIME_OID]), per_olt_limit=1)
+    except Exception as e:
+        logger.warning(f"📡 Sonda OLT {olt.abreviatura}: sin respuesta ({e})")
+        record_failure(olt.id, e)
+        return False
+
+    logger.info(f"📡 Sonda OLT {olt.abreviatura}: responde en {int((time.time() - start_time) * 1000)}ms")
+    record_success(olt.id)
+    return True
+
+
+def reset_state(olt_ids):
+    """Cierra el breaker de las OLTs (borra su estado)"""
+    keys = [_state_key(olt_id) for olt_id in olt_ids]
+    if keys:
+        redis_client.delete(*keys)
+
+
+def describe_state(olt_id):
+    """Resumen legible del estado para el admin"""
+    state = get_state(olt_id)
+    if state['state'] == STATE_CLOSED:
+        if state['failures']:
+            return f"🟡 Cerrado ({state['failures']} fallos seguidos)"
+        return "🟢 Cerrado"
+    if state['state'] == STATE_HALF_OPEN:
+        return f"🟠 Semiabierto (sonda en curso) · {state['last_error']}"
+    remaining = max(0, int(state['retry_at'] - time.time()))
+    return f"🔴 Abierto · próxima sonda en {remaining}s · {state['failures']} fallos · {state['last_error']}"
@@ -0,0 +1,97 @@
+"""
+Motor SNMP asíncrono: un backend compartido más límites de concurrencia por OLT.
+
+Un mismo proceso puede lanzar cientos de requests a la vez contra muchas OLTs
+(asyncio.gather), pero a cada OLT nunca le llegan más de `per_olt_limit`
+requests simultáneas (mismo criterio que max_consultas_snmp_simultaneas de
+los pollers sincrónicos).
+
+Las tareas Celery son sincrónicas: usan run_sync() para ejecutar una corrutina
+del motor en un event loop propio.
+"""
+import asyncio
+from typing import Dict, List, Optional, Sequence
+
+from .backends import SnmpBackend, SnmpTarget, SnmpVarbind, create_backend
+
+DEFAULT_PER_OLT_LIMIT = 5
+
+
+class AsyncSnmpEngine:
+    """
+    Fachada sobre un SnmpBackend con un asyncio.Semaphore por OLT (host:port).
+
+    Los semáforos pertenecen al event loop en que se crean, por eso el motor
+    está pensado para vivir dentro de un run_sync() / asyncio.run().
+    """
+
+    def __init__(self, backend: Optional[SnmpBackend] = None, per_olt_limit: int = DEFAULT_PER_OLT_LIMIT):
+        self.backend = backend or create_backend()
+        self.per_olt_limit = max(1, int(per_olt_limit))
+        self._semaphores: Dict[tuple, asyncio.Semaphore] = {}
+
+    def _semaphore(self, target: SnmpTarget) -> asyncio.Semaphore:
+        key = (target.host, target.port)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.per_olt_limit)
+        return self._semaphores[key]
+
+    async def get(self, target: SnmpTarget, oids: Sequence[str]) -> List[SnmpVarbind]:
+        """GET de uno o varios OIDs en un solo PDU"""
+        async with self._semaphore(target):
+            return await self.backend.get(target, list(oids))
+
+    async def walk(self, target: SnmpTarget, oid: str, max_repetitions: Optional[int] = None) -> List[SnmpVarbind]:
+        """Walk completo de un subárbol (ocupa un solo slot de la OLT)"""
+        async with self._semaphore(target):
+            return await self.backend.walk(target, oid, max_repetitions=max_repetitions)
+
+    async def get_many(self, target: SnmpTarget, oid_batches: Sequence[Sequence[str]]):
+        """
+        Lanza un PDU GET por lote, todos concurrentes (acotados por el semáforo de la OLT).
+
+        Returns:
+            list: Por lote, la lista de varbinds o la excepción si ese PDU falló
+        """
+        return await asyncio.gather(
+            *(self.get(target, batch) for batch in oid_batches),
+            return_exceptions=True
+        )
+
+    async def walk_many(self, requests: Sequence[tuple], max_repetitions: Optional[int] = None):
+        """
+        Walks concurrentes sobre varias OLTs.
+
+        Args:
+            requests: Lista de (SnmpTarget, oid)
+
+        Returns:
+            list: Por request, la lista de varbinds o la excepción
+        """
+        return await asyncio.gather(
+            *(self.walk(target, oid, max_repetitions=max_repetitions) for target, oid in requests),
+            return_exceptions=True
+        )
+
+    async def close(self):
+        await self.backend.close()
+
+
+def run_sync(coro_factory, backend_name: Optional[str] = None, per_olt_limit: int = DEFAULT_PER_OLT_LIMIT):
+    """
+    Ejecuta coro_factory(engine) en un event loop nuevo y cierra el backend al terminar.
+
+    Ejemplo:
+        rows = run_sync(lambda engine: engine.walk(target, oid))
+    """
+    # El backend se resuelve fuera del loop: create_backend puede leer configuración de la BD
+    backend = create_backend(backend_name)
+
+    async def runner():
+        engine = AsyncSnmpEngine(backend, per_olt_limit=per_olt_limit)
+        try:
+            return await coro_factory(engine)
+        finally:
+            await engine.close()
+
+    return asyncio.run(runner())
@@ -0,0 +1,192 @@
+"""
+Pool de sesiones easysnmp local al worker.
+
+Cada poller GET, walk de discovery y reintento creaba su propia
+easysnmp.Session y volvía a leer timeout/reintentos de la BD. Este pool:
+
+- Reutiliza sesiones por clave (ip, community, version, timeout, retries).
+  Una sesión se presta en exclusiva (easysnmp no es thread-safe) y vuelve al
+  pool al terminar.
+- Desaloja las sesiones ociosas más de SESSION_IDLE_TIMEOUT segundos y nunca
+  guarda más de SESSION_POOL_MAX_SIZE sesiones ociosas (LRU).
+- Memoriza en el proceso la OLT (ip/comunidad) y los parámetros SNMP.
+
+Los cambios se hacen en otro proceso (admin), así que la invalidación va por
+un contador de generación en Redis que las signals de OLT / ConfiguracionSNMP
+incrementan; cada worker lo consulta como máximo cada GENERATION_CHECK_INTERVAL
+segundos y, si cambió, vacía pool y memos.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SESSION_POOL_MAX_SIZE = 64
+SESSION_IDLE_TIMEOUT = 300  # segundos
+GENERATION_CHECK_INTERVAL = 5  # segundos
+GENERATION_KEY = "snmp:session_pool:generation"
+
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        from redis import Redis
+        _redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+    return _redis_client
+
+
+def _default_factory(host, community, version, timeout, retries):
+    from easysnmp import Session
+    return Session(hostname=host, community=community, version=version, timeout=timeout, retries=retries)
+
+
+class SnmpSessionPool:
+    """Pool LRU de sesiones ociosas con préstamo exclusivo"""
+
+    def __init__(self, max_size: int = SESSION_POOL_MAX_SIZE, idle_timeout: float = SESSION_IDLE_TIMEOUT,
+                 factory: Optional[Callable] = None):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.factory = factory or _default_factory
+
+        self._idle: "OrderedDict[Tuple[tuple, int], Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._serial = 0
+
+        # Memos del proceso (se vacían junto con el pool)
+        self._memo: Dict[tuple, object] = {}
+        self._generation = None
+        self._generation_checked_at = 0.0
+
+        self.created = 0
+        self.reused = 0
+
+    # ------------------------------------------------------------ sesiones
+
+    def _evict_idle(self, now: float):
+        expired = [slot for slot, (_, last_used) in self._idle.items() if now - last_used > self.idle_timeout]
+        for slot in expired:
+            del self._idle[slot]
+        while len(self._idle) > self.max_size:
+            self._idle.popitem(last=False)
+
+    def acquire(self, key: tuple):
+        """Presta una sesión para key (reutiliza una ociosa o crea una nueva)"""
+        self.check_generation()
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            for slot in reversed(self._idle):
+                if slot[0] == key:
+                    session, _ = self._idle.pop(slot)
+                    self.reused += 1
+                    return session
+        session = self.factory(*key)
+        self.created += 1
+        return session
+
+    def release(self, key: tuple, session, discard: bool = False):
+        """Devuelve la sesión al pool (discard=True la descarta, p. ej. tras un error de conexión)"""
+        if discard:
+            return
+        with self._lock:
+            self._serial += 1
+            self._idle[(key, self._serial)] = (session, time.monotonic())
+            self._evict_idle(time.monotonic())
+
+    @contextmanager
+    def session(self, host: str, community: str, version: int = 2, timeout: float = 3, retries: int = 1):
+        """
+        Context manager de préstamo:
+
+            with session_pool.session(ip, community, 2, timeout, retries) as session:
+                session.get(oids)
+        """
+        key = (host, community, int(version), timeout, int(retries))
+        session = self.acquire(key)
+        discard = False
+        try:
+            yield session
+        except Exception as e:
+            # Errores de conexión dejan la sesión net-snmp en mal estado: no reutilizarla
+            discard = type(e).__name__ == 'EasySNMPConnectionError'
+            raise
+        finally:
+            self.release(key, session, discard=discard)
+
+    # --------------------------------------------------------------- memos
+
+    def memoize(self, key: tuple, loader: Callable):
+        """Valor memorizado en el proceso hasta la próxima invalidación"""
+        self.check_generation()
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = loader()
+            self._memo[key] = value
+            return value
+
+    # --------------------------------------------------------- invalidación
+
+    def clear(self, reason: str = ''):
+        with self._lock:
+            cleared = len(self._idle)
+            self._idle.clear()
+            self._memo.clear()
+        logger.debug(f"🧹 Pool de sesiones SNMP vaciado ({cleared} sesiones){f': {reason}' if reason else ''}")
+
+    def check_generation(self, force: bool = False):
+        """Vacía el pool si otro proceso incrementó la generación (consulta Redis como máximo cada N segundos)"""
+        now = time.monotonic()
+        if not force and now - self._generation_checked_at < GENERATION_CHECK_INTERVAL:
+            return
+        self._generation_checked_at = now
+        try:
+            generation = _get_redis().get(GENERATION_KEY)
+        except Exception as e:
+            # Sin Redis, mejor no reutilizar nada que pueda estar desactualizado
+            logger.warning(f"⚠️ No se pudo leer la generación del pool SNMP: {e}")
+            self.clear('sin Redis')
+            return
+        if generation != self._generation:
+            if self._generation is not None:
+                self.clear('generación cambiada')
+            self._generation = generation
+
+    def stats(self) -> Dict:
+        return {'idle': len(self._idle), 'created': self.created, 'reused': self.reused, 'memo': len(self._memo)}
+
+
+session_pool = SnmpSessionPool()
+
+
+def invalidate_session_pool(reason: str = ''):
+    """Invalida los pools de todos los workers (generación en Redis) y el del proceso actual"""
+    try:
+        _get_redis().incr(GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo publicar invalidación del pool SNMP: {e}")
+    session_pool.clear(reason)
+
+
+def get_cached_olt(olt_id):
+    """OLT memorizada en el proceso (ip_address, comunidad, abreviatura)"""
+    from hosts.models import OLT
+    return session_pool.memoize(('olt', olt_id), lambda: OLT.objects.get(id=olt_id))
+
+
+def get_cached_snmp_params(tipo_operacion: str = 'descubrimiento') -> Tuple[float, int]:
+    """(timeout, retries) memorizados en el proceso para el tipo de operación"""
+    from configuracion_avanzada.services import get_snmp_timeout, get_snmp_retries
+    return session_pool.memoize(
+        ('snmp_params', tipo_operacion),
+        lambda: (get_snmp_timeout(tipo_operacion), get_snmp_retries(tipo_operacion))
+    )
@@ -0,0 +1,196 @@
+"""
+Agente SNMP local (stand-in de una OLT) para pruebas y benchmarks.
+
+Responde GET, GETNEXT y GETBULK v1/v2c sobre UDP a partir de un diccionario
+{oid: valor}. Los valores int se publican como INTEGER, str/bytes como
+OCTET STRING; para otro tipo se pasa una tupla (tag, valor) con los tags de
+snmp_client.ber.
+
+Uso en un event loop:
+    async with LocalSnmpResponder({'1.3.6.1.2.1.1.3.0': (ber.TAG_TIMETICKS, 100)}) as agent:
+        target = agent.target()
+
+Uso desde código sincrónico (p. ej. tareas Celery ejecutadas en línea):
+    agent = LocalSnmpResponder(valores).start_in_thread()
+    ...
+    agent.stop()
+"""
+import asyncio
+import bisect
+import logging
+import random
+import threading
+from typing import Dict, Optional
+
+from . import ber
+from .backends import SnmpTarget
+
+logger = logging.getLogger(__name__)
+
+MAX_RESPONSE_VARBINDS = 1000
+
+
+class _ResponderProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        responder = self.responder
+        responder.requests_received += 1
+        try:
+            request = ber.decode_message(data)
+        except ber.BerDecodeError:
+            return
+        if request['community'] != responder.community or responder.drop_next > 0 or responder.should_drop():
+            # Community incorrecta o pérdida simulada: un agente real no responde
+            responder.drop_next = max(0, responder.drop_next - 1)
+            return
+
+        response = responder.build_response(request)
+        if responder.delay:
+            asyncio.get_running_loop().call_later(responder.delay, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+class LocalSnmpResponder:
+    """Agente SNMP mínimo en 127.0.0.1 con puerto efímero"""
+
+    def __init__(self, values: Dict, community: str = 'public', host: str = '127.0.0.1',
+                 port: int = 0, delay: float = 0.0, loss: float = 0.0, seed: Optional[int] = None):
+        self.community = community
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.loss = loss  # Fracción de requests descartadas al azar (pérdida de paquetes)
+        self.drop_next = 0  # Cantidad de requests a ignorar (simular timeouts)
+        self.requests_received = 0
+        self.requests_dropped = 0
+        self._random = random.Random(seed)
+
+        self._values = {}
+        for oid, value in values.items():
+            if not isinstance(value, tuple):
+                value = (ber.TAG_INTEGER, value) if isinstance(value, int) else (ber.TAG_OCTET_STRING, value)
+            self._values[ber.oid_to_tuple(oid)] = value
+        self._oids = sorted(self._values)
+
+        self._transport = None
+        self._thread = None
+        self._loop = None
+
+    def should_drop(self) -> bool:
+        if self.loss and self._random.random() < self.loss:
+            self.requests_dropped += 1
+            return True
+        return False
+
+    # ------------------------------------------------------------- MIB
+
+    def _lookup(self, oid):
+        tag, value = self._values.get(oid, (ber.TAG_NO_SUCH_INSTANCE, None))
+        return oid, tag, value
+
+    def _next(self, oid):
+        position = bisect.bisect_right(self._oids, oid)
+        if position >= len(self._oids):
+            return oid, ber.TAG_END_OF_MIB_VIEW, None
+        return self._lookup(self._oids[position])
+
+    def build_response(self, request: dict) -> bytes:
+        oids = [oid for oid, _, _ in request['varbinds']]
+        pdu_type = request['pdu_type']
+        error_status = error_index = 0
+
+        if pdu_type == ber.PDU_GET:
+            varbinds = [self._lookup(oid) for oid in oids]
+        elif pdu_type == ber.PDU_GETNEXT:
+            varbinds = [self._next(oid) for oid in oids]
+        elif pdu_type == ber.PDU_GETBULK:
+            non_repeaters = request['error_status']
+            max_repetitions = max(1, request['error_index'])
+            varbinds = [self._next(oid) for oid in oids[:non_repeaters]]
+            repeaters = oids[non_repeaters:]
+            for _ in range(max_repetitions):
+                rows = [self._next(oid) for oid in repeaters]
+                varbinds.extend(rows)
+                repeaters = [oid for oid, _, _ in rows]
+                if all(tag == ber.TAG_END_OF_MIB_VIEW for _, tag, _ in rows) or len(varbinds) >= MAX_RESPONSE_VARBINDS:
+                    break
+        else:
+            varbinds = [(oid, ber.TAG_NULL, None) for oid in oids]
+            error_status, error_index = 5, 1  # genErr
+
+        if request['version'] == ber.VERSION_V1:
+            # SNMPv1 no tiene excepciones de varbind: se reporta noSuchName
+            for position, (_, tag, _) in enumerate(varbinds, 1):
+                if tag in (ber.TAG_NO_SUCH_OBJECT, ber.TAG_NO_SUCH_INSTANCE, ber.TAG_END_OF_MIB_VIEW):
+                    error_status, error_index = 2, position
+                    varbinds = [(oid, ber.TAG_NULL, None) for oid in oids]
+                    break
+
+        return ber.encode_message(
+            request['version'], self.community, ber.PDU_RESPONSE, request['request_id'],
+            varbinds, error_status=error_status, error_index=error_index
+        )
+
+    # ------------------------------------------------------------ server
+
+    @property
+    def address(self) -> str:
+        """"host:puerto" del agente, en el formato de OLT.ip_address"""
+        return f"{self.host}:{self.port}"
+
+    def target(self, **kwargs) -> SnmpTarget:
+        """SnmpTarget que apunta a este agente"""
+        kwargs.setdefault('community', self.community)
+        return SnmpTarget(host=self.host, port=self.port, **kwargs)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ResponderProtocol(self), local_addr=(self.host, self.port)
+        )
+        self.port = self._transport.get_extra_info('sockname')[1]
+        logger.debug(f"🧪 Agente SNMP local escuchando en {self.host}:{self.port} ({len(self._oids)} OIDs)")
+        return self
+
+    async def close(self):
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def start_in_thread(self) -> 'LocalSnmpResponder':
+        """Arranca el agente en un hilo con su propio event loop (para código sincrónico)"""
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name='snmp-responder', daemon=True)
+        self._thread.start()
+        ready.wait(timeout=5)
+        return self
+
+    def stop(self, timeout: Optional[float] = 5):
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=timeout)
+            self._thread = None
@@ -0,0 +1,245 @@
+"""
+Semáforo contador distribuido en Redis para limitar consultas SNMP por OLT.
+
+Reemplaza al contador cache.get/cache.set (no atómico) y a los
+threading.Semaphore por proceso, que no limitaban a toda la flota de workers.
+
+Estructura por semáforo (prefijo = nombre):
+- {nombre}:holders  ZSET token → vencimiento del lease (ms). Un lease vencido
+  (worker muerto) se purga solo en la siguiente operación.
+- {nombre}:permits  HASH token → permisos que tiene tomados (un poller async
+  puede tomar varios).
+- {nombre}:queue    ZSET token → ticket. Cola FIFO: solo el primero de la cola
+  puede entrar, así nadie se cuela ni queda postergado indefinidamente.
+- {nombre}:waiters  ZSET token → vencimiento del waiter (si el proceso que
+  espera muere, sale de la cola solo).
+- {nombre}:wake:{token} LIST donde se despierta al waiter (BLPOP), sin polling.
+
+Todas las transiciones son scripts Lua, atómicos en Redis.
+"""
+import logging
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 330     # > time_limit de get_poller_task (300 s)
+RECHECK_SECONDS = 5             # Re-chequeo por leases vencidos (no generan aviso)
+WAITER_TTL_SECONDS = 3 * RECHECK_SECONDS
+
+_redis_client = None
+
+
+class SemaphoreTimeout(Exception):
+    """No se obtuvo el semáforo dentro del tiempo de espera"""
+
+
+def get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        from redis import Redis
+        _redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+    return _redis_client
+
+
+# Purga de holders con lease vencido y waiters abandonados (común a todos los scripts)
+_PURGE = """
+local now = tonumber(ARGV[3])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)
+for _, token in ipairs(expired) do redis.call('HDEL', KEYS[2], token) end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local gone = redis.call('ZRANGEBYSCORE', KEYS[4], '-inf', now)
+for _, token in ipairs(gone) do redis.call('ZREM', KEYS[3], token) end
+redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', now)
+
+local function used_permits()
+    local used = 0
+    for _, n in ipairs(redis.call('HVALS', KEYS[2])) do used = used + tonumber(n) end
+    return used
+end
+
+-- Despierta al primero de la cola si hay lugar para él
+local function wake_head(limit)
+    local head = redis.call('ZRANGE', KEYS[3], 0, 0)[1]
+    if head and used_permits() < limit then
+        local wake_key = KEYS[5] .. ':wake:' .. head
+        redis.call('RPUSH', wake_key, '1')
+        redis.call('PEXPIRE', wake_key, tonumber(ARGV[6]))
+    end
+end
+"""
+
+# KEYS: holders, permits, queue, waiters, prefijo
+# ARGV: token, limit, now_ms, lease_ms, permits, waiter_ttl_ms
+_ACQUIRE = _PURGE + """
+local token = ARGV[1]
+local limit = tonumber(ARGV[2])
+local want = math.min(tonumber(ARGV[5]), limit)
+redis.call('SET', KEYS[5] .. ':limit', limit)
+
+if redis.call('ZSCORE', KEYS[1], token) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), token)
+    return 1
+end
+
+local head = redis.call('ZRANGE', KEYS[3], 0, 0)[1]
+if used_permits() + want <= limit and (not head or head == token) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), token)
+    redis.call('HSET', KEYS[2], token, want)
+    redis.call('ZREM', KEYS[3], token)
+    redis.call('ZREM', KEYS[4], token)
+    -- Si sobra lugar, pasar el turno al siguiente de la cola
+    wake_head(limit)
+    return 1
+end
+
+if not redis.call('ZSCORE', KEYS[3], token) then
+    redis.call('ZADD', KEYS[3], redis.call('INCR', KEYS[5] .. ':ticket'), token)
+end
+redis.call('ZADD', KEYS[4], now + tonumber(ARGV[6]), token)
+return 0
+"""
+
+# Libera el permiso (o abandona la cola) y despierta al siguiente
+_RELEASE = _PURGE + """
+local token = ARGV[1]
+redis.call('ZREM', KEYS[1], token)
+redis.call('HDEL', KEYS[2], token)
+redis.call('ZREM', KEYS[3], token)
+redis.call('ZREM', KEYS[4], token)
+redis.call('DEL', KEYS[5] .. ':wake:' .. token)
+local limit = tonumber(redis.call('GET', KEYS[5] .. ':limit') or ARGV[2])
+wake_head(limit)
+return 1
+"""
+
+# Renueva el lease si el token sigue siendo holder
+_RENEW = _PURGE + """
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ARGV[1])
+    return 1
+end
+return 0
+"""
+
+
+class RedisSemaphore:
+    """
+    Semáforo contador distribuido con leases y espera FIFO.
+
+        with RedisSemaphore(f"snmp:sem:olt:{olt_id}", limit=5) as acquired:
+            if acquired:
+                ...
+
+    Cada instancia representa a un único poseedor (token propio).
+    """
+
+    _scripts = {}
+
+    def __init__(self, name: str, limit: int, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 permits: int = 1, timeout: Optional[float] = None, redis_client=None):
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.permits = max(1, min(int(permits), self.limit))
+        self.lease_ms = int(lease_seconds * 1000)
+        self.timeout = timeout
+        self.redis = redis_client or get_redis_client()
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+
+    # ------------------------------------------------------------- scripts
+
+    def _script(self, name, source):
+        key = (id(self.redis), name)
+        if key not in self._scripts:
+            self._scripts[key] = self.redis.register_script(source)
+        return self._scripts[key]
+
+    def _call(self, name, source):
+        keys = [f"{self.name}:holders", f"{self.name}:permits", f"{self.name}:queue",
+                f"{self.name}:waiters", self.name]
+        args = [self.token, self.limit, int(time.time() * 1000), self.lease_ms, self.permits,
+                WAITER_TTL_SECONDS * 1000]
+        return self._script(name, source)(keys=keys, args=args)
+
+    # ------------------------------------------------------------------ API
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Toma el/los permisos esperando en la cola FIFO hasta timeout segundos
+        (None = usa el timeout del constructor; 0 = no esperar).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + (timeout or 0)
+        wake_key = f"{self.name}:wake:{self.token}"
+
+        while True:
+            if self._call('acquire', _ACQUIRE):
+                self.acquired = True
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Salir de la cola (y ceder el turno si ya nos habían despertado)
+                self._call('release', _RELEASE)
+                return False
+
+            # Bloquea hasta que alguien libere (o hasta el re-chequeo por leases vencidos)
+            self.redis.blpop([wake_key], timeout=max(1, math.ceil(min(remaining, RECHECK_SECONDS))))
+
+    def release(self):
+        """Libera los permisos y despierta al siguiente de la cola"""
+        try:
+            self._call('release', _RELEASE)
+        finally:
+            self.acquired = False
+
+    def renew(self) -> bool:
+        """Extiende el lease; False si ya venció y otro pudo tomar el lugar"""
+        return bool(self._call('renew', _RENEW))
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        if self.acquired:
+            self.release()
+
+    # -------------------------------------------------------------- estado
+
+    def holders(self) -> int:
+        """Permisos actualmente tomados (incluye leases no purgados aún)"""
+        return sum(int(n) for n in self.redis.hvals(f"{self.name}:permits"))
+
+    def waiting(self) -> int:
+        return self.redis.zcard(f"{self.name}:queue")
+
+
+def olt_semaphore(olt_id, limit: int, **kwargs) -> RedisSemaphore:
+    """
+    Semáforo de consultas SNMP de una OLT, compartido por discovery y GET.
+    El límite es max_consultas_snmp_simultaneas del tipo de operación que adquiere.
+    """
+    return RedisSemaphore(f"snmp:sem:olt:{olt_id}", limit, **kwargs)
+
+
+@contextmanager
+def olt_snmp_slot(olt_id, limit: int, timeout: float = 60, **kwargs):
+    """
+    Context manager que toma un lugar del semáforo de la OLT o lanza SemaphoreTimeout.
+
+        with olt_snmp_slot(olt.id, get_snmp_max_concurrent_queries('descubrimiento')):
+            rows = session.walk(oid)
+    """
+    semaphore = olt_semaphore(olt_id, limit, **kwargs)
+    if not semaphore.acquire(timeout=timeout):
+        raise SemaphoreTimeout(f"Timeout esperando semáforo SNMP de la OLT {olt_id} ({timeout}s)")
+    try:
+        yield semaphore
+    finally:
+        semaphore.release()
@@ -0,0 +1,188 @@
+"""
+Puntos de entrada sincrónicos del motor SNMP asíncrono para las tareas Celery
+"""
+import asyncio
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from . import ber
+from .backends import SnmpTarget, SnmpVarbind, create_backend, is_getbulk_agent_error, split_host_port, walk_page
+from .engine import DEFAULT_PER_OLT_LIMIT, run_sync
+
+
+def olt_target(olt, community: Optional[str] = None, version: int = 2,
+               timeout: Optional[float] = None, retries: Optional[int] = None) -> SnmpTarget:
+    """
+    SnmpTarget de una OLT; timeout/retries por defecto desde configuración avanzada (memorizados).
+    ip_address puede incluir el puerto ("10.0.0.1:1161").
+    """
+    from .pool import get_cached_snmp_params
+
+    if timeout is None or retries is None:
+        default_timeout, default_retries = get_cached_snmp_params()
+        timeout = default_timeout if timeout is None else timeout
+        retries = default_retries if retries is None else retries
+
+    host, port = split_host_port(olt.ip_address)
+    return SnmpTarget(
+        host=host,
+        port=port,
+        community=community or olt.comunidad,
+        version=version,
+        timeout=timeout,
+        retries=retries,
+    )
+
+
+def walk_sync(target: SnmpTarget, oid: str, max_repetitions: Optional[int] = None) -> List[SnmpVarbind]:
+    """Walk de un subárbol; con max_repetitions usa GETBULK (v2c)"""
+    return run_sync(lambda engine: engine.walk(target, oid, max_repetitions=max_repetitions))
+
+
+def iter_walk_sync(target: SnmpTarget, oid: str, max_repetitions: Optional[int] = None,
+                   backend_name: Optional[str] = None,
+                   on_fallback: Optional[Callable[[Exception], None]] = None) -> Iterator[List[SnmpVarbind]]:
+    """
+    Walk en streaming desde código sincrónico: entrega una página de varbinds
+    por PDU. El event loop propio avanza solo cuando el consumidor pide la
+    siguiente página, así que nunca hay más de una página en memoria.
+
+    on_fallback: ver SnmpBackend.iter_walk (GETBULK → GETNEXT a mitad del walk).
+    """
+    backend = create_backend(backend_name)
+    loop = asyncio.new_event_loop()
+    pages = backend.iter_walk(target, oid, max_repetitions=max_repetitions, on_fallback=on_fallback)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(pages.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(pages.aclose())
+        loop.run_until_complete(backend.close())
+        loop.close()
+
+
+_DONE = object()
+
+
+def iter_walk_ranges_sync(target: SnmpTarget, oid: str, ranges: Sequence[tuple], concurrency: int,
+                          max_repetitions: Optional[int] = None, backend_name: Optional[str] = None,
+                          on_fallback: Optional[Callable[[Exception], None]] = None) -> Iterator[List[SnmpVarbind]]:
+    """
+    Walk de un subárbol partido en rangos (start_oid, end_oid) recorridos en
+    paralelo, a lo sumo concurrency a la vez, sobre un event loop propio.
+
+    Entrega las páginas a medida que llegan (sin orden entre rangos) con una
+    cola acotada, así que el consumidor sigue marcando el ritmo. Si un rango
+    falla se cancelan los demás y el error se relanza al consumidor.
+    """
+    backend = create_backend(backend_name)
+    loop = asyncio.new_event_loop()
+    pending = list(ranges)
+    workers = max(1, min(int(concurrency), len(pending)))
+    queue = asyncio.Queue(maxsize=2 * workers)
+
+    async def walk_ranges():
+        while pending:
+            start_oid, end_oid = pending.pop(0)
+            async for page in backend.iter_walk(target, oid, max_repetitions=max_repetitions,
+                                                on_fallback=on_fallback, start_oid=start_oid, end_oid=end_oid):
+                await queue.put(page)
+
+    async def run():
+        tasks = [asyncio.ensure_future(walk_ranges()) for _ in range(workers)]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+            outcome = _DONE
+        except Exception as e:
+            outcome = e
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        # Fin del walk o el error del primer rango que falló, detrás de las páginas ya encoladas
+        await queue.put(outcome)
+
+    runner = loop.create_task(run())
+    try:
+        while True:
+            page = loop.run_until_complete(queue.get())
+            if page is _DONE:
+                break
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        if not runner.done():
+            runner.cancel()
+            loop.run_until_complete(asyncio.gather(runner, return_exceptions=True))
+        loop.run_until_complete(backend.close())
+        loop.close()
+
+
+def full_oid(item) -> str:
+    """OID numérico completo de una fila easysnmp (oid + oid_index, 'iso' → 1)"""
+    oid = str(item.oid)
+    if getattr(item, 'oid_index', None):
+        oid = f"{oid}.{item.oid_index}"
+    return ber.oid_to_str(ber.oid_to_tuple(oid))
+
+
+def _session_page(session, current: tuple, max_repetitions: Optional[int]) -> List[SnmpVarbind]:
+    if max_repetitions:
+        batch = session.get_bulk([ber.oid_to_str(current)], max_repetitions=max_repetitions)
+    else:
+        batch = session.get_next([ber.oid_to_str(current)])
+    if not isinstance(batch, list):
+        batch = [batch]
+    return [
+        SnmpVarbind(full_oid(item), '', str(item.value), str(item.snmp_type))
+        for item in batch
+    ]
+
+
+def iter_session_walk(session, oid: str, max_repetitions: Optional[int] = None,
+                      on_fallback: Optional[Callable[[Exception], None]] = None) -> Iterator[List[SnmpVarbind]]:
+    """
+    Walk en streaming sobre una easysnmp.Session (p. ej. prestada por el pool):
+    GETBULK con max_repetitions en v2c, GETNEXT si no. Mismo criterio de corte
+    y de fallback a GETNEXT (on_fallback) que SnmpBackend.iter_walk.
+    """
+    base = ber.oid_to_tuple(oid)
+    use_bulk = bool(max_repetitions) and getattr(session, 'version', 2) != 1
+    current = base
+
+    while True:
+        if use_bulk:
+            try:
+                rows, next_oid, done = walk_page(base, current, _session_page(session, current, max_repetitions))
+            except Exception as e:
+                # easysnmp no tiene una jerarquía de errores común (EasySNMPError, SystemError, ...):
+                # solo los rechazos del agente pasan a GETNEXT, los timeouts se propagan
+                if on_fallback is None or not is_getbulk_agent_error(e):
+                    raise
+                use_bulk = False
+                on_fallback(e)
+                continue
+            current = next_oid
+        else:
+            rows, current, done = walk_page(base, current, _session_page(session, current, None))
+        if rows:
+            yield rows
+        if done:
+            return
+
+
+def get_batches_sync(target: SnmpTarget, oid_batches: Sequence[Sequence[str]],
+                     per_olt_limit: int = DEFAULT_PER_OLT_LIMIT):
+    """
+    Un PDU GET por lote, todos en vuelo a la vez con a lo sumo per_olt_limit
+    simultáneos contra la OLT.
+
+    Returns:
+        list: Por lote, la lista de varbinds o la excepción de ese PDU
+    """
+    return run_sync(lambda engine: engine.get_many(target, oid_batches), per_olt_limit=per_olt_limit)
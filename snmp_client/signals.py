@@ -0,0 +1,32 @@
+"""
+Signals para invalidar el pool de sesiones SNMP de los workers
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from configuracion_avanzada.models import ConfiguracionSistema, ConfiguracionSNMP
+from hosts.models import OLT
+from .pool import invalidate_session_pool
+
+
+@receiver(post_save, sender=OLT)
+@receiver(post_delete, sender=OLT)
+@receiver(post_save, sender=ConfiguracionSNMP)
+@receiver(post_delete, sender=ConfiguracionSNMP)
+def session_pool_invalidation_handler(sender, instance, **kwargs):
+    """
+    Cambió la IP/comunidad de una OLT o la configuración SNMP: las sesiones y
+    parámetros memorizados por los workers dejan de ser válidos.
+    """
+    reason = f"{sender.__name__} {instance.pk}"
+    transaction.on_commit(lambda: invalidate_session_pool(reason))
+
+
+@receiver(post_save, sender=ConfiguracionSistema)
+@receiver(post_delete, sender=ConfiguracionSistema)
+def snmp_global_config_handler(sender, instance, **kwargs):
+    """snmp_timeout_global / snmp_retries_global también alimentan los parámetros memorizados"""
+    if instance.nombre.startswith('snmp_'):
+        reason = f"ConfiguracionSistema {instance.nombre}"
+        transaction.on_commit(lambda: invalidate_session_pool(reason))
@@ -0,0 +1,135 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from . import ber
+from .backends import AsyncioUdpBackend, SnmpTimeoutError
+from .engine import AsyncSnmpEngine
+from .responder import LocalSnmpResponder
+
+STATE_OID = '1.3.6.1.4.1.2011.6.128.1.1.2.46.1.15'
+SYS_UPTIME_OID = '1.3.6.1.2.1.1.3.0'
+
+
+def onu_table(slots=3, onus_per_slot=8):
+    """Columna de estados de ONUs como la de una OLT Huawei: {oid: estado}"""
+    values = {SYS_UPTIME_OID: (ber.TAG_TIMETICKS, 4242)}
+    for slot in range(slots):
+        snmp_index = 4194304000 + slot * 8192
+        for onu_number in range(onus_per_slot):
+            values[f"{STATE_OID}.{snmp_index}.{onu_number}"] = 1 + onu_number % 2
+    return values
+
+
+def dotted(oid):
+    """OID en el formato que devuelven los backends (como easysnmp)"""
+    return ber.oid_to_str(ber.oid_to_tuple(oid))
+
+
+def run(coro_factory, values, **responder_kwargs):
+    """Levanta el agente local, ejecuta coro_factory(agent, engine) y cierra todo"""
+    async def runner():
+        async with LocalSnmpResponder(values, **responder_kwargs) as agent:
+            engine = AsyncSnmpEngine(AsyncioUdpBackend(), per_olt_limit=2)
+            try:
+                return await coro_factory(agent, engine)
+            finally:
+                await engine.close()
+
+    return asyncio.run(runner())
+
+
+class LocalResponderRoundTripTest(SimpleTestCase):
+    """Ida y vuelta AsyncSnmpEngine / iter_walk ↔ LocalSnmpResponder sobre UDP local"""
+
+    def setUp(self):
+        self.values = onu_table()
+        self.rows = [
+            dotted(oid) for oid in sorted(self.values, key=ber.oid_to_tuple) if oid.startswith(STATE_OID + '.')
+        ]
+
+    def test_get(self):
+        first, last = self.rows[0], self.rows[-1]
+
+        async def scenario(agent, engine):
+            target = agent.target(timeout=1, retries=0)
+            return await engine.get(target, [SYS_UPTIME_OID, first, last, f"{STATE_OID}.1.1"])
+
+        uptime, first_row, last_row, missing = run(scenario, self.values)
+
+        self.assertEqual(
+            (uptime.oid, uptime.value, uptime.snmp_type),
+            (dotted(SYS_UPTIME_OID), '4242', ber.TYPE_NAMES[ber.TAG_TIMETICKS])
+        )
+        self.assertEqual((first_row.oid, first_row.value), (first, str(self.values[first.lstrip('.')])))
+        self.assertEqual((last_row.oid, last_row.value), (last, str(self.values[last.lstrip('.')])))
+        self.assertEqual(missing.snmp_type, 'NOSUCHINSTANCE')
+
+    def test_getbulk_walk_matches_getnext_walk(self):
+        async def scenario(agent, engine):
+            target = agent.target(timeout=1, retries=0)
+            bulk = await engine.walk(target, STATE_OID, max_repetitions=5)
+            getnext = await engine.walk(target, STATE_OID)
+            return bulk, getnext, agent.requests_received
+
+        bulk, getnext, requests = run(scenario, self.values)
+
+        self.assertEqual([row.oid for row in bulk], self.rows)
+        self.assertEqual(bulk, getnext)
+        # GETNEXT: una request por fila (+ la que sale del subárbol); GETBULK: una cada 5
+        self.assertEqual(requests, len(self.rows) + 1 + (len(self.rows) // 5 + 1))
+
+    def test_getbulk_walk_with_range(self):
+        # Solo el slot del medio: [primer índice del slot 1, primer índice del slot 2)
+        start_oid = f"{STATE_OID}.{4194304000 + 8192}"
+        end_oid = f"{STATE_OID}.{4194304000 + 2 * 8192}"
+        expected = [oid for oid in self.rows if oid.startswith(dotted(start_oid) + '.')]
+
+        async def scenario(agent, engine):
+            pages = []
+            async for page in engine.backend.iter_walk(
+                agent.target(timeout=1, retries=0), STATE_OID, max_repetitions=3,
+                start_oid=start_oid, end_oid=end_oid
+            ):
+                pages.append([row.oid for row in page])
+            return pages
+
+        pages = run(scenario, self.values)
+
+        self.assertEqual([oid for page in pages for oid in page], expected)
+        self.assertGreater(len(pages), 1)
+        self.assertTrue(all(len(page) <= 3 for page in pages))
+
+    def test_lost_request_is_retried(self):
+        async def scenario(agent, engine):
+            agent.drop_next = 1
+            rows = await engine.get(agent.target(timeout=0.2, retries=1), [SYS_UPTIME_OID])
+            return rows, agent.requests_received
+
+        rows, requests = run(scenario, self.values)
+
+        self.assertEqual(rows[0].value, '4242')
+        self.assertEqual(requests, 2)
+
+    def test_timeout_when_agent_stops_answering(self):
+        async def scenario(agent, engine):
+            agent.drop_next = 10
+            await engine.get(agent.target(timeout=0.1, retries=1), [SYS_UPTIME_OID])
+
+        with self.assertRaises(SnmpTimeoutError):
+            run(scenario, self.values)
+
+    def test_walk_timeout_does_not_fall_back_to_getnext(self):
+        fallbacks = []
+
+        async def scenario(agent, engine):
+            agent.loss = 1.0
+            async for _ in engine.backend.iter_walk(
+                agent.target(timeout=0.1, retries=0), STATE_OID, max_repetitions=5,
+                on_fallback=fallbacks.append
+            ):
+                pass
+
+        with self.assertRaises(SnmpTimeoutError):
+            run(scenario, self.values)
+        self.assertEqual(fallbacks, [])
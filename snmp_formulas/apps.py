@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SnmpFormulasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'snmp_formulas'
+    
+    def ready(self):
+        import snmp_formulas.signals
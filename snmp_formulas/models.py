@@ -194,6 +194,17 @@ class IndexFormula(models.Model):
         else:
             return f"🌐 Genérica Universal ({self.nombre})"
     
+    def compile(self):
+        """
+        Devuelve un decodificador (CompiledFormula) con los parámetros actuales
+        de esta fórmula y las máscaras ya parseadas.
+        
+        Para resolver la fórmula de una OLT usar snmp_formulas.services.get_formula_for_olt,
+        que además cachea el resultado por proceso.
+        """
+        from .services import CompiledFormula
+        return CompiledFormula(self)
+    
     def calculate_components(self, raw_index_key: str) -> dict:
         """
         Calcula slot, port y logical desde el índice crudo usando esta fórmula.
@@ -204,177 +215,25 @@ class IndexFormula(models.Model):
         Returns:
             dict: {'slot': int, 'port': int, 'logical': int, 'onu_number': int, 'snmp_index': int}
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        # 1. Parsear el índice
-        snmp_index, onu_number = self._parse_index(raw_index_key)
-        
-        if snmp_index is None:
-            return {
-                'slot': None, 
-                'port': None, 
-                'logical': None, 
-                'onu_number': None, 
-                'snmp_index': None
-            }
-        
-        # 2. Calcular según el modo
-        if self.calculation_mode == 'linear':
-            slot, port, onu_id = self._calculate_linear(snmp_index)
-        elif self.calculation_mode == 'bitshift':
-            slot, port, onu_id = self._calculate_bitshift(snmp_index)
-        else:
-            logger.error(f"❌ Modo de cálculo desconocido: {self.calculation_mode}")
-            return {
-                'slot': None, 
-                'port': None, 
-                'logical': None, 
-                'onu_number': None, 
-                'snmp_index': snmp_index
-            }
-        
-        # 3. Aplicar offset de ONU si existe
-        if onu_id is not None and self.onu_offset:
-            onu_id += self.onu_offset
-        
-        # 4. Validar rangos
-        if not self._validate_ranges(slot, port, onu_id):
-            logger.warning(f"⚠️ Valores fuera de rango: slot={slot}, port={port}, onu_id={onu_id}")
-        
-        return {
-            'slot': slot,
-            'port': port,
-            'logical': onu_number if self.dot_is_onu_number else onu_id,
-            'onu_id': onu_id,
-            'onu_number': onu_number,
-            'snmp_index': snmp_index
-        }
-    
-    def _parse_index(self, raw_index_key: str) -> tuple:
-        """Parsea el índice crudo"""
-        try:
-            if self.has_dot_notation and '.' in raw_index_key:
-                snmp_index_str, onu_number_str = raw_index_key.split('.', 1)
-                snmp_index = int(snmp_index_str)
-                onu_number = int(onu_number_str)
-            else:
-                snmp_index = int(raw_index_key.split('.')[0])  # Por si acaso tiene punto
-                onu_number = 0
-            
-            return snmp_index, onu_number
-            
-        except (ValueError, IndexError) as e:
-            import logging
-            logging.getLogger(__name__).error(f"❌ Error parseando índice '{raw_index_key}': {e}")
-            return None, None
-    
-    def _calculate_linear(self, snmp_index: int) -> tuple:
-        """Calcula usando modo lineal (BASE + STEPS)"""
-        # Restar la base
-        delta = snmp_index - self.base_index
-        
-        # Calcular slot
-        slot = delta // self.step_slot if self.step_slot > 0 else 0
-        
-        # Resto después de sacar slot
-        resto = delta % self.step_slot if self.step_slot > 0 else delta
-        
-        # Calcular puerto
-        port = resto // self.step_port if self.step_port > 0 else 0
-        
-        # Calcular ONU ID
-        onu_id = resto % self.step_port if self.step_port > 0 else 0
-        
-        return slot, port, onu_id
-    
-    def _calculate_bitshift(self, snmp_index: int) -> tuple:
-        """Calcula usando modo bitshift"""
-        # Extraer slot
-        slot = (snmp_index >> self.shift_slot_bits)
-        if self.mask_slot:
-            slot &= int(self.mask_slot, 16)
-        
-        # Extraer puerto
-        port = (snmp_index >> self.shift_port_bits)
-        if self.mask_port:
-            port &= int(self.mask_port, 16)
-        
-        # ONU ID es lo que queda
-        onu_id = snmp_index & 0xFF  # Asumimos 8 bits por defecto
-        
-        return slot, port, onu_id
+        return self.compile().calculate_components(raw_index_key)
     
-    def _validate_ranges(self, slot, port, onu_id) -> bool:
-        """Valida que los valores estén en rangos esperados"""
-        if slot is not None and (slot < 0 or slot > self.slot_max):
-            return False
-        if port is not None and (port < 0 or port > self.port_max):
-            return False
-        if onu_id is not None and (onu_id < 0 or onu_id > self.onu_max):
-            return False
-        return True
+    def calculate_components_batch(self, raw_index_keys) -> dict:
+        """Versión vectorizada de calculate_components (ver CompiledFormula)"""
+        return self.compile().calculate_components_batch(raw_index_keys)
     
     def get_normalized_id(self, slot, port, logical) -> str:
         """Genera el ID normalizado usando el formato configurado"""
-        try:
-            return self.normalized_format.format(
-                slot=slot if slot is not None else '?',
-                port=port if port is not None else '?',
-                logical=logical if logical is not None else '?'
-            )
-        except KeyError as e:
-            import logging
-            logging.getLogger(__name__).error(f"❌ Error en formato normalizado: {e}")
-            return f"{slot}/{port}"
+        return self.compile().get_normalized_id(slot, port, logical)
     
     def generate_raw_index_key(self, slot: int, port: int, logical: int) -> str:
         """
         FUNCIÓN INVERSA: Genera el raw_index_key desde slot/port/logical.
         
-        Args:
-            slot: Número de slot
-            port: Número de puerto
-            logical: Número de ONU lógico
-        
         Returns:
             str: raw_index_key en formato SNMP (ej: "4194312448.2" o "268566784")
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        # 1. Calcular ONU ID (considerando offset)
-        onu_id = logical - self.onu_offset if self.onu_offset else logical
-        
-        # 2. Calcular el índice SNMP según el modo
-        if self.calculation_mode == 'linear':
-            snmp_index = self._generate_linear(slot, port, onu_id)
-        elif self.calculation_mode == 'bitshift':
-            snmp_index = self._generate_bitshift(slot, port, onu_id)
-        else:
-            logger.error(f"❌ Modo de cálculo desconocido: {self.calculation_mode}")
-            return None
-        
-        # 3. Formatear según si usa notación con punto
-        if self.has_dot_notation:
-            # Si dot_is_onu_number, el punto contiene el logical
-            onu_number = logical if self.dot_is_onu_number else onu_id
-            return f"{snmp_index}.{onu_number}"
-        else:
-            return str(snmp_index)
-    
-    def _generate_linear(self, slot: int, port: int, onu_id: int) -> int:
-        """Genera índice SNMP usando modo lineal (inverso de _calculate_linear)"""
-        snmp_index = self.base_index
-        snmp_index += slot * self.step_slot
-        snmp_index += port * self.step_port
-        snmp_index += onu_id
-        return snmp_index
+        return self.compile().generate_raw_index_key(slot, port, logical)
     
-    def _generate_bitshift(self, slot: int, port: int, onu_id: int) -> int:
-        """Genera índice SNMP usando modo bitshift (inverso de _calculate_bitshift)"""
-        snmp_index = 0
-        snmp_index |= (slot << self.shift_slot_bits)
-        snmp_index |= (port << self.shift_port_bits)
-        snmp_index |= onu_id
-        return snmp_index
\ No newline at end of file
+    def generate_raw_index_keys_batch(self, slots, ports, logicals) -> list:
+        """Versión vectorizada de generate_raw_index_key (ver CompiledFormula)"""
+        return self.compile().generate_raw_index_keys_batch(slots, ports, logicals)
@@ -0,0 +1,518 @@
+"""
+Resolución y caché de fórmulas de índice SNMP.
+
+Cada proceso (worker Celery, servidor web, scripts) mantiene un caché local
+(marca_id, modelo_id) → CompiledFormula, para no repetir la cadena de consultas
+marca + modelo → marca → universal en cada OnuIndexMap.save() ni reparsear las
+máscaras hexadecimales en cada decodificación.
+
+El caché se invalida con las señales post_save/post_delete de IndexFormula,
+OLT y OLTModel (ver snmp_formulas/signals.py). Como las señales solo llegan al
+proceso que hizo el cambio, cada entrada expira además tras FORMULA_CACHE_TTL
+segundos para que los demás procesos terminen viendo la fórmula nueva.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMULA_CACHE_TTL = 300  # segundos
+
+PRIORITY_SPECIFIC = 'especifica'
+PRIORITY_BRAND = 'marca'
+PRIORITY_UNIVERSAL = 'universal'
+
+
+def _parse_mask(mask) -> Optional[int]:
+    """Convierte una máscara hexadecimal ('0xFF') a entero, None si no hay máscara"""
+    if not mask:
+        return None
+    return int(mask, 16)
+
+
+class CompiledFormula:
+    """
+    Decodificador inmutable construido a partir de una IndexFormula.
+    
+    Copia los parámetros de cálculo a atributos planos y parsea las máscaras una
+    sola vez, de modo que decodificar un índice no toca el ORM ni vuelve a
+    convertir strings hexadecimales.
+    """
+    
+    __slots__ = (
+        'formula', 'id', 'nombre', 'marca_id', 'modelo_id', 'priority',
+        'calculation_mode', 'base_index', 'step_slot', 'step_port',
+        'shift_slot_bits', 'shift_port_bits', 'mask_slot', 'mask_port',
+        'onu_offset', 'has_dot_notation', 'dot_is_onu_number',
+        'slot_max', 'port_max', 'onu_max', 'normalized_format',
+    )
+    
+    def __init__(self, formula, priority: Optional[str] = None):
+        self.formula = formula
+        self.id = formula.pk
+        self.nombre = formula.nombre
+        self.marca_id = formula.marca_id
+        self.modelo_id = formula.modelo_id
+        self.priority = priority
+        self.calculation_mode = formula.calculation_mode
+        self.base_index = formula.base_index
+        self.step_slot = formula.step_slot
+        self.step_port = formula.step_port
+        self.shift_slot_bits = formula.shift_slot_bits
+        self.shift_port_bits = formula.shift_port_bits
+        self.mask_slot = _parse_mask(formula.mask_slot)
+        self.mask_port = _parse_mask(formula.mask_port)
+        self.onu_offset = formula.onu_offset
+        self.has_dot_notation = formula.has_dot_notation
+        self.dot_is_onu_number = formula.dot_is_onu_number
+        self.slot_max = formula.slot_max
+        self.port_max = formula.port_max
+        self.onu_max = formula.onu_max
+        self.normalized_format = formula.normalized_format
+    
+    def __str__(self):
+        return str(self.formula)
+    
+    def calculate_components(self, raw_index_key: str) -> dict:
+        """
+        Calcula slot, port y logical desde el índice crudo usando la fórmula compilada.
+        
+        Args:
+            raw_index_key: Índice SNMP crudo (ej: "4194312448.2" o "268566784")
+        
+        Returns:
+            dict: {'slot': int, 'port': int, 'logical': int, 'onu_number': int, 'snmp_index': int}
+        """
+        # 1. Parsear el índice
+        snmp_index, onu_number = self._parse_index(raw_index_key)
+        
+        if snmp_index is None:
+            return {
+                'slot': None, 
+                'port': None, 
+                'logical': None, 
+                'onu_number': None, 
+                'snmp_index': None
+            }
+        
+        # 2. Calcular según el modo
+        if self.calculation_mode == 'linear':
+            slot, port, onu_id = self._calculate_linear(snmp_index)
+        elif self.calculation_mode == 'bitshift':
+            slot, port, onu_id = self._calculate_bitshift(snmp_index)
+        else:
+            logger.error(f"❌ Modo de cálculo desconocido: {self.calculation_mode}")
+            return {
+                'slot': None, 
+                'port': None, 
+                'logical': None, 
+                'onu_number': None, 
+                'snmp_index': snmp_index
+            }
+        
+        # 3. Aplicar offset de ONU si existe
+        if onu_id is not None and self.onu_offset:
+            onu_id += self.onu_offset
+        
+        # 4. Validar rangos
+        if not self._validate_ranges(slot, port, onu_id):
+            logger.warning(f"⚠️ Valores fuera de rango: slot={slot}, port={port}, onu_id={onu_id}")
+        
+        return {
+            'slot': slot,
+            'port': port,
+            'logical': onu_number if self.dot_is_onu_number else onu_id,
+            'onu_id': onu_id,
+            'onu_number': onu_number,
+            'snmp_index': snmp_index
+        }
+    
+    def _parse_index(self, raw_index_key: str) -> tuple:
+        """Parsea el índice crudo"""
+        try:
+            if self.has_dot_notation and '.' in raw_index_key:
+                snmp_index_str, onu_number_str = raw_index_key.split('.', 1)
+                snmp_index = int(snmp_index_str)
+                onu_number = int(onu_number_str)
+            else:
+                snmp_index = int(raw_index_key.split('.')[0])  # Por si acaso tiene punto
+                onu_number = 0
+            
+            return snmp_index, onu_number
+            
+        except (ValueError, IndexError) as e:
+            logger.error(f"❌ Error parseando índice '{raw_index_key}': {e}")
+            return None, None
+    
+    def _calculate_linear(self, snmp_index: int) -> tuple:
+        """Calcula usando modo lineal (BASE + STEPS)"""
+        # Restar la base
+        delta = snmp_index - self.base_index
+        
+        # Calcular slot
+        slot = delta // self.step_slot if self.step_slot > 0 else 0
+        
+        # Resto después de sacar slot
+        resto = delta % self.step_slot if self.step_slot > 0 else delta
+        
+        # Calcular puerto
+        port = resto // self.step_port if self.step_port > 0 else 0
+        
+        # Calcular ONU ID
+        onu_id = resto % self.step_port if self.step_port > 0 else 0
+        
+        return slot, port, onu_id
+    
+    def _calculate_bitshift(self, snmp_index: int) -> tuple:
+        """Calcula usando modo bitshift"""
+        # Extraer slot
+        slot = (snmp_index >> self.shift_slot_bits)
+        if self.mask_slot is not None:
+            slot &= self.mask_slot
+        
+        # Extraer puerto
+        port = (snmp_index >> self.shift_port_bits)
+        if self.mask_port is not None:
+            port &= self.mask_port
+        
+        # ONU ID es lo que queda
+        onu_id = snmp_index & 0xFF  # Asumimos 8 bits por defecto
+        
+        return slot, port, onu_id
+    
+    def _validate_ranges(self, slot, port, onu_id) -> bool:
+        """Valida que los valores estén en rangos esperados"""
+        if slot is not None and (slot < 0 or slot > self.slot_max):
+            return False
+        if port is not None and (port < 0 or port > self.port_max):
+            return False
+        if onu_id is not None and (onu_id < 0 or onu_id > self.onu_max):
+            return False
+        return True
+    
+    def get_normalized_id(self, slot, port, logical) -> str:
+        """Genera el ID normalizado usando el formato configurado"""
+        try:
+            return self.normalized_format.format(
+                slot=slot if slot is not None else '?',
+                port=port if port is not None else '?',
+                logical=logical if logical is not None else '?'
+            )
+        except KeyError as e:
+            logger.error(f"❌ Error en formato normalizado: {e}")
+            return f"{slot}/{port}"
+    
+    def calculate_components_batch(self, raw_index_keys) -> dict:
+        """
+        Versión vectorizada de calculate_components: decodifica una lista completa
+        de índices crudos en una sola pasada con aritmética entera de NumPy.
+        
+        Args:
+            raw_index_keys: Lista o array de índices SNMP crudos (ej: ["4194312448.2", ...])
+        
+        Returns:
+            dict: Arrays alineados con raw_index_keys:
+                {'slot', 'port', 'logical', 'onu_id', 'onu_number', 'snmp_index'} (int64),
+                'valid' (bool, False si el índice no se pudo parsear) y
+                'normalized_id' (lista de str, None si no es válido)
+        """
+        # 1. Parsear todos los índices
+        snmp_index, onu_number, valid = self._parse_index_batch(raw_index_keys)
+        
+        # 2. Calcular según el modo
+        if self.calculation_mode == 'linear':
+            slot, port, onu_id = self._calculate_linear_batch(snmp_index)
+        elif self.calculation_mode == 'bitshift':
+            slot, port, onu_id = self._calculate_bitshift_batch(snmp_index)
+        else:
+            logger.error(f"❌ Modo de cálculo desconocido: {self.calculation_mode}")
+            valid = np.zeros(len(snmp_index), dtype=bool)
+            slot = port = onu_id = np.zeros(len(snmp_index), dtype=np.int64)
+        
+        # 3. Aplicar offset de ONU si existe
+        if self.onu_offset:
+            onu_id = onu_id + self.onu_offset
+        
+        logical = onu_number if self.dot_is_onu_number else onu_id
+        
+        # 4. Validar rangos (un solo aviso para todo el lote)
+        out_of_range = valid & (
+            (slot < 0) | (slot > self.slot_max) |
+            (port < 0) | (port > self.port_max) |
+            (onu_id < 0) | (onu_id > self.onu_max)
+        )
+        if out_of_range.any():
+            logger.warning(f"⚠️ {int(out_of_range.sum())} índices con valores fuera de rango")
+        
+        normalized_id = [
+            self.get_normalized_id(s, p, l) if ok else None
+            for s, p, l, ok in zip(slot.tolist(), port.tolist(), logical.tolist(), valid.tolist())
+        ]
+        
+        return {
+            'slot': slot,
+            'port': port,
+            'logical': logical,
+            'onu_id': onu_id,
+            'onu_number': onu_number,
+            'snmp_index': snmp_index,
+            'valid': valid,
+            'normalized_id': normalized_id
+        }
+    
+    def _parse_index_batch(self, raw_index_keys) -> tuple:
+        """
+        Parsea un lote de índices crudos. Usa operaciones vectorizadas sobre strings
+        y solo recurre a _parse_index elemento por elemento si hay índices malformados.
+        
+        Returns:
+            tuple: (snmp_index int64, onu_number int64, valid bool)
+        """
+        keys = np.asarray(raw_index_keys, dtype=np.str_)
+        count = len(keys)
+        
+        try:
+            partitioned = np.char.partition(keys, '.') if count else np.empty((0, 3), dtype=np.str_)
+            snmp_index = partitioned[:, 0].astype(np.int64)
+            if self.has_dot_notation:
+                has_dot = partitioned[:, 1] == '.'
+                onu_number = np.where(has_dot, partitioned[:, 2], '0').astype(np.int64)
+            else:
+                onu_number = np.zeros(count, dtype=np.int64)
+            return snmp_index, onu_number, np.ones(count, dtype=bool)
+        except (ValueError, OverflowError):
+            # Hay índices malformados: parsear uno por uno y marcar los inválidos
+            snmp_index = np.zeros(count, dtype=np.int64)
+            onu_number = np.zeros(count, dtype=np.int64)
+            valid = np.ones(count, dtype=bool)
+            for i, raw_index_key in enumerate(keys.tolist()):
+                parsed_index, parsed_onu = self._parse_index(raw_index_key)
+                if parsed_index is None:
+                    valid[i] = False
+                else:
+                    snmp_index[i] = parsed_index
+                    onu_number[i] = parsed_onu
+            return snmp_index, onu_number, valid
+    
+    def _calculate_linear_batch(self, snmp_index) -> tuple:
+        """Versión vectorizada de _calculate_linear"""
+        delta = snmp_index - self.base_index
+        
+        if self.step_slot > 0:
+            slot = delta // self.step_slot
+            resto = delta % self.step_slot
+        else:
+            slot = np.zeros_like(delta)
+            resto = delta
+        
+        if self.step_port > 0:
+            port = resto // self.step_port
+            onu_id = resto % self.step_port
+        else:
+            port = np.zeros_like(delta)
+            onu_id = np.zeros_like(delta)
+        
+        return slot, port, onu_id
+    
+    def _calculate_bitshift_batch(self, snmp_index) -> tuple:
+        """Versión vectorizada de _calculate_bitshift"""
+        slot = snmp_index >> self.shift_slot_bits
+        if self.mask_slot is not None:
+            slot &= self.mask_slot
+        
+        port = snmp_index >> self.shift_port_bits
+        if self.mask_port is not None:
+            port &= self.mask_port
+        
+        onu_id = snmp_index & 0xFF  # Asumimos 8 bits por defecto
+        
+        return slot, port, onu_id
+    
+    def generate_raw_index_key(self, slot: int, port: int, logical: int) -> str:
+        """
+        FUNCIÓN INVERSA: Genera el raw_index_key desde slot/port/logical.
+        
+        Args:
+            slot: Número de slot
+            port: Número de puerto
+            logical: Número de ONU lógico
+        
+        Returns:
+            str: raw_index_key en formato SNMP (ej: "4194312448.2" o "268566784")
+        """
+        # 1. Calcular ONU ID (considerando offset)
+        onu_id = logical - self.onu_offset if self.onu_offset else logical
+        
+        # 2. Calcular el índice SNMP según el modo
+        if self.calculation_mode == 'linear':
+            snmp_index = self._generate_linear(slot, port, onu_id)
+        elif self.calculation_mode == 'bitshift':
+            snmp_index = self._generate_bitshift(slot, port, onu_id)
+        else:
+            logger.error(f"❌ Modo de cálculo desconocido: {self.calculation_mode}")
+            return None
+        
+        # 3. Formatear según si usa notación con punto
+        if self.has_dot_notation:
+            # Si dot_is_onu_number, el punto contiene el logical
+            onu_number = logical if self.dot_is_onu_number else onu_id
+            return f"{snmp_index}.{onu_number}"
+        else:
+            return str(snmp_index)
+    
+    def _generate_linear(self, slot: int, port: int, onu_id: int) -> int:
+        """Genera índice SNMP usando modo lineal (inverso de _calculate_linear)"""
+        snmp_index = self.base_index
+        snmp_index += slot * self.step_slot
+        snmp_index += port * self.step_port
+        snmp_index += onu_id
+        return snmp_index
+    
+    def _generate_bitshift(self, slot: int, port: int, onu_id: int) -> int:
+        """Genera índice SNMP usando modo bitshift (inverso de _calculate_bitshift)"""
+        snmp_index = 0
+        snmp_index |= (slot << self.shift_slot_bits)
+        snmp_index |= (port << self.shift_port_bits)
+        snmp_index |= onu_id
+        return snmp_index
+    
+    def generate_raw_index_keys_batch(self, slots, ports, logicals) -> list:
+        """
+        FUNCIÓN INVERSA VECTORIZADA: Genera los raw_index_key de un lote de ONUs.
+        
+        Args:
+            slots, ports, logicals: Listas o arrays alineados de slot/port/logical
+        
+        Returns:
+            list: raw_index_key por ONU (None para todas si el modo es desconocido)
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        ports = np.asarray(ports, dtype=np.int64)
+        logicals = np.asarray(logicals, dtype=np.int64)
+        
+        # 1. Calcular ONU ID (considerando offset)
+        onu_id = logicals - self.onu_offset if self.onu_offset else logicals
+        
+        # 2. Calcular el índice SNMP según el modo
+        if self.calculation_mode == 'linear':
+            snmp_index = self.base_index + slots * self.step_slot + ports * self.step_port + onu_id
+        elif self.calculation_mode == 'bitshift':
+            snmp_index = (slots << self.shift_slot_bits) | (ports << self.shift_port_bits) | onu_id
+        else:
+            logger.error(f"❌ Modo de cálculo desconocido: {self.calculation_mode}")
+            return [None] * len(slots)
+        
+        # 3. Formatear según si usa notación con punto
+        if self.has_dot_notation:
+            onu_numbers = logicals if self.dot_is_onu_number else onu_id
+            return [f"{index}.{onu}" for index, onu in zip(snmp_index.tolist(), onu_numbers.tolist())]
+        return [str(index) for index in snmp_index.tolist()]
+    
+    def slot_boundaries(self) -> list:
+        """
+        Índices SNMP donde empieza cada slot 1..slot_max (slot, puerto 0, ONU 0),
+        en orden creciente. Sirven para partir el walk de la tabla de ONUs en
+        rangos por slot; vacío si la fórmula no separa slots.
+        """
+        if self.calculation_mode == 'linear' and self.step_slot > 0:
+            generate = self._generate_linear
+        elif self.calculation_mode == 'bitshift' and self.shift_slot_bits > 0:
+            generate = self._generate_bitshift
+        else:
+            return []
+        return sorted({generate(slot, 0, 0) for slot in range(1, self.slot_max + 1)})
+
+
+# ============================================================================
+# RESOLVER CON CACHÉ POR (marca_id, modelo_id)
+# ============================================================================
+
+_formula_cache = {}  # (marca_id, modelo_id) -> (CompiledFormula | None, expires_at)
+_formula_cache_lock = threading.Lock()
+
+
+def _lookup_formula(marca_id, modelo_id):
+    """
+    Busca en BD la fórmula aplicable con prioridad:
+    marca + modelo → marca (genérica) → completamente genérica
+    
+    Returns:
+        tuple: (IndexFormula | None, prioridad)
+    """
+    from .models import IndexFormula
+    
+    # Intentar primero con marca + modelo específico
+    if marca_id and modelo_id:
+        formula = IndexFormula.objects.filter(
+            marca_id=marca_id,
+            modelo_id=modelo_id,
+            activo=True
+        ).first()
+        if formula:
+            return formula, PRIORITY_SPECIFIC
+    
+    # Si no hay fórmula específica, buscar fórmula genérica para la marca
+    if marca_id:
+        formula = IndexFormula.objects.filter(
+            marca_id=marca_id,
+            modelo__isnull=True,  # Fórmula genérica (sin modelo específico)
+            activo=True
+        ).first()
+        if formula:
+            return formula, PRIORITY_BRAND
+    
+    # Si no hay fórmula para la marca, buscar fórmula completamente genérica (sin marca)
+    formula = IndexFormula.objects.filter(
+        marca__isnull=True,
+        modelo__isnull=True,
+        activo=True
+    ).first()
+    if formula:
+        return formula, PRIORITY_UNIVERSAL
+    
+    return None, None
+
+
+def resolve_formula(marca_id, modelo_id) -> Optional[CompiledFormula]:
+    """
+    Devuelve la fórmula compilada para una combinación marca/modelo, usando el
+    caché del proceso. También se cachea la ausencia de fórmula (None).
+    """
+    key = (marca_id, modelo_id)
+    now = time.monotonic()
+    
+    entry = _formula_cache.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    
+    formula, priority = _lookup_formula(marca_id, modelo_id)
+    compiled = CompiledFormula(formula, priority) if formula else None
+    
+    with _formula_cache_lock:
+        _formula_cache[key] = (compiled, now + FORMULA_CACHE_TTL)
+    
+    return compiled
+
+
+def get_formula_for_olt(olt) -> Optional[CompiledFormula]:
+    """Devuelve la fórmula compilada aplicable a la OLT (o None si no hay)"""
+    return resolve_formula(olt.marca_id, olt.modelo_id)
+
+
+def invalidate_formula_cache(reason: str = ''):
+    """
+    Vacía el caché de fórmulas del proceso.
+    
+    Se vacía completo (y no solo una clave) porque un cambio en una fórmula
+    genérica de marca o universal afecta a todas las combinaciones que caen en ella.
+    """
+    with _formula_cache_lock:
+        cleared = len(_formula_cache)
+        _formula_cache.clear()
+    
+    if cleared:
+        logger.debug(f"🧹 Caché de fórmulas invalidado ({cleared} entradas){f': {reason}' if reason else ''}")
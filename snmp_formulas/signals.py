@@ -0,0 +1,26 @@
+"""
+Signals para invalidar el caché de fórmulas compiladas
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from hosts.models import OLT
+from olt_models.models import OLTModel
+from .models import IndexFormula
+from .services import invalidate_formula_cache
+
+
+@receiver(post_save, sender=IndexFormula)
+@receiver(post_delete, sender=IndexFormula)
+@receiver(post_save, sender=OLT)
+@receiver(post_delete, sender=OLT)
+@receiver(post_save, sender=OLTModel)
+@receiver(post_delete, sender=OLTModel)
+def formula_cache_invalidation_handler(sender, instance, **kwargs):
+    """
+    Vacía el caché de fórmulas cuando cambia una fórmula, una OLT o un modelo de OLT.
+    Se hace después del commit para que el caché no se vuelva a llenar con datos viejos.
+    """
+    reason = f"{sender.__name__} {instance.pk}"
+    transaction.on_commit(lambda: invalidate_formula_cache(reason))
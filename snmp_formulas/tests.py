@@ -1,3 +1,104 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .models import IndexFormula
+from .services import CompiledFormula
+
+COMPONENTS = ('slot', 'port', 'logical', 'onu_id', 'onu_number', 'snmp_index')
+
+
+def compile_formula(**params):
+    """CompiledFormula sobre una IndexFormula sin guardar (no toca la BD)"""
+    return CompiledFormula(IndexFormula(nombre='test', **params))
+
+
+HUAWEI = dict(
+    calculation_mode='linear', base_index=4194304000, step_slot=8192, step_port=256,
+    has_dot_notation=True, dot_is_onu_number=True, normalized_format='{slot}/{port}'
+)
+BITSHIFT = dict(
+    calculation_mode='bitshift', shift_slot_bits=16, shift_port_bits=8,
+    mask_slot='0xFF', mask_port='0xFF', normalized_format='{slot}/{port}/{logical}'
+)
+
+FORMULAS = {
+    'linear': HUAWEI,
+    'linear_onu_offset': dict(HUAWEI, dot_is_onu_number=False, onu_offset=1),
+    'linear_step_slot_0': dict(HUAWEI, step_slot=0),
+    'linear_step_port_0': dict(HUAWEI, step_port=0),
+    'linear_steps_0': dict(HUAWEI, step_slot=0, step_port=0, has_dot_notation=False),
+    'bitshift': BITSHIFT,
+    'bitshift_onu_offset': dict(BITSHIFT, onu_offset=1),
+    'bitshift_no_masks': dict(BITSHIFT, mask_slot=None, mask_port=None),
+    'bitshift_dot_notation': dict(BITSHIFT, has_dot_notation=True, dot_is_onu_number=False, onu_offset=-1),
+}
+
+RAW_INDEX_KEYS = [
+    # Huawei con punto ("4194312448.2" → 1/1, ONU 2) y sin punto
+    '4194312448.2', '4194304000.0', '4194320896.127', '4194312448', '4194304000',
+    # Bitshift (slot << 16 | port << 8 | onu)
+    '66049', '131842', '65535', '0',
+    # Por debajo de la base (deltas negativos) y sub-ids grandes
+    '1', '4294967295.4294967295',
+    # Malformados
+    '', 'abc', '4194312448.', '4194312448.x', '.2', '4194312448.2.1', 'abc.2',
+]
+
+
+class BatchScalarParityTest(SimpleTestCase):
+    """Las versiones vectorizadas deben dar exactamente lo mismo que las escalares"""
+
+    def test_calculate_components_batch_matches_scalar(self):
+        for name, params in FORMULAS.items():
+            formula = compile_formula(**params)
+            batch = formula.calculate_components_batch(RAW_INDEX_KEYS)
+
+            for i, raw_index_key in enumerate(RAW_INDEX_KEYS):
+                with self.subTest(formula=name, raw_index_key=raw_index_key):
+                    scalar = formula.calculate_components(raw_index_key)
+                    if scalar['snmp_index'] is None:
+                        self.assertFalse(batch['valid'][i])
+                        self.assertIsNone(batch['normalized_id'][i])
+                        continue
+
+                    self.assertTrue(batch['valid'][i])
+                    self.assertEqual({key: int(batch[key][i]) for key in COMPONENTS},
+                                     {key: scalar[key] for key in COMPONENTS})
+                    self.assertEqual(
+                        batch['normalized_id'][i],
+                        formula.get_normalized_id(scalar['slot'], scalar['port'], scalar['logical'])
+                    )
+
+    def test_dotless_keys_with_dot_notation(self):
+        formula = compile_formula(**HUAWEI)
+        batch = formula.calculate_components_batch(['4194312448', '4194312448.2'])
+
+        self.assertEqual(batch['onu_number'].tolist(), [0, 2])
+        self.assertEqual(formula.calculate_components('4194312448')['onu_number'], 0)
+
+    def test_empty_batch(self):
+        batch = compile_formula(**HUAWEI).calculate_components_batch([])
+
+        self.assertEqual(len(batch['snmp_index']), 0)
+        self.assertEqual(batch['normalized_id'], [])
+
+    def test_generate_raw_index_keys_batch_matches_scalar(self):
+        combos = [(slot, port, logical) for slot in (0, 1, 17) for port in (0, 1, 15) for logical in (0, 1, 2, 127)]
+        slots, ports, logicals = zip(*combos)
+
+        for name, params in FORMULAS.items():
+            formula = compile_formula(**params)
+            batch = formula.generate_raw_index_keys_batch(slots, ports, logicals)
+
+            self.assertEqual(len(batch), len(combos))
+            for combo, raw_index_key in zip(combos, batch):
+                with self.subTest(formula=name, combo=combo):
+                    self.assertEqual(raw_index_key, formula.generate_raw_index_key(*combo))
+
+    def test_generated_keys_decode_back(self):
+        formula = compile_formula(**FORMULAS['linear_onu_offset'])
+        raw_index_keys = formula.generate_raw_index_keys_batch([1, 2], [3, 4], [5, 6])
+        batch = formula.calculate_components_batch(raw_index_keys)
+
+        self.assertEqual(batch['slot'].tolist(), [1, 2])
+        self.assertEqual(batch['port'].tolist(), [3, 4])
+        self.assertEqual(batch['logical'].tolist(), [5, 6])
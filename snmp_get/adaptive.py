@@ -0,0 +1,237 @@
+"""
+Control adaptativo (AIMD) de concurrencia y tamaño de lote GET por OLT.
+
+max_consultas_snmp_simultaneas, tamano_lote_inicial y tamano_subdivision
+dejan de ser valores fijos para todas las OLTs y pasan a ser cotas:
+
+- concurrencia (permisos del semáforo de la OLT): [1, max_consultas_snmp_simultaneas]
+- tamaño de lote de los pollers:                   [tamano_subdivision, tamano_lote_inicial]
+
+Cada poller reporta una muestra (PDUs enviados, PDUs con timeout y latencia
+por PDU). Con la OLT sana (sin timeouts y latencia media por debajo del
+objetivo) ambos valores crecen de a un paso cada INCREASE_AFTER muestras
+sanas (aumento aditivo); si la tasa de timeouts supera TIMEOUT_RATE_THRESHOLD
+se reducen a la mitad (disminución multiplicativa), como mucho una vez por
+DECREASE_COOLDOWN segundos para no castigar varias veces por la misma
+congestión (los pollers en vuelo reportan timeouts de la ventana anterior).
+
+El estado vive en un hash de Redis por OLT para que todos los workers lo
+compartan y se muestra en el admin de OLTs.
+"""
+import logging
+import math
+import time
+
+from django.conf import settings
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT_RATE_THRESHOLD = 0.05   # Fracción de PDUs con timeout que dispara la reducción
+LATENCY_TARGET_RATIO = 0.5      # Latencia objetivo por PDU = 50% del timeout SNMP
+INCREASE_AFTER = 3              # Muestras sanas consecutivas por cada aumento aditivo
+DECREASE_FACTOR = 0.5           # Factor de la disminución multiplicativa
+DECREASE_COOLDOWN = 30          # Segundos mínimos entre dos reducciones
+BATCH_STEP_RATIO = 0.1          # Paso aditivo del lote = 10% de la cota superior
+EWMA_ALPHA = 0.3                # Peso de la última muestra en las medias móviles
+STATE_TTL = 7 * 24 * 3600       # Expirar estado de OLTs que ya no se consultan
+
+EVENT_INCREASE = 'increase'
+EVENT_DECREASE = 'decrease'
+EVENT_HOLD = 'hold'
+
+redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def _state_key(olt_id):
+    return f"snmp_get:adaptive:{olt_id}"
+
+
+def get_bounds(snmp_config):
+    """
+    Cotas del controlador a partir del snmp_config de la ejecución GET.
+
+    Returns:
+        dict: min/max de concurrencia y de tamaño de lote
+    """
+    max_concurrency = max(1, int(snmp_config.get('max_consultas_snmp_simultaneas', 5)))
+    max_batch = max(1, int(snmp_config.get('tamano_lote_inicial', 200)))
+    min_batch = max(1, min(int(snmp_config.get('tamano_subdivision', 50)), max_batch))
+    return {
+        'min_concurrency': 1,
+        'max_concurrency': max_concurrency,
+        'min_batch_size': min_batch,
+        'max_batch_size': max_batch,
+    }
+
+
+def get_configured_bounds(tipo_operacion='get'):
+    """Cotas según la ConfiguracionSNMP activa del tipo de operación (para el admin)"""
+    from configuracion_avanzada.models import ConfiguracionSNMP
+
+    config = ConfiguracionSNMP.get_config_for_tipo(tipo_operacion)
+    if not config:
+        return get_bounds({})
+    return get_bounds({
+        'max_consultas_snmp_simultaneas': config.max_consultas_snmp_simultaneas,
+        'tamano_lote_inicial': config.tamano_lote_inicial,
+        'tamano_subdivision': config.tamano_subdivision,
+    })
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def _decode_state(stored, bounds):
+    """Estado tipado y acotado; sin historial arranca en las cotas superiores (comportamiento estático)"""
+    def field(name, cast, default):
+        value = stored.get(name.encode()) if stored else None
+        return default if value is None else cast(value)
+
+    return {
+        'concurrency': _clamp(field('concurrency', int, bounds['max_concurrency']),
+                              bounds['min_concurrency'], bounds['max_concurrency']),
+        'batch_size': _clamp(field('batch_size', int, bounds['max_batch_size']),
+                             bounds['min_batch_size'], bounds['max_batch_size']),
+        'latency_ms': field('latency_ms', float, None),
+        'timeout_rate': field('timeout_rate', float, 0.0),
+        'healthy_streak': field('healthy_streak', int, 0),
+        'samples': field('samples', int, 0),
+        'last_event': field('last_event', bytes.decode, None),
+        'last_decrease_at': field('last_decrease_at', float, 0.0),
+        'updated_at': field('updated_at', float, None),
+    }
+
+
+def get_state(olt_id, bounds):
+    """Estado actual del controlador de la OLT (o el inicial si no hay historial)"""
+    try:
+        stored = redis_client.hgetall(_state_key(olt_id))
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo leer el control adaptativo de la OLT {olt_id}: {e}")
+        stored = None
+    return _decode_state(stored, bounds)
+
+
+def next_state(state, bounds, pdus, timed_out, latency_ms, timeout_seconds, now):
+    """
+    Aplica una muestra al estado (función pura, sin Redis).
+
+    Args:
+        state: Estado actual (get_state)
+        bounds: Cotas (get_bounds)
+        pdus: PDUs enviados por el poller
+        timed_out: PDUs que terminaron en timeout
+        latency_ms: Latencia media por PDU de la muestra
+        timeout_seconds: Timeout SNMP configurado (define la latencia objetivo)
+        now: time.time() de la muestra
+
+    Returns:
+        dict: Nuevo estado (con 'last_event')
+    """
+    state = dict(state)
+    sample_rate = timed_out / pdus
+    previous_latency = state['latency_ms']
+    state['latency_ms'] = latency_ms if previous_latency is None else (
+        EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * previous_latency
+    )
+    state['timeout_rate'] = EWMA_ALPHA * sample_rate + (1 - EWMA_ALPHA) * state['timeout_rate']
+    state['samples'] += 1
+    state['updated_at'] = now
+
+    target_ms = timeout_seconds * 1000 * LATENCY_TARGET_RATIO
+
+    if sample_rate > TIMEOUT_RATE_THRESHOLD:
+        state['healthy_streak'] = 0
+        if now - state['last_decrease_at'] < DECREASE_COOLDOWN:
+            state['last_event'] = EVENT_HOLD
+            return state
+        state['concurrency'] = max(bounds['min_concurrency'], int(state['concurrency'] * DECREASE_FACTOR))
+        state['batch_size'] = max(bounds['min_batch_size'], int(state['batch_size'] * DECREASE_FACTOR))
+        state['last_decrease_at'] = now
+        state['last_event'] = EVENT_DECREASE
+        return state
+
+    if timed_out or state['latency_ms'] > target_ms:
+        # Algún timeout aislado o latencia alta: mantener
+        state['healthy_streak'] = 0
+        state['last_event'] = EVENT_HOLD
+        return state
+
+    state['healthy_streak'] += 1
+    state['last_event'] = EVENT_HOLD
+    if state['healthy_streak'] >= INCREASE_AFTER:
+        batch_step = max(1, math.ceil(bounds['max_batch_size'] * BATCH_STEP_RATIO))
+        state['concurrency'] = min(bounds['max_concurrency'], state['concurrency'] + 1)
+        state['batch_size'] = min(bounds['max_batch_size'], state['batch_size'] + batch_step)
+        state['healthy_streak'] = 0
+        state['last_event'] = EVENT_INCREASE
+    return state
+
+
+def record_sample(olt_id, bounds, pdus, timed_out, latency_ms, timeout_seconds):
+    """
+    Registra la muestra de un poller y actualiza el estado en Redis.
+
+    La lectura-modificación-escritura es optimista (WATCH/MULTI): si otro
+    worker actualizó la OLT entre medio, se reintenta sobre el estado nuevo.
+
+    Returns:
+        dict | None: Nuevo estado, o None si no se pudo registrar
+    """
+    if pdus <= 0:
+        return None
+
+    key = _state_key(olt_id)
+    result = {}
+
+    def update(pipe):
+        state = _decode_state(pipe.hgetall(key), bounds)
+        new = next_state(state, bounds, pdus, timed_out, latency_ms, timeout_seconds, time.time())
+        pipe.multi()
+        pipe.hset(key, mapping={
+            name: (round(value, 3) if isinstance(value, float) else value)
+            for name, value in new.items() if value is not None
+        })
+        pipe.expire(key, STATE_TTL)
+        result['state'] = new
+
+    try:
+        redis_client.transaction(update, key)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo actualizar el control adaptativo de la OLT {olt_id}: {e}")
+        return None
+
+    new = result['state']
+    if new['last_event'] == EVENT_DECREASE:
+        logger.warning(
+            f"📉 OLT {olt_id}: {timed_out}/{pdus} PDUs con timeout → concurrencia {new['concurrency']}, "
+            f"lote {new['batch_size']}"
+        )
+    elif new['last_event'] == EVENT_INCREASE:
+        logger.info(
+            f"📈 OLT {olt_id}: sana ({new['latency_ms']:.0f}ms/PDU) → concurrencia {new['concurrency']}, "
+            f"lote {new['batch_size']}"
+        )
+    return new
+
+
+def reset_state(olt_ids):
+    """Borra el estado de las OLTs (vuelven a las cotas superiores)"""
+    keys = [_state_key(olt_id) for olt_id in olt_ids]
+    if keys:
+        redis_client.delete(*keys)
+
+
+def describe_state(olt_id, bounds):
+    """Resumen legible del estado para el admin"""
+    state = get_state(olt_id, bounds)
+    if not state['samples']:
+        return f"⚪ Sin muestras (c={state['concurrency']}, lote={state['batch_size']})"
+    icon = {EVENT_DECREASE: '📉', EVENT_INCREASE: '📈'}.get(state['last_event'], '➖')
+    return (
+        f"{icon} c={state['concurrency']}/{bounds['max_concurrency']} · "
+        f"lote={state['batch_size']}/{bounds['max_batch_size']} · "
+        f"{state['latency_ms']:.0f}ms/PDU · {state['timeout_rate'] * 100:.1f}% timeouts"
+    )
@@ -0,0 +1,145 @@
+"""
+Planner de ejecuciones GET.
+
+Decide, por OLT y por ejecución, entre:
+- 'walk': un bulkwalk de la columna completa (job.oid.oid) unido por raw_index_key
+- 'get':  GETs dirigidos por índice repartidos en pollers (multi-varbind)
+
+La decisión usa la proporción de ONUs pedidas sobre ONUs conocidas de la OLT y
+los tiempos históricos de cada estrategia, guardados como media móvil (EWMA) en
+un hash de Redis por OLT para que todos los workers los compartan.
+"""
+import logging
+import math
+
+from django.conf import settings
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+PLAN_WALK = 'walk'
+PLAN_GET = 'get'
+
+WALK_MAX_REPETITIONS = 50       # Filas por PDU GETBULK en el walk de columna
+WALK_MIN_COVERAGE = 0.9         # Fracción de ONUs pedidas que el walk debe traer para dar por ausentes a las demás
+
+# Costos por defecto mientras no hay historial para la OLT
+DEFAULT_GET_MS_PER_PDU = 60.0    # ms por PDU GET (round-trip completo)
+DEFAULT_WALK_MS_PER_ROW = DEFAULT_GET_MS_PER_PDU / WALK_MAX_REPETITIONS  # ms por fila del walk
+EWMA_ALPHA = 0.3                 # Peso de la última medición en la media móvil
+TIMINGS_TTL = 7 * 24 * 3600      # Expirar historial de OLTs que ya no se consultan
+
+redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def _timings_key(olt_id):
+    return f"snmp_get:planner:{olt_id}"
+
+
+def get_timings(olt_id):
+    """
+    Obtiene los tiempos históricos de la OLT.
+    
+    Returns:
+        dict: {'walk_ms_per_row': float|None, 'get_ms_per_pdu': float|None}
+    """
+    timings = {'walk_ms_per_row': None, 'get_ms_per_pdu': None}
+    try:
+        stored = redis_client.hgetall(_timings_key(olt_id))
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo leer historial del planner para OLT {olt_id}: {e}")
+        return timings
+    
+    for field in timings:
+        value = stored.get(field.encode())
+        if value is not None:
+            timings[field] = float(value)
+    return timings
+
+
+def _record_timing(olt_id, field, sample):
+    """Actualiza la media móvil de un tiempo en el hash de la OLT"""
+    try:
+        key = _timings_key(olt_id)
+        previous = redis_client.hget(key, field)
+        value = sample if previous is None else (EWMA_ALPHA * sample + (1 - EWMA_ALPHA) * float(previous))
+        pipe = redis_client.pipeline()
+        pipe.hset(key, field, round(value, 3))
+        pipe.expire(key, TIMINGS_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo guardar historial del planner para OLT {olt_id}: {e}")
+
+
+def record_walk_timing(olt_id, rows, duration_ms):
+    """Registra la duración de un walk de columna (por fila recibida)"""
+    if rows > 0:
+        _record_timing(olt_id, 'walk_ms_per_row', duration_ms / rows)
+
+
+def record_get_timing(olt_id, pdus, duration_ms):
+    """Registra la duración de los GETs de un poller (por PDU enviado)"""
+    if pdus > 0:
+        _record_timing(olt_id, 'get_ms_per_pdu', duration_ms / pdus)
+
+
+def plan_get_execution(olt_id, requested_onus, known_onus, varbinds_per_pdu, batch_size, max_pollers, min_walk_ratio):
+    """
+    Elige la estrategia para una ejecución GET y estima su costo.
+    
+    El walk recorre todas las filas de la columna (≈ ONUs conocidas de la OLT) en
+    una sola sesión; los GETs envían ceil(pedidas / varbinds_por_pdu) PDUs
+    repartidos entre los lotes de batch_size ONUs, con hasta max_pollers
+    pollers concurrentes. Solo se considera el
+    walk si la proporción pedidas/conocidas alcanza min_walk_ratio.
+    
+    Args:
+        olt_id: ID de la OLT
+        requested_onus: ONUs a consultar en esta ejecución
+        known_onus: ONUs conocidas de la OLT (filas esperadas en el walk)
+        varbinds_per_pdu: OIDs por PDU en modo GET
+        batch_size: ONUs por poller en modo GET
+        max_pollers: Pollers concurrentes por OLT en modo GET
+        min_walk_ratio: Proporción mínima para considerar el walk
+        
+    Returns:
+        dict: Plan con 'strategy', 'reason', 'ratio', costos estimados e historial usado
+    """
+    timings = get_timings(olt_id)
+    walk_ms_per_row = timings['walk_ms_per_row'] or DEFAULT_WALK_MS_PER_ROW
+    get_ms_per_pdu = timings['get_ms_per_pdu'] or DEFAULT_GET_MS_PER_PDU
+    
+    known_onus = max(known_onus, requested_onus)
+    ratio = requested_onus / known_onus if known_onus else 0.0
+    
+    pdus = math.ceil(requested_onus / max(varbinds_per_pdu, 1))
+    batches = math.ceil(requested_onus / max(batch_size, 1))
+    parallelism = max(1, min(max_pollers, batches))
+    estimated_walk_ms = int(known_onus * walk_ms_per_row)
+    estimated_get_ms = int(pdus * get_ms_per_pdu / parallelism)
+    
+    if ratio < min_walk_ratio:
+        strategy = PLAN_GET
+        reason = f"proporción {ratio:.2f} < {min_walk_ratio}"
+    elif estimated_walk_ms <= estimated_get_ms:
+        strategy = PLAN_WALK
+        reason = f"walk estimado {estimated_walk_ms}ms <= GET estimado {estimated_get_ms}ms"
+    else:
+        strategy = PLAN_GET
+        reason = f"GET estimado {estimated_get_ms}ms < walk estimado {estimated_walk_ms}ms"
+    
+    return {
+        'strategy': strategy,
+        'reason': reason,
+        'requested_onus': requested_onus,
+        'known_onus': known_onus,
+        'ratio': round(ratio, 3),
+        'estimated_cost_ms': {
+            PLAN_WALK: estimated_walk_ms,
+            PLAN_GET: estimated_get_ms,
+        },
+        'history': {
+            'walk_ms_per_row': timings['walk_ms_per_row'],
+            'get_ms_per_pdu': timings['get_ms_per_pdu'],
+        },
+    }
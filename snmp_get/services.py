@@ -0,0 +1,382 @@
+"""
+Servicios para persistir en lote los resultados de los pollers GET
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from discovery.models import OnuInventory, OnuStatus
+from discovery.pg_ingest import copy_rows, temp_staging_table
+
+logger = logging.getLogger(__name__)
+
+NO_SUCH_VALUES = (
+    'no such instance currently exists at this oid',
+    'no such instance',
+    'nosuchinstance',
+    'nosuchobject',
+)
+
+
+def is_no_such_instance(value_str: str) -> bool:
+    """Verifica si el valor SNMP es NOSUCHINSTANCE (ONU no existe o desconectada)"""
+    value_lower = value_str.lower()
+    return value_lower in NO_SUCH_VALUES or 'no such' in value_lower
+
+
+def resolve_target_value(target_field: str, value_str: str, valor_actual, keep_previous: bool,
+                         format_mac: bool) -> Tuple[Optional[str], bool]:
+    """
+    Aplica las reglas de negocio del campo destino al valor recibido por SNMP.
+
+    Args:
+        target_field: Campo de onu_inventory a actualizar
+        value_str: Valor SNMP ya limpiado
+        valor_actual: Valor actual del campo en BD
+        keep_previous: Mantener el valor previo si no llega valor nuevo
+        format_mac: Formatear MAC (AC:DC:SD → ACDCSD)
+
+    Returns:
+        tuple: (valor a guardar, True si el campo debe actualizarse)
+    """
+    valor_a_guardar = value_str
+
+    # 1. FORMATEAR MAC si está habilitado (AC:DC:SD → ACDCSD)
+    if format_mac and valor_a_guardar:
+        valor_a_guardar = valor_a_guardar.replace(':', '').replace(' ', '').upper()
+        logger.debug(f"   🔧 MAC formateada: {value_str} → {valor_a_guardar}")
+
+    # 2. LÓGICA SEGÚN EL CAMPO
+    if target_field == 'distancia_onu':
+        # Lógica especial para distancia (conversión m→km + mantener previo)
+        if valor_a_guardar == "-1":
+            # Valor -1: No hay distancia medida
+            if not valor_actual:
+                logger.debug(f"   📏 Distancia: Sin medición (primera vez)")
+                return "No Distancia", True
+            # MANTENER valor previo
+            logger.debug(f"   📏 Distancia: Valor -1, manteniendo '{valor_actual}'")
+            return valor_actual, False
+
+        if valor_a_guardar:
+            # Convertir metros → kilómetros
+            try:
+                if '.' in valor_a_guardar:
+                    # Ya está en km
+                    nuevo_valor = f"{valor_a_guardar} km"
+                else:
+                    # Convertir metros a km
+                    metros = float(valor_a_guardar)
+                    km = metros / 1000
+                    nuevo_valor = f"{km:.3f} km"
+            except ValueError:
+                logger.error(f"   ❌ Error convirtiendo distancia: {valor_a_guardar}")
+                return valor_actual, False
+
+            # SOLO actualizar si no hay valor o es "No Distancia"
+            if not valor_actual or valor_actual == "No Distancia":
+                logger.debug(f"   📏 Distancia actualizada: {nuevo_valor}")
+                return nuevo_valor, True
+            # MANTENER valor previo (distancia no cambia)
+            logger.debug(f"   📏 Distancia: Manteniendo '{valor_actual}'")
+
+        return valor_actual, False
+
+    if target_field in ['plan_onu', 'modelo_onu']:
+        # Lógica para plan_onu y modelo_onu (mantener valor previo)
+        if valor_a_guardar:
+            # HAY VALOR NUEVO → SIEMPRE SOBREESCRIBIR ✅
+            logger.debug(f"   ✅ {target_field} actualizado: {valor_a_guardar}")
+            return valor_a_guardar, True
+        if valor_actual:
+            # NO HAY VALOR NUEVO PERO HAY VALOR PREVIO → MANTENER ✅
+            logger.debug(f"   🔄 {target_field}: Manteniendo '{valor_actual}'")
+            return valor_actual, False
+        # NO HAY VALOR NUEVO NI PREVIO → Poner "No Plan" o "No Modelo"
+        default_value = "No Plan" if target_field == 'plan_onu' else "No Modelo"
+        logger.debug(f"   ⚠️ {target_field}: Sin valor, guardando '{default_value}'")
+        return default_value, True
+
+    # Lógica para otros campos (snmp_description, mac_address, etc.)
+    if valor_a_guardar:
+        # HAY VALOR NUEVO → SIEMPRE SOBREESCRIBIR ✅
+        logger.debug(f"   ✅ {target_field} actualizado: {valor_a_guardar[:50]}...")
+        return valor_a_guardar, True
+    if keep_previous and valor_actual:
+        # NO HAY VALOR NUEVO PERO keep_previous=True → MANTENER ✅
+        logger.debug(f"   🔄 {target_field}: Manteniendo valor previo")
+        return valor_actual, False
+    # NO HAY VALOR → Guardar vacío
+    logger.debug(f"   ⚠️ {target_field}: Guardando valor vacío")
+    return valor_a_guardar, True
+
+
+class InventoryBulkWriter:
+    """
+    Acumula en memoria los resultados de un lote de ONUs y los persiste con
+    sentencias set-based en lugar de get_or_create + save por ONU:
+
+    1. Lee en una sola consulta los valores actuales del campo destino
+       (necesarios para las reglas de mantener valor previo)
+    2. Crea en bloque los onu_inventory que falten
+    3. Escribe todos los valores con un único bulk_update
+    4. Pasa a DISABLED / inactive las ONUs NOSUCHINSTANCE con UPDATE ... WHERE IN
+
+    Con copy_ingest (PostgreSQL) el paso 3 es un COPY a una tabla temporal
+    más un único UPDATE ... FROM, y los faltantes se crean con
+    INSERT ... ON CONFLICT DO NOTHING (ver discovery/pg_ingest.py).
+
+    Se vacía al final del lote (flush) o cada flush_every filas.
+    """
+
+    def __init__(self, olt_id: int, oid_config: Dict, execution_id: int, depth: int = 0,
+                 flush_every: Optional[int] = None, copy_ingest: bool = False):
+        self.olt_id = olt_id
+        self.execution_id = execution_id
+        self.depth = depth
+        self.flush_every = flush_every
+        self.copy_ingest = copy_ingest
+
+        self.target_field = oid_config.get('target_field', 'snmp_description')
+        self.keep_previous = oid_config.get('keep_previous_value', False)
+        self.format_mac = oid_config.get('format_mac', False)
+
+        self._values: List[Tuple[Dict, str, int]] = []
+        self._disabled: List[Dict] = []
+
+        self.success_count = 0
+        self.error_count = 0
+        self.failed_onus: List[Dict] = []
+        self.results: List[Dict] = []
+
+    def add_value(self, onu_data: Dict, value_str: str, duration_ms: int):
+        """Agrega un valor válido para el campo destino"""
+        self._values.append((onu_data, value_str, duration_ms))
+        self._maybe_flush()
+
+    def add_disabled(self, onu_data: Dict):
+        """Agrega una ONU que respondió NOSUCHINSTANCE"""
+        self._disabled.append(onu_data)
+        self._maybe_flush()
+
+    def add_failure(self, onu_data: Dict, error: Exception):
+        """Registra una ONU fallida para que el poller la reintente/subdivida"""
+        retry_count = onu_data.get('retry_count', 0)
+        self.error_count += 1
+        self.failed_onus.append({
+            **onu_data,
+            'retry_count': retry_count + 1,
+            'error': str(error)
+        })
+        self.results.append({
+            'onu_index': onu_data.get('normalized_id', 'UNKNOWN'),
+            'status': 'failed',
+            'error': str(error),
+            'depth': self.depth,
+            'retry_count': retry_count
+        })
+
+    def _maybe_flush(self):
+        if self.flush_every and len(self._values) + len(self._disabled) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Persiste todo lo acumulado. Si falla la escritura, las ONUs pendientes cuentan como fallidas"""
+        values, disabled = self._values, self._disabled
+        self._values, self._disabled = [], []
+
+        if not values and not disabled:
+            return
+
+        done, skipped = [], 0
+        try:
+            with transaction.atomic():
+                now = timezone.now()
+                if values:
+                    self._flush_values(values, now, done)
+                if disabled:
+                    skipped = self._flush_disabled(disabled, now, done)
+        except Exception as e:
+            logger.error(f"   ❌ Error guardando lote de {len(values) + len(disabled)} ONUs: {str(e)}")
+            for onu_data in [entry[0] for entry in values] + disabled:
+                self.add_failure(onu_data, e)
+            return
+
+        # Los éxitos se cuentan recién con la escritura confirmada: si la
+        # transacción falla, esas mismas ONUs ya quedaron como fallidas arriba
+        self.success_count += len(done)
+        self.error_count += skipped
+        self.results.extend(done)
+
+    def _load_inventories(self, onu_index_ids: List[int], active_default: bool) -> Dict[int, OnuInventory]:
+        """Lee los onu_inventory del lote (creando los que falten) en consultas set-based"""
+        fields = ['id', 'onu_index_id', 'olt_id', self.target_field]
+        inventories = {
+            inventory.onu_index_id: inventory
+            for inventory in OnuInventory.objects.filter(onu_index_id__in=onu_index_ids).only(*fields)
+        }
+
+        missing_ids = [onu_index_id for onu_index_id in set(onu_index_ids) if onu_index_id not in inventories]
+        if missing_ids:
+            OnuInventory.objects.bulk_create(
+                [
+                    OnuInventory(onu_index_id=onu_index_id, olt_id=self.olt_id, active=active_default)
+                    for onu_index_id in missing_ids
+                ],
+                ignore_conflicts=True
+            )
+            inventories.update(
+                (inventory.onu_index_id, inventory)
+                for inventory in OnuInventory.objects.filter(onu_index_id__in=missing_ids).only(*fields)
+            )
+
+        return inventories
+
+    def _flush_values(self, values: List[Tuple[Dict, str, int]], now, done: List[Dict]):
+        """Escribe los valores del lote; agrega a done el resultado de cada ONU escrita"""
+        # Validar el campo destino antes de tocar la BD (igual que save(update_fields=...))
+        OnuInventory._meta.get_field(self.target_field)
+
+        if self.copy_ingest:
+            self._flush_values_copy(values, now, done)
+            return
+
+        inventories = self._load_inventories([entry[0]['onu_index_id'] for entry in values], active_default=True)
+
+        for onu_data, value_str, duration_ms in values:
+            onu_inventory = inventories[onu_data['onu_index_id']]
+
+            nuevo_valor, campo_actualizado = resolve_target_value(
+                self.target_field,
+                value_str,
+                getattr(onu_inventory, self.target_field, None),
+                self.keep_previous,
+                self.format_mac
+            )
+            if campo_actualizado:
+                setattr(onu_inventory, self.target_field, nuevo_valor)
+
+            # Actualizar metadatos de última colecta (bulk_update no aplica auto_now)
+            onu_inventory.snmp_last_collected_at = now
+            onu_inventory.snmp_last_execution_id = self.execution_id
+            onu_inventory.updated_at = now
+
+            done.append(self._success_result(onu_data, duration_ms))
+
+        OnuInventory.objects.bulk_update(
+            list(inventories.values()),
+            [self.target_field, 'snmp_last_collected_at', 'snmp_last_execution_id', 'updated_at']
+        )
+        logger.debug(f"   💾 {len(inventories)} onu_inventory actualizados en bloque ({self.target_field})")
+
+    def _flush_values_copy(self, values: List[Tuple[Dict, str, int]], now, done: List[Dict]):
+        """
+        Igual que _flush_values pero set-based en PostgreSQL: una consulta de
+        valores actuales, COPY de los valores resueltos a una tabla temporal y
+        un único UPDATE ... FROM (en lugar del UPDATE ... CASE de bulk_update).
+        """
+        current = dict(
+            OnuInventory.objects.filter(
+                onu_index_id__in=[entry[0]['onu_index_id'] for entry in values]
+            ).values_list('onu_index_id', self.target_field)
+        )
+
+        # Un valor por ONU (si se repite en el lote, gana el último, como con bulk_update)
+        staged = {}
+        written = []
+        for onu_data, value_str, duration_ms in values:
+            onu_index_id = onu_data['onu_index_id']
+            nuevo_valor, campo_actualizado = resolve_target_value(
+                self.target_field,
+                value_str,
+                current.get(onu_index_id),
+                self.keep_previous,
+                self.format_mac
+            )
+            if campo_actualizado:
+                current[onu_index_id] = nuevo_valor
+            staged[onu_index_id] = (onu_index_id, current.get(onu_index_id), campo_actualizado)
+            written.append(self._success_result(onu_data, duration_ms))
+
+        inventory_table = OnuInventory._meta.db_table
+        column = connection.ops.quote_name(OnuInventory._meta.get_field(self.target_field).column)
+        with connection.cursor() as cursor:
+            temp_staging_table(cursor, 'get_value_ingest', 'onu_index_id bigint, value text, changed boolean')
+            copy_rows(cursor, 'get_value_ingest', ['onu_index_id', 'value', 'changed'], staged.values())
+
+            # Inventarios faltantes (activos), como _load_inventories
+            cursor.execute(
+                f"""
+                INSERT INTO {inventory_table} (onu_index_id, olt_id, active, snmp_metadata, created_at, updated_at)
+                SELECT st.onu_index_id, %s, TRUE, '{{}}'::jsonb, %s, %s FROM get_value_ingest st
+                ON CONFLICT (onu_index_id) DO NOTHING
+                """,
+                [self.olt_id, now, now]
+            )
+            cursor.execute(
+                f"""
+                UPDATE {inventory_table} i
+                SET {column} = CASE WHEN st.changed THEN st.value ELSE i.{column} END,
+                    snmp_last_collected_at = %s,
+                    snmp_last_execution_id = %s,
+                    updated_at = %s
+                FROM get_value_ingest st
+                WHERE i.onu_index_id = st.onu_index_id
+                """,
+                [now, self.execution_id, now]
+            )
+        # Solo con el COPY y los UPDATE ya ejecutados
+        done.extend(written)
+        logger.debug(f"   💾 {len(staged)} onu_inventory actualizados por COPY ({self.target_field})")
+
+    def _success_result(self, onu_data: Dict, duration_ms: int) -> Dict:
+        return {
+            'onu_index': onu_data['normalized_id'],
+            'status': 'success',
+            'field': self.target_field,
+            'duration_ms': duration_ms,
+            'depth': self.depth,
+            'retry_count': onu_data.get('retry_count', 0)
+        }
+
+    def _flush_disabled(self, disabled: List[Dict], now, done: List[Dict]) -> int:
+        """
+        Deshabilita las ONUs NOSUCHINSTANCE; agrega a done su resultado y
+        devuelve cuántas se descartaron por no tener onu_status.
+        """
+        onu_index_ids = [onu_data['onu_index_id'] for onu_data in disabled]
+
+        # Solo se deshabilitan las ONUs que tienen onu_status
+        with_status = set(
+            OnuStatus.objects.filter(onu_index_id__in=onu_index_ids).values_list('onu_index_id', flat=True)
+        )
+
+        skipped = 0
+        for onu_data in disabled:
+            if onu_data['onu_index_id'] not in with_status:
+                logger.error(f"   ❌ OnuStatus no existe para onu_index_id {onu_data['onu_index_id']}")
+                skipped += 1
+                continue
+
+            # Procesada correctamente aunque sea NOSUCHINSTANCE
+            done.append({
+                'onu_index': onu_data['normalized_id'],
+                'status': 'disabled',
+                'reason': 'NOSUCHINSTANCE',
+                'depth': self.depth
+            })
+
+        if not with_status:
+            return skipped
+
+        ids = list(with_status)
+
+        # 1. onu_status.presence = 'DISABLED' / 2. onu_inventory.active = False
+        OnuStatus.objects.filter(onu_index_id__in=ids).update(presence='DISABLED', updated_at=now)
+        self._load_inventories(ids, active_default=False)
+        OnuInventory.objects.filter(onu_index_id__in=ids).update(active=False, updated_at=now)
+
+        logger.info(f"   🔴 {len(ids)} ONUs marcadas: onu_status.presence=DISABLED + onu_inventory.active=False")
+        return skipped
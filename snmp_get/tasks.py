@@ -1,15 +1,26 @@
 # snmp_get/tasks.py
 import logging
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
 from django.utils import timezone
 from django.db import transaction
-from django.core.cache import cache
-from easysnmp import Session, EasySNMPTimeoutError, EasySNMPConnectionError
+from easysnmp import EasySNMPError, EasySNMPTimeoutError, EasySNMPConnectionError
 import time
+import math
 import hashlib
-from threading import Semaphore
 from collections import defaultdict
 
+from configuracion_avanzada.services import is_get_adaptive_enabled, is_snmp_async_enabled
+from snmp_client.backends import SnmpTimeoutError
+from snmp_client.semaphore import olt_semaphore
+
+from .adaptive import get_bounds, get_state, record_sample
+from .services import InventoryBulkWriter, is_no_such_instance
+from .planner import (
+    PLAN_GET, PLAN_WALK, WALK_MAX_REPETITIONS, WALK_MIN_COVERAGE,
+    plan_get_execution, record_get_timing, record_walk_timing
+)
+
 logger = logging.getLogger(__name__)
 
 # Configuración de control de carga y subdivisión (alineado con facho_deluxe)
@@ -19,74 +30,47 @@ SUBDIVISION_SIZE = 50      # Tamaño al subdividir (200 → 4 lotes de 50, igual
 LOCK_TIMEOUT = 300         # 5 minutos timeout para locks
 RETRY_DELAY = 5            # Segundos entre reintentos individuales
 MAX_INDIVIDUAL_RETRIES = 2 # Máximo número de reintentos por ONU individual
-
-# Control de concurrencia por OLT usando Semaphore (igual que facho_deluxe)
-# El límite se configura dinámicamente desde BD, default 5 consultas SNMP simultáneas
-olt_semaphores = {}  # Se crea dinámicamente con límite desde configuración
-
+VARBINDS_PER_PDU = 25      # OIDs por PDU GET (1 = un GET por ONU)
 
 # =========================================
 # FUNCIONES AUXILIARES DE CONTROL DE CARGA
 # =========================================
 
-def acquire_olt_poller_slot(olt_id, timeout=LOCK_TIMEOUT):
+def poller_permits(snmp_config, batch_size, limit):
     """
-    Intenta adquirir un slot de poller para la OLT.
-    Usa Redis/cache para controlar que no se excedan MAX_POLLERS_PER_OLT.
-    
-    Returns:
-        bool: True si se adquirió el slot, False si no hay slots disponibles
+    Permisos del semáforo de OLT que toma un poller: 1 en modo sincrónico
+    (un PDU a la vez); en modo asíncrono tantos como PDUs tenga en vuelo,
+    sin pasar del límite de la OLT.
     """
-    cache_key = f"olt_pollers:{olt_id}"
-    
-    # Obtener contador actual de pollers activos
-    current_pollers = cache.get(cache_key, 0)
-    
-    if current_pollers >= MAX_POLLERS_PER_OLT:
-        logger.warning(f"⚠️ OLT {olt_id} alcanzó límite de pollers ({current_pollers}/{MAX_POLLERS_PER_OLT})")
-        return False
-    
-    # Incrementar contador con timeout
-    cache.set(cache_key, current_pollers + 1, timeout)
-    logger.debug(f"✅ Slot adquirido para OLT {olt_id}: {current_pollers + 1}/{MAX_POLLERS_PER_OLT}")
-    return True
+    if not is_snmp_async_enabled():
+        return 1
+    varbinds_per_pdu = max(1, snmp_config.get('varbinds_por_pdu', VARBINDS_PER_PDU))
+    return max(1, min(limit, math.ceil(batch_size / varbinds_per_pdu)))
 
 
-def release_olt_poller_slot(olt_id):
+def count_timed_out_pdus(fetched):
     """
-    Libera un slot de poller para la OLT.
+    PDUs que terminaron en timeout. Todas las ONUs de un PDU fallido comparten
+    la misma instancia de excepción, así que se cuentan excepciones distintas.
     """
-    cache_key = f"olt_pollers:{olt_id}"
-    current_pollers = cache.get(cache_key, 0)
-    
-    if current_pollers > 0:
-        cache.set(cache_key, current_pollers - 1, LOCK_TIMEOUT)
-        logger.debug(f"🔓 Slot liberado para OLT {olt_id}: {current_pollers - 1}/{MAX_POLLERS_PER_OLT}")
+    return len({
+        id(result) for _, result, _ in fetched
+        if isinstance(result, (EasySNMPTimeoutError, SnmpTimeoutError))
+    })
 
 
-def wait_for_olt_slot(olt_id, max_wait=60):
+def feed_breaker(olt_id, fetched):
     """
-    Espera hasta que haya un slot disponible para la OLT.
-    
-    Args:
-        olt_id: ID de la OLT
-        max_wait: Tiempo máximo de espera en segundos
-        
-    Returns:
-        bool: True si se adquirió el slot, False si timeout
+    Alimenta el circuit breaker de la OLT con el resultado de un lote: basta
+    una respuesta para cerrarlo; si todos los PDUs fallaron por timeout o
+    conexión cuenta como un fallo de alcanzabilidad.
     """
-    start_time = time.time()
-    wait_interval = 2  # Revisar cada 2 segundos
+    from snmp_client.breaker import is_unreachable_error, record_failure, record_success
     
-    while (time.time() - start_time) < max_wait:
-        if acquire_olt_poller_slot(olt_id):
-            return True
-        
-        logger.info(f"⏳ Esperando slot disponible para OLT {olt_id}... ({int(time.time() - start_time)}s)")
-        time.sleep(wait_interval)
-    
-    logger.error(f"❌ Timeout esperando slot para OLT {olt_id} después de {max_wait}s")
-    return False
+    if any(not isinstance(result, Exception) for _, result, _ in fetched):
+        record_success(olt_id)
+    elif fetched and all(is_unreachable_error(result) for _, result, _ in fetched):
+        record_failure(olt_id, fetched[0][1])
 
 
 def subdivide_batch(batch, subdivision_size=SUBDIVISION_SIZE):
@@ -103,6 +87,116 @@ def subdivide_batch(batch, subdivision_size=SUBDIVISION_SIZE):
     return [batch[i:i + subdivision_size] for i in range(0, len(batch), subdivision_size)]
 
 
+def _snmp_target(olt, snmp_config):
+    """SnmpTarget del motor asíncrono a partir del snmp_config del poller"""
+    from snmp_client.backends import SnmpTarget, split_host_port
+    host, port = split_host_port(olt.ip_address)
+    return SnmpTarget(
+        host=host,
+        port=port,
+        community=snmp_config.get('community', 'public'),
+        version=snmp_config.get('version', 2),
+        timeout=snmp_config.get('timeout', 3),
+        retries=snmp_config.get('retries', 1)
+    )
+
+
+def _pooled_session(olt, snmp_config):
+    """Sesión easysnmp prestada por el pool del worker según el snmp_config del poller"""
+    from snmp_client.pool import session_pool
+    return session_pool.session(
+        olt.ip_address,
+        snmp_config.get('community', 'public'),
+        snmp_config.get('version', 2),
+        snmp_config.get('timeout', 3),
+        snmp_config.get('retries', 1)
+    )
+
+
+def fetch_onu_values(session, onu_batch, oid_string, varbinds_per_pdu=VARBINDS_PER_PDU):
+    """
+    Consulta el OID de cada ONU del lote.
+    
+    Con varbinds_per_pdu > 1 empaqueta varios OIDs en cada PDU GET
+    (session.get([...])), de modo que un lote de 200 ONUs cuesta 200/varbinds_per_pdu
+    round-trips en vez de 200. Si un PDU falla (timeout, tooBig, etc.), todas sus
+    ONUs se devuelven con la excepción y el poller aplica la subdivisión habitual.
+    
+    Args:
+        session: Sesión SNMP (easysnmp)
+        onu_batch: Lista de diccionarios con información de ONUs
+        oid_string: OID base a consultar
+        varbinds_per_pdu: OIDs por PDU (1 = un GET por ONU)
+        
+    Returns:
+        List[tuple]: (onu_data, resultado SNMP o excepción, duración en ms) por ONU
+    """
+    fetched = []
+    
+    # Modo clásico: un GET por ONU
+    if varbinds_per_pdu <= 1 or len(onu_batch) == 1:
+        for onu_data in onu_batch:
+            full_oid = f"{oid_string}.{onu_data.get('raw_index_key')}"
+            logger.debug(f"   🔍 Consultando OID: {full_oid} para ONU {onu_data.get('normalized_id')}")
+            
+            start_time = time.time()
+            try:
+                result = session.get(full_oid)
+            except Exception as e:
+                result = e
+            fetched.append((onu_data, result, int((time.time() - start_time) * 1000)))
+        return fetched
+    
+    # Modo multi-varbind: varios OIDs por PDU
+    for pdu in subdivide_batch(onu_batch, varbinds_per_pdu):
+        oids = [f"{oid_string}.{onu_data.get('raw_index_key')}" for onu_data in pdu]
+        logger.debug(f"   🔍 Consultando PDU con {len(oids)} OIDs")
+        
+        start_time = time.time()
+        try:
+            pdu_results = session.get(oids)
+            if len(pdu_results) != len(pdu):
+                raise EasySNMPError(f"PDU devolvió {len(pdu_results)} varbinds de {len(pdu)} solicitados")
+        except Exception as e:
+            logger.warning(f"   ⚠️ PDU multi-varbind de {len(pdu)} OIDs falló: {str(e)}")
+            pdu_results = [e] * len(pdu)
+        duration_ms = int((time.time() - start_time) * 1000)
+        
+        fetched.extend((onu_data, result, duration_ms) for onu_data, result in zip(pdu, pdu_results))
+    
+    return fetched
+
+
+def fetch_onu_values_async(target, onu_batch, oid_string, varbinds_per_pdu=VARBINDS_PER_PDU, per_olt_limit=5):
+    """
+    Igual que fetch_onu_values pero con el motor asíncrono (snmp_client): todos
+    los PDUs del lote quedan en vuelo a la vez, con a lo sumo per_olt_limit
+    simultáneos contra la OLT, en lugar de uno detrás de otro.
+    
+    Returns:
+        List[tuple]: (onu_data, resultado SNMP o excepción, duración en ms) por ONU
+    """
+    from snmp_client.services import get_batches_sync
+    
+    pdus = subdivide_batch(onu_batch, max(1, varbinds_per_pdu))
+    oid_batches = [[f"{oid_string}.{onu_data.get('raw_index_key')}" for onu_data in pdu] for pdu in pdus]
+    
+    start_time = time.time()
+    pdu_results = get_batches_sync(target, oid_batches, per_olt_limit=per_olt_limit)
+    duration_ms = int((time.time() - start_time) * 1000)
+    
+    fetched = []
+    for pdu, results in zip(pdus, pdu_results):
+        if not isinstance(results, Exception) and len(results) != len(pdu):
+            results = EasySNMPError(f"PDU devolvió {len(results)} varbinds de {len(pdu)} solicitados")
+        if isinstance(results, Exception):
+            logger.warning(f"   ⚠️ PDU de {len(pdu)} OIDs falló: {str(results)}")
+            results = [results] * len(pdu)
+        fetched.extend((onu_data, result, duration_ms) for onu_data, result in zip(pdu, results))
+    
+    return fetched
+
+
 @shared_task(queue='get_main', bind=True, time_limit=300, autoretry_for=(Exception,), retry_kwargs={'max_retries': 0})
 def get_main_task(self, snmp_job_id, olt_id, execution_id):
     """
@@ -203,6 +297,76 @@ def get_manual_task(self, snmp_job_id, olt_id, execution_id):
         raise
 
 
+def process_fetched_values(fetched, olt_id, oid_config, execution_id, depth=0, ingest_method=None):
+    """
+    Aplica a onu_inventory/onu_status los valores obtenidos por SNMP.
+    
+    Lo usan tanto los pollers (GETs dirigidos) como el plan 'walk' de
+    execute_get_main (valores tomados del walk de la columna). Las escrituras se
+    acumulan en un InventoryBulkWriter y se persisten en bloque.
+    
+    Args:
+        fetched: Lista de (onu_data, resultado SNMP o excepción, duración en ms)
+        olt_id: ID de la OLT
+        oid_config: Configuración del OID (target_field, keep_previous_value, format_mac)
+        execution_id: ID de la ejecución
+        depth: Profundidad de subdivisión del poller (solo informativo)
+        ingest_method: metodo_ingesta de la configuración GET ('orm' o 'copy')
+        
+    Returns:
+        tuple: (success_count, error_count, failed_onus, results)
+    """
+    from configuracion_avanzada.services import get_get_bulk_flush_size
+    from discovery.pg_ingest import copy_ingest_enabled
+    
+    writer = InventoryBulkWriter(
+        olt_id, oid_config, execution_id,
+        depth=depth,
+        flush_every=get_get_bulk_flush_size(),
+        copy_ingest=copy_ingest_enabled(ingest_method)
+    )
+    
+    # Procesar cada ONU en el lote
+    for onu_data, result, duration_ms in fetched:
+        # Inicializar variables para evitar error en except si falla antes
+        normalized_id = onu_data.get('normalized_id', 'UNKNOWN')
+        
+        try:
+            onu_data['onu_index_id']
+            onu_data['raw_index_key']
+            normalized_id = onu_data['normalized_id']
+            
+            # El GET de esta ONU (o su PDU completo) falló
+            if isinstance(result, Exception):
+                raise result
+            
+            # Extraer valor
+            value = result.value if hasattr(result, 'value') else str(result)
+            value_str = str(value).strip().strip('"')
+            
+            # Verificar si es NOSUCHINSTANCE (ONU no existe o desconectada)
+            if is_no_such_instance(value_str):
+                logger.warning(f"   ⚠️ ONU {normalized_id}: NOSUCHINSTANCE - Marcando como DISABLED/Inactive")
+                writer.add_disabled(onu_data)
+                continue  # No guardar NOSUCHINSTANCE en snmp_description
+            
+            # Valor válido: se guarda en bloque con lógica inteligente por campo
+            writer.add_value(onu_data, value_str, duration_ms)
+            
+        except (EasySNMPTimeoutError, EasySNMPConnectionError) as e:
+            logger.warning(f"   ⚠️ Error SNMP para ONU {normalized_id} (intento {onu_data.get('retry_count', 0) + 1}): {str(e)}")
+            writer.add_failure(onu_data, e)
+            
+        except Exception as e:
+            logger.error(f"   ❌ Error inesperado para ONU {normalized_id}: {str(e)}")
+            writer.add_failure(onu_data, e)
+    
+    # Persistir lo pendiente del lote
+    writer.flush()
+    
+    return writer.success_count, writer.error_count, writer.failed_onus, writer.results
+
+
 @shared_task(
     queue='get_poller', 
     bind=True, 
@@ -221,9 +385,15 @@ def get_poller_task(self, onu_batch, olt_id, oid_string, snmp_config, execution_
     2. Lote de 50 ONUs → Si falla, procesar individualmente
     3. ONU individual → Si falla, reintentar hasta MAX_INDIVIDUAL_RETRIES
     
+    Con varbinds_por_pdu > 1 cada PDU GET lleva varios OIDs; una ONU solo cuenta
+    como fallida si falló su PDU completo, y recién ahí se subdivide el lote.
+    
     Control de concurrencia:
-    - Semaphore por OLT (max 5 consultas SNMP simultáneas)
-    - Cache counter por OLT (max 10 pollers concurrentes)
+    - Semáforo distribuido en Redis por OLT (max_consultas_snmp_simultaneas
+      en toda la flota, compartido con discovery, espera FIFO)
+    - Con el control adaptativo activo el límite es la concurrencia AIMD de la
+      OLT (acotada por max_consultas_snmp_simultaneas) y cada poller reporta
+      su latencia y sus timeouts al controlador (snmp_get.adaptive)
     
     Args:
         onu_batch: Lista de diccionarios con información de ONUs
@@ -234,8 +404,7 @@ def get_poller_task(self, onu_batch, olt_id, oid_string, snmp_config, execution_
         oid_config: Configuración del OID (target_field, keep_previous_value, format_mac)
         depth: Profundidad de subdivisión (0=inicial, 1=subdividido, 2=individual)
     """
-    from discovery.models import OnuInventory
-    from hosts.models import OLT
+    from snmp_client.pool import get_cached_olt
     
     # Configuración por defecto del OID
     if oid_config is None:
@@ -246,287 +415,72 @@ def get_poller_task(self, onu_batch, olt_id, oid_string, snmp_config, execution_
             'espacio': 'descripcion'
         }
     
+    from snmp_client.breaker import allows_requests
+    
     batch_size = len(onu_batch)
     logger.info(f"📡 get_poller_task [depth={depth}]: Procesando {batch_size} ONUs para OLT {olt_id}")
     
-    # Esperar y adquirir slot de poller para la OLT (control de pollers concurrentes)
-    if not wait_for_olt_slot(olt_id, max_wait=60):
-        logger.error(f"❌ No se pudo adquirir slot de poller para OLT {olt_id}, reencolando...")
+    # OLT con el circuito abierto: el lote terminaría en timeout, descartarlo
+    if not allows_requests(olt_id):
+        logger.warning(f"🔴 get_poller_task: OLT {olt_id} con circuito abierto, descartando lote de {batch_size} ONUs")
+        return {'status': 'skipped', 'reason': 'circuit_open', 'total_processed': 0, 'depth': depth}
+    
+    # Semáforo distribuido de la OLT (compartido con discovery): a lo sumo
+    # max_consultas_snmp_simultaneas consultas en vuelo en toda la flota.
+    # La espera es FIFO y bloqueante en Redis, sin sleeps.
+    adaptive = is_get_adaptive_enabled()
+    bounds = get_bounds(snmp_config)
+    if adaptive:
+        max_snmp_queries = get_state(olt_id, bounds)['concurrency']
+    else:
+        max_snmp_queries = snmp_config.get('max_consultas_snmp_simultaneas', 5)
+    permits = poller_permits(snmp_config, batch_size, max_snmp_queries)
+    semaphore = olt_semaphore(olt_id, max_snmp_queries, permits=permits)
+    if not semaphore.acquire(timeout=60):
+        logger.error(f"❌ No se pudo adquirir el semáforo SNMP de la OLT {olt_id}, reencolando...")
         # Reencolar con retraso
         self.retry(countdown=30, max_retries=3)
         return
     
-    # Variable para rastrear el semáforo
-    semaphore = None
-    
     try:
-        # Obtener OLT para obtener su IP
-        olt = OLT.objects.get(id=olt_id)
-        
-        # Obtener límite de semáforo desde configuración
-        max_snmp_queries = snmp_config.get('max_consultas_snmp_simultaneas', 5)
-        
-        # Obtener o crear semáforo para esta OLT con límite dinámico
-        olt_key = f"{olt.ip_address}_{max_snmp_queries}"
-        if olt_key not in olt_semaphores:
-            olt_semaphores[olt_key] = Semaphore(max_snmp_queries)
-            logger.debug(f"🔧 Semáforo creado para OLT {olt.abreviatura} con límite {max_snmp_queries}")
-        
-        semaphore = olt_semaphores[olt_key]
-        
-        # Intentar adquirir el semáforo con timeout (como en facho_deluxe)
-        if not semaphore.acquire(timeout=30):
-            error_msg = f"Timeout esperando semáforo SNMP para OLT {olt.abreviatura}"
-            logger.error(error_msg)
-            return {
-                'status': 'error',
-                'error': error_msg,
-                'success_count': 0,
-                'error_count': 0
-            }
+        # Obtener OLT para obtener su IP (memorizada en el worker, sin consulta por lote)
+        olt = get_cached_olt(olt_id)
         
         try:
-            # Crear sesión SNMP
-            session = Session(
-                hostname=olt.ip_address,
-                community=snmp_config.get('community', 'public'),
-                version=snmp_config.get('version', 2),
-                timeout=snmp_config.get('timeout', 3),
-                retries=snmp_config.get('retries', 1)
-            )
+            # Realizar consultas SNMP GET (multi-varbind por PDU si está configurado)
+            varbinds_per_pdu = snmp_config.get('varbinds_por_pdu', VARBINDS_PER_PDU)
+            fetch_start = time.time()
             
-            success_count = 0
-            error_count = 0
-            failed_onus = []
-            results = []
+            if is_snmp_async_enabled():
+                fetched = fetch_onu_values_async(
+                    _snmp_target(olt, snmp_config), onu_batch, oid_string, varbinds_per_pdu,
+                    per_olt_limit=permits
+                )
+            else:
+                # Sesión SNMP reutilizada del pool del worker
+                with _pooled_session(olt, snmp_config) as session:
+                    fetched = fetch_onu_values(session, onu_batch, oid_string, varbinds_per_pdu)
+            
+            # Registrar tiempo por PDU para el planner de execute_get_main
+            fetch_ms = (time.time() - fetch_start) * 1000
+            pdus = math.ceil(batch_size / varbinds_per_pdu) if varbinds_per_pdu > 1 else batch_size
+            record_get_timing(olt_id, pdus, fetch_ms)
+            feed_breaker(olt_id, fetched)
+            
+            # Muestra para el control adaptativo (latencia por PDU: en modo
+            # asíncrono hay hasta `permits` PDUs en vuelo a la vez)
+            if adaptive:
+                parallel = min(permits, pdus) if is_snmp_async_enabled() else 1
+                record_sample(
+                    olt_id, bounds, pdus, count_timed_out_pdus(fetched),
+                    fetch_ms * parallel / pdus, snmp_config.get('timeout', 3)
+                )
             
             # Procesar cada ONU en el lote
-            for onu_data in onu_batch:
-                # Inicializar variables para evitar error en except si falla antes
-                normalized_id = onu_data.get('normalized_id', 'UNKNOWN')
-                raw_index_key = onu_data.get('raw_index_key', 'UNKNOWN')
-                
-                try:
-                    onu_index_id = onu_data['onu_index_id']
-                    raw_index_key = onu_data['raw_index_key']
-                    normalized_id = onu_data['normalized_id']
-                    retry_count = onu_data.get('retry_count', 0)
-                    
-                    # Construir OID completo
-                    full_oid = f"{oid_string}.{raw_index_key}"
-                    
-                    logger.debug(f"   🔍 Consultando OID: {full_oid} para ONU {normalized_id}")
-                    
-                    # Realizar consulta SNMP GET
-                    start_time = time.time()
-                    result = session.get(full_oid)
-                    duration_ms = int((time.time() - start_time) * 1000)
-                    
-                    # Extraer valor
-                    value = result.value if hasattr(result, 'value') else str(result)
-                    value_str = str(value).strip().strip('"')
-                    
-                    # Verificar si es NOSUCHINSTANCE (ONU no existe o desconectada)
-                    if (value_str.lower() in ['no such instance currently exists at this oid', 
-                                              'no such instance', 
-                                              'nosuchinstance', 
-                                              'nosuchobject'] or 
-                        'no such' in value_str.lower()):
-                        
-                        logger.warning(f"   ⚠️ ONU {normalized_id}: NOSUCHINSTANCE - Marcando como DISABLED/Inactive")
-                        
-                        # Actualizar AMBAS tablas para que concuerden
-                        from discovery.models import OnuStatus
-                        try:
-                            # 1. Actualizar onu_status.presence = 'DISABLED'
-                            onu_status = OnuStatus.objects.get(onu_index_id=onu_index_id)
-                            onu_status.presence = 'DISABLED'
-                            onu_status.updated_at = timezone.now()
-                            onu_status.save(update_fields=['presence', 'updated_at'])
-                            
-                            # 2. Actualizar onu_inventory.active = False
-                            onu_inventory, created = OnuInventory.objects.get_or_create(
-                                onu_index_id=onu_index_id,
-                                olt_id=olt_id,
-                                defaults={'active': False}
-                            )
-                            
-                            # Si ya existía, actualizar active a False
-                            if not created:
-                                onu_inventory.active = False
-                                onu_inventory.save(update_fields=['active', 'updated_at'])
-                            
-                            logger.info(f"   🔴 ONU {normalized_id} marcada: onu_status.presence=DISABLED + onu_inventory.active=False")
-                            
-                            success_count += 1  # Procesada correctamente aunque sea NOSUCHINSTANCE
-                            results.append({
-                                'onu_index': normalized_id,
-                                'status': 'disabled',
-                                'reason': 'NOSUCHINSTANCE',
-                                'depth': depth
-                            })
-                        except OnuStatus.DoesNotExist:
-                            logger.error(f"   ❌ OnuStatus no existe para onu_index_id {onu_index_id}")
-                            error_count += 1
-                        
-                        continue  # No guardar NOSUCHINSTANCE en snmp_description
-                    
-                    # Valor válido: actualizar onu_inventory con lógica inteligente
-                    onu_inventory, created = OnuInventory.objects.get_or_create(
-                        onu_index_id=onu_index_id,
-                        olt_id=olt_id,
-                        defaults={'active': True}
-                    )
-                    
-                    # Obtener configuración del campo a actualizar
-                    target_field = oid_config.get('target_field', 'snmp_description')
-                    keep_previous = oid_config.get('keep_previous_value', False)
-                    format_mac = oid_config.get('format_mac', False)
-                    espacio = oid_config.get('espacio', 'descripcion')
-                    
-                    # Procesar valor según el tipo de campo
-                    valor_a_guardar = value_str
-                    campo_actualizado = False
-                    
-                    # 1. FORMATEAR MAC si está habilitado (AC:DC:SD → ACDCSD)
-                    if format_mac and valor_a_guardar:
-                        valor_a_guardar = valor_a_guardar.replace(':', '').replace(' ', '').upper()
-                        logger.debug(f"   🔧 MAC formateada: {value_str} → {valor_a_guardar}")
-                    
-                    # 2. LÓGICA SEGÚN EL CAMPO
-                    if target_field == 'distancia_onu':
-                        # Lógica especial para distancia (conversión m→km + mantener previo)
-                        valor_actual = getattr(onu_inventory, target_field, None)
-                        
-                        if valor_a_guardar == "-1":
-                            # Valor -1: No hay distancia medida
-                            if not valor_actual:
-                                setattr(onu_inventory, target_field, "No Distancia")
-                                campo_actualizado = True
-                                logger.debug(f"   📏 Distancia: Sin medición (primera vez)")
-                            else:
-                                # MANTENER valor previo
-                                logger.debug(f"   📏 Distancia: Valor -1, manteniendo '{valor_actual}'")
-                        elif valor_a_guardar:
-                            # Convertir metros → kilómetros
-                            try:
-                                if '.' in valor_a_guardar:
-                                    # Ya está en km
-                                    nuevo_valor = f"{valor_a_guardar} km"
-                                else:
-                                    # Convertir metros a km
-                                    metros = float(valor_a_guardar)
-                                    km = metros / 1000
-                                    nuevo_valor = f"{km:.3f} km"
-                                
-                                # SOLO actualizar si no hay valor o es "No Distancia"
-                                if not valor_actual or valor_actual == "No Distancia":
-                                    setattr(onu_inventory, target_field, nuevo_valor)
-                                    campo_actualizado = True
-                                    logger.debug(f"   📏 Distancia actualizada: {nuevo_valor}")
-                                else:
-                                    # MANTENER valor previo (distancia no cambia)
-                                    logger.debug(f"   📏 Distancia: Manteniendo '{valor_actual}'")
-                            except ValueError:
-                                logger.error(f"   ❌ Error convirtiendo distancia: {valor_a_guardar}")
-                    
-                    elif target_field in ['plan_onu', 'modelo_onu']:
-                        # Lógica para plan_onu y modelo_onu (mantener valor previo)
-                        valor_actual = getattr(onu_inventory, target_field, None)
-                        
-                        if valor_a_guardar:
-                            # HAY VALOR NUEVO → SIEMPRE SOBREESCRIBIR ✅
-                            setattr(onu_inventory, target_field, valor_a_guardar)
-                            campo_actualizado = True
-                            logger.debug(f"   ✅ {target_field} actualizado: {valor_a_guardar}")
-                        elif valor_actual:
-                            # NO HAY VALOR NUEVO PERO HAY VALOR PREVIO → MANTENER ✅
-                            logger.debug(f"   🔄 {target_field}: Manteniendo '{valor_actual}'")
-                        else:
-                            # NO HAY VALOR NUEVO NI PREVIO → Poner "No Plan" o "No Modelo"
-                            default_value = "No Plan" if target_field == 'plan_onu' else "No Modelo"
-                            setattr(onu_inventory, target_field, default_value)
-                            campo_actualizado = True
-                            logger.debug(f"   ⚠️ {target_field}: Sin valor, guardando '{default_value}'")
-                    
-                    else:
-                        # Lógica para otros campos (snmp_description, mac_address, etc.)
-                        valor_actual = getattr(onu_inventory, target_field, None) if hasattr(onu_inventory, target_field) else None
-                        
-                        if valor_a_guardar:
-                            # HAY VALOR NUEVO → SIEMPRE SOBREESCRIBIR ✅
-                            setattr(onu_inventory, target_field, valor_a_guardar)
-                            campo_actualizado = True
-                            logger.debug(f"   ✅ {target_field} actualizado: {valor_a_guardar[:50]}...")
-                        elif keep_previous and valor_actual:
-                            # NO HAY VALOR NUEVO PERO keep_previous=True → MANTENER ✅
-                            logger.debug(f"   🔄 {target_field}: Manteniendo valor previo")
-                        else:
-                            # NO HAY VALOR → Guardar vacío
-                            setattr(onu_inventory, target_field, valor_a_guardar)
-                            campo_actualizado = True
-                            logger.debug(f"   ⚠️ {target_field}: Guardando valor vacío")
-                    
-                    # Actualizar metadatos de última colecta
-                    onu_inventory.snmp_last_collected_at = timezone.now()
-                    onu_inventory.snmp_last_execution_id = execution_id
-                    
-                    # Guardar en BD
-                    fields_to_update = ['snmp_last_collected_at', 'snmp_last_execution_id', 'updated_at']
-                    if campo_actualizado:
-                        fields_to_update.append(target_field)
-                    
-                    onu_inventory.save(update_fields=fields_to_update)
-                    
-                    success_count += 1
-                    results.append({
-                        'onu_index': normalized_id,
-                        'status': 'success',
-                        'field': target_field,
-                        'duration_ms': duration_ms,
-                        'depth': depth,
-                        'retry_count': retry_count
-                    })
-                    
-                    logger.debug(f"   ✅ ONU {normalized_id} procesada correctamente")
-                    
-                except (EasySNMPTimeoutError, EasySNMPConnectionError) as e:
-                    error_count += 1
-                    retry_count = onu_data.get('retry_count', 0)
-                    
-                    logger.warning(f"   ⚠️ Error SNMP para ONU {normalized_id} (intento {retry_count + 1}): {str(e)}")
-                    
-                    # Agregar a lista de fallos para procesamiento posterior
-                    failed_onus.append({
-                        **onu_data,
-                        'retry_count': retry_count + 1,
-                        'error': str(e)
-                    })
-                    
-                    results.append({
-                        'onu_index': normalized_id,
-                        'status': 'failed',
-                        'error': str(e),
-                        'depth': depth,
-                        'retry_count': retry_count
-                    })
-                    
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"   ❌ Error inesperado para ONU {normalized_id}: {str(e)}")
-                    
-                    failed_onus.append({
-                        **onu_data,
-                        'retry_count': onu_data.get('retry_count', 0) + 1,
-                        'error': str(e)
-                    })
-                    
-                    results.append({
-                        'onu_index': normalized_id,
-                        'status': 'failed',
-                        'error': str(e),
-                        'depth': depth
-                    })
+            success_count, error_count, failed_onus, results = process_fetched_values(
+                fetched, olt_id, oid_config, execution_id, depth,
+                ingest_method=snmp_config.get('metodo_ingesta')
+            )
             
             # Estrategia de subdivisión basada en errores
             # Obtener parámetros de configuración desde snmp_config
@@ -551,7 +505,9 @@ def get_poller_task(self, onu_batch, olt_id, oid_string, snmp_config, execution_
                         )
                 
                 # DEPTH 1: Lote subdividido (50) → Procesar individualmente
-                elif depth == 1 and batch_size > 1:
+                # (también un lote inicial que ya no supera la subdivisión, p. ej.
+                # reducido por el control adaptativo)
+                elif depth <= 1 and batch_size > 1:
                     logger.info(f"🔀 Procesando {len(failed_onus)} ONUs individualmente")
                     
                     for onu_data in failed_onus:
@@ -591,25 +547,193 @@ def get_poller_task(self, onu_batch, olt_id, oid_string, snmp_config, execution_
                 'total_processed': batch_size,
                 'failed_onus': len(failed_onus),
                 'depth': depth,
+                'varbinds_per_pdu': varbinds_per_pdu,
                 'results': results
             }
             
         except Exception as e:
             logger.error(f"❌ Error crítico en get_poller_task [depth={depth}]: {str(e)}")
             raise
-        finally:
-            # SIEMPRE liberar el semáforo SNMP (como en facho_deluxe)
-            if semaphore:
-                semaphore.release()
-                logger.debug(f"🔓 Semáforo SNMP liberado para OLT {olt_id}")
     
     except Exception as e:
         logger.error(f"❌ Error general en get_poller_task [depth={depth}]: {str(e)}")
         raise
     finally:
-        # SIEMPRE liberar el slot de poller (contador de pollers concurrentes)
-        release_olt_poller_slot(olt_id)
-        logger.debug(f"🔓 Slot de poller liberado para OLT {olt_id}")
+        # SIEMPRE liberar el semáforo SNMP (despierta al siguiente poller en cola)
+        semaphore.release()
+        logger.debug(f"🔓 Semáforo SNMP liberado para OLT {olt_id}")
+
+
+def _walk_row_index(item, oid_string, requested_keys):
+    """
+    Extrae el raw_index_key de una fila del walk de la columna.
+    
+    Normalmente es lo que sigue al OID base; si el agente devolvió el OID con
+    otro formato (nombres de MIB), se prueba con los 2 y 1 últimos componentes.
+    """
+    full_oid = str(item.oid)
+    if getattr(item, 'oid_index', None):
+        full_oid = f"{full_oid}.{item.oid_index}"
+    full_oid = full_oid.lstrip('.')
+    if full_oid.startswith('iso.'):
+        full_oid = '1.' + full_oid[4:]
+    
+    base_oid = oid_string.lstrip('.')
+    if full_oid.startswith(base_oid + '.'):
+        return full_oid[len(base_oid) + 1:]
+    
+    oid_parts = full_oid.split('.')
+    for size in (2, 1):
+        candidate = '.'.join(oid_parts[-size:])
+        if candidate in requested_keys:
+            return candidate
+    return None
+
+
+def execute_get_walk(olt, oid_string, onu_list, snmp_config, oid_config, execution_id):
+    """
+    Plan 'walk' del planner: un solo bulkwalk de la columna completa, unido por
+    raw_index_key con las ONUs pedidas. Las ONUs que no aparecen en la columna
+    se tratan como NOSUCHINSTANCE (igual que un GET sobre un índice inexistente),
+    pero solo si el walk cubrió la tabla: si no trajo filas o trajo menos de
+    WALK_MIN_COVERAGE de las ONUs pedidas (otro prefijo de OID, índices que no
+    se pudieron leer, agente que corta el walk), no se escribe nada y se
+    devuelve 'error' para que execute_get_main siga con GETs dirigidos.
+    
+    Returns:
+        dict: Resumen del walk ('status' = 'completed' o 'error')
+    """
+    from snmp_client.semaphore import olt_snmp_slot
+    
+    try:
+        # El walk ocupa un lugar del semáforo SNMP de la OLT (la espera no cuenta en walk_ms)
+        with olt_snmp_slot(olt.id, snmp_config.get('max_consultas_snmp_simultaneas', 5)):
+            start_time = time.time()
+            if is_snmp_async_enabled():
+                from snmp_client.services import walk_sync
+                # walk_sync usa GETNEXT en SNMPv1 aunque se pida max_repetitions
+                rows = walk_sync(_snmp_target(olt, snmp_config), oid_string, max_repetitions=WALK_MAX_REPETITIONS)
+            else:
+                with _pooled_session(olt, snmp_config) as session:
+                    if snmp_config.get('version', 2) == 1:
+                        rows = session.walk(oid_string)  # SNMPv1 no soporta GETBULK
+                    else:
+                        rows = session.bulkwalk(oid_string, max_repetitions=WALK_MAX_REPETITIONS)
+            walk_ms = int((time.time() - start_time) * 1000)
+    except Exception as e:
+        logger.warning(f"⚠️ Walk de columna {oid_string} falló en OLT {olt.abreviatura}: {str(e)}")
+        return {'status': 'error', 'error': str(e)}
+    
+    record_walk_timing(olt.id, len(rows), walk_ms)
+    logger.info(f"🌐 Walk de columna en OLT {olt.abreviatura}: {len(rows)} filas en {walk_ms}ms")
+    
+    requested_keys = {onu['raw_index_key'] for onu in onu_list}
+    values = {}
+    for item in rows:
+        raw_index_key = _walk_row_index(item, oid_string, requested_keys)
+        if raw_index_key is not None:
+            values[raw_index_key] = item
+    
+    matched = sum(1 for onu in onu_list if onu['raw_index_key'] in values)
+    
+    if not rows or matched < len(onu_list) * WALK_MIN_COVERAGE:
+        error = f"Walk de columna incompleto: {len(rows)} filas, {matched}/{len(onu_list)} ONUs pedidas"
+        logger.warning(f"⚠️ {error} en OLT {olt.abreviatura}, se usan GETs dirigidos")
+        return {'status': 'error', 'error': error, 'rows': len(rows), 'matched': matched}
+    
+    fetched = [
+        (onu, values.get(onu['raw_index_key'], 'NOSUCHINSTANCE'), 0)
+        for onu in onu_list
+    ]
+    success_count, error_count, failed_onus, _ = process_fetched_values(
+        fetched, olt.id, oid_config, execution_id,
+        ingest_method=snmp_config.get('metodo_ingesta')
+    )
+    
+    return {
+        'status': 'completed',
+        'rows': len(rows),
+        'matched': matched,
+        'walk_ms': walk_ms,
+        'process_ms': int((time.time() - start_time) * 1000) - walk_ms,
+        'success_count': success_count,
+        'error_count': error_count,
+        'failed_onus': len(failed_onus),
+    }
+
+
+def build_snmp_config(config_snmp, job, olt):
+    """
+    snmp_config de una ejecución GET (se pasa a los pollers).
+    PRIORIDAD: OLT > run_options > config BD > defaults
+    
+    Args:
+        config_snmp: ConfiguracionSNMP de tipo 'get' (o None para los defaults)
+    """
+    if config_snmp:
+        snmp_config = {
+            'community': olt.comunidad or job.run_options.get('community', config_snmp.comunidad),
+            'version': 2 if config_snmp.version == '2c' else int(config_snmp.version),
+            'timeout': job.run_options.get('timeout', config_snmp.timeout),
+            'retries': job.run_options.get('retries', config_snmp.reintentos),
+            # Parámetros de pollers
+            'max_pollers_por_olt': config_snmp.max_pollers_por_olt,
+            'tamano_lote_inicial': config_snmp.tamano_lote_inicial,
+            'tamano_subdivision': config_snmp.tamano_subdivision,
+            'max_reintentos_individuales': config_snmp.max_reintentos_individuales,
+            'delay_entre_reintentos': config_snmp.delay_entre_reintentos,
+            'max_consultas_snmp_simultaneas': config_snmp.max_consultas_snmp_simultaneas,
+            'varbinds_por_pdu': config_snmp.varbinds_por_pdu,
+            'metodo_ingesta': config_snmp.metodo_ingesta,
+        }
+    else:
+        # Fallback a valores por defecto
+        snmp_config = {
+            'community': olt.comunidad or job.run_options.get('community', 'public'),
+            'version': job.run_options.get('snmp_version', 2),
+            'timeout': job.run_options.get('timeout', 3),
+            'retries': job.run_options.get('retries', 1),
+            'max_pollers_por_olt': MAX_POLLERS_PER_OLT,
+            'tamano_lote_inicial': INITIAL_BATCH_SIZE,
+            'tamano_subdivision': SUBDIVISION_SIZE,
+            'max_reintentos_individuales': MAX_INDIVIDUAL_RETRIES,
+            'delay_entre_reintentos': RETRY_DELAY,
+            'max_consultas_snmp_simultaneas': 5,
+            'varbinds_por_pdu': VARBINDS_PER_PDU,
+            'metodo_ingesta': 'orm',
+        }
+    return snmp_config
+
+
+def active_onu_list(olt_id):
+    """ONUs con presence='ENABLED' de la OLT, con las claves que esperan los pollers"""
+    from discovery.models import OnuStatus
+    
+    return [
+        {
+            'onu_index_id': onu['onu_index_id'],
+            'raw_index_key': onu['onu_index__raw_index_key'],
+            'normalized_id': onu['onu_index__normalized_id']
+        }
+        for onu in OnuStatus.objects.filter(
+            olt_id=olt_id,
+            presence='ENABLED'
+        ).values(
+            'onu_index_id',
+            'onu_index__raw_index_key',
+            'onu_index__normalized_id'
+        )
+    ]
+
+
+def oid_config_for(job):
+    """Configuración del OID del job para los pollers (target_field, keep_previous_value, format_mac)"""
+    return {
+        'target_field': job.oid.target_field or 'snmp_description',
+        'keep_previous_value': job.oid.keep_previous_value,
+        'format_mac': job.oid.format_mac,
+        'espacio': job.oid.espacio
+    }
 
 
 def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', attempt=0):
@@ -623,10 +747,12 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
     5. Actualiza el estado de la ejecución
     """
     from snmp_jobs.models import SnmpJob
-    from discovery.models import OnuStatus, OnuIndexMap
+    from discovery.models import OnuIndexMap
     from hosts.models import OLT
     from executions.models import Execution
     from configuracion_avanzada.models import ConfiguracionSNMP
+    from configuracion_avanzada.services import is_get_planner_enabled, get_get_walk_min_ratio
+    from snmp_client.breaker import allows_requests
     
     logger.info(f"📋 execute_get_main: Iniciando ejecución {execution_id}")
     
@@ -645,7 +771,7 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
             logger.info(f"📋 Usando configuración SNMP: {config_snmp.nombre}")
             logger.info(f"   Timeout: {config_snmp.timeout}s | Reintentos SNMP: {config_snmp.reintentos}")
             logger.info(f"   Pollers: {config_snmp.max_pollers_por_olt} | Lote: {config_snmp.tamano_lote_inicial} | Subdivisión: {config_snmp.tamano_subdivision}")
-            logger.info(f"   Semáforo: {config_snmp.max_consultas_snmp_simultaneas} consultas simultáneas")
+            logger.info(f"   Semáforo: {config_snmp.max_consultas_snmp_simultaneas} consultas simultáneas | Varbinds/PDU: {config_snmp.varbinds_por_pdu}")
         else:
             logger.warning(f"⚠️ No hay configuración SNMP para GET, usando valores por defecto")
             config_snmp = None
@@ -658,6 +784,17 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
         if job.oid.espacio != 'descripcion':
             logger.warning(f"⚠️ OID no es de tipo 'descripcion': {job.oid.espacio}")
         
+        # OLT con el circuito abierto: no encolar pollers que terminarían en timeout ni reintentar
+        if not allows_requests(olt_id):
+            logger.warning(f"🔴 OLT {olt.abreviatura} con circuito abierto, ejecución descartada")
+            execution.status = 'FAILED'
+            execution.started_at = execution.finished_at = timezone.now()
+            execution.attempt = attempt
+            execution.duration_ms = 0
+            execution.error_message = f"OLT {olt.abreviatura} no responde (circuito abierto)"
+            execution.save(update_fields=['status', 'started_at', 'finished_at', 'attempt', 'duration_ms', 'error_message'])
+            return
+        
         # Actualizar estado de ejecución a RUNNING
         execution.status = 'RUNNING'
         execution.started_at = timezone.now()
@@ -669,24 +806,7 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
         logger.info(f"🔍 Consultando ONUs activas para OLT {olt.abreviatura}")
         
         # Obtener todas las ONUs con presence='ENABLED' para esta OLT
-        active_onus_raw = OnuStatus.objects.filter(
-            olt_id=olt_id,
-            presence='ENABLED'
-        ).select_related('onu_index').values(
-            'onu_index_id',
-            'onu_index__raw_index_key',
-            'onu_index__normalized_id'
-        )
-        
-        # Renombrar claves para que el poller pueda accederlas correctamente
-        active_onus = [
-            {
-                'onu_index_id': onu['onu_index_id'],
-                'raw_index_key': onu['onu_index__raw_index_key'],
-                'normalized_id': onu['onu_index__normalized_id']
-            }
-            for onu in active_onus_raw
-        ]
+        active_onus = active_onu_list(olt_id)
         
         total_onus = len(active_onus)
         logger.info(f"📊 Total de ONUs activas encontradas: {total_onus}")
@@ -703,11 +823,16 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
             execution.save(update_fields=['status', 'finished_at', 'duration_ms', 'result_summary'])
             return
         
-        # Dividir en lotes para pollers (usar configuración de BD si existe)
-        batch_size = job.run_options.get(
-            'batch_size', 
-            config_snmp.tamano_lote_inicial if config_snmp else INITIAL_BATCH_SIZE
-        )
+        # Configuración SNMP (PRIORIDAD: OLT > run_options > config BD > defaults)
+        snmp_config = build_snmp_config(config_snmp, job, olt)
+        
+        # Dividir en lotes para pollers: run_options > control adaptativo de la OLT > config BD
+        if 'batch_size' in job.run_options:
+            batch_size = job.run_options['batch_size']
+        elif is_get_adaptive_enabled():
+            batch_size = get_state(olt_id, get_bounds(snmp_config))['batch_size']
+        else:
+            batch_size = snmp_config['tamano_lote_inicial']
         
         # active_onus ya es una lista con claves renombradas
         onu_list = active_onus
@@ -718,43 +843,48 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
         
         logger.info(f"📦 Dividiendo trabajo en {total_batches} lotes de ~{batch_size} ONUs")
         
-        # Configuración SNMP (PRIORIDAD: OLT > run_options > config BD > defaults)
-        if config_snmp:
-            snmp_config = {
-                'community': olt.comunidad or job.run_options.get('community', config_snmp.comunidad),
-                'version': 2 if config_snmp.version == '2c' else int(config_snmp.version),
-                'timeout': job.run_options.get('timeout', config_snmp.timeout),
-                'retries': job.run_options.get('retries', config_snmp.reintentos),
-                # Parámetros de pollers
-                'max_pollers_por_olt': config_snmp.max_pollers_por_olt,
-                'tamano_subdivision': config_snmp.tamano_subdivision,
-                'max_reintentos_individuales': config_snmp.max_reintentos_individuales,
-                'delay_entre_reintentos': config_snmp.delay_entre_reintentos,
-                'max_consultas_snmp_simultaneas': config_snmp.max_consultas_snmp_simultaneas,
-            }
-        else:
-            # Fallback a valores por defecto
-            snmp_config = {
-                'community': olt.comunidad or job.run_options.get('community', 'public'),
-                'version': job.run_options.get('snmp_version', 2),
-                'timeout': job.run_options.get('timeout', 3),
-                'retries': job.run_options.get('retries', 1),
-                'max_pollers_por_olt': MAX_POLLERS_PER_OLT,
-                'tamano_subdivision': SUBDIVISION_SIZE,
-                'max_reintentos_individuales': MAX_INDIVIDUAL_RETRIES,
-                'delay_entre_reintentos': RETRY_DELAY,
-                'max_consultas_snmp_simultaneas': 5,
-            }
-        
         # Extraer configuración del OID para los pollers
-        oid_config = {
-            'target_field': job.oid.target_field or 'snmp_description',
-            'keep_previous_value': job.oid.keep_previous_value,
-            'format_mac': job.oid.format_mac,
-            'espacio': job.oid.espacio
-        }
+        oid_config = oid_config_for(job)
         logger.info(f"🔧 Configuración OID: Campo='{oid_config['target_field']}', Mantener previo={oid_config['keep_previous_value']}, Formatear MAC={oid_config['format_mac']}")
         
+        # Planner: walk de la columna completa vs GETs dirigidos
+        plan = None
+        if is_get_planner_enabled():
+            known_onus = OnuIndexMap.objects.filter(olt_id=olt_id).count()
+            plan = plan_get_execution(
+                olt_id,
+                requested_onus=total_onus,
+                known_onus=known_onus,
+                varbinds_per_pdu=snmp_config.get('varbinds_por_pdu', VARBINDS_PER_PDU),
+                batch_size=batch_size,
+                max_pollers=snmp_config.get('max_pollers_por_olt', MAX_POLLERS_PER_OLT),
+                min_walk_ratio=get_get_walk_min_ratio()
+            )
+            logger.info(f"🧭 Plan GET para OLT {olt.abreviatura}: {plan['strategy']} ({plan['reason']})")
+        
+        if plan and plan['strategy'] == PLAN_WALK:
+            walk_summary = execute_get_walk(olt, job.oid.oid, onu_list, snmp_config, oid_config, execution_id)
+            
+            if walk_summary['status'] == 'completed':
+                execution.status = 'SUCCESS'
+                execution.finished_at = timezone.now()
+                execution.duration_ms = int((time.time() - start_time) * 1000)
+                execution.result_summary = {
+                    'total_onus': total_onus,
+                    'oid': job.oid.oid,
+                    'oid_name': job.oid.nombre,
+                    'plan': plan,
+                    'walk': walk_summary
+                }
+                execution.save(update_fields=['status', 'finished_at', 'duration_ms', 'result_summary'])
+                
+                logger.info(f"✅ execute_get_main (walk) completado en {execution.duration_ms}ms: {walk_summary['success_count']}/{total_onus} exitosos")
+                return
+            
+            # Walk falló: continuar con GETs dirigidos
+            plan['strategy'] = PLAN_GET
+            plan['fallback_from_walk'] = walk_summary.get('error')
+        
         # Encolar tareas poller
         poller_tasks = []
         for idx, batch in enumerate(batches, 1):
@@ -782,7 +912,8 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
             'batch_size': batch_size,
             'poller_tasks': poller_tasks,
             'oid': job.oid.oid,
-            'oid_name': job.oid.nombre
+            'oid_name': job.oid.nombre,
+            'plan': plan
         }
         execution.save(update_fields=['result_summary'])
         
@@ -821,3 +952,257 @@ def execute_get_main(snmp_job_id, olt_id, execution_id, queue_name='get_main', a
         
         raise
 
+
+
+# =========================================
+# FUSIÓN DE JOBS GET DE UNA MISMA OLT
+# =========================================
+
+def fetch_fused_values(olt, onu_batch, oid_strings, snmp_config, per_olt_limit=5):
+    """
+    Consulta varios OIDs (uno por job) de cada ONU del lote en una sola pasada:
+    cada PDU GET lleva los OIDs de todos los jobs para varias ONUs, hasta
+    varbinds_por_pdu varbinds (como mínimo uno por job).
+    
+    Si un PDU falla, todas sus ONUs se devuelven con la excepción en todos
+    los jobs, igual que en fetch_onu_values.
+    
+    Returns:
+        tuple: (fetched por job en el orden de oid_strings, PDUs enviados)
+    """
+    jobs = len(oid_strings)
+    varbinds_per_pdu = max(jobs, snmp_config.get('varbinds_por_pdu', VARBINDS_PER_PDU))
+    pdus = subdivide_batch(onu_batch, max(1, varbinds_per_pdu // jobs))
+    oid_batches = [
+        [f"{oid_string}.{onu_data['raw_index_key']}" for onu_data in pdu for oid_string in oid_strings]
+        for pdu in pdus
+    ]
+    
+    start_time = time.time()
+    if is_snmp_async_enabled():
+        from snmp_client.services import get_batches_sync
+        pdu_results = get_batches_sync(_snmp_target(olt, snmp_config), oid_batches, per_olt_limit=per_olt_limit)
+    else:
+        pdu_results = []
+        with _pooled_session(olt, snmp_config) as session:
+            for oids in oid_batches:
+                try:
+                    pdu_results.append(session.get(oids))
+                except Exception as e:
+                    pdu_results.append(e)
+    duration_ms = int((time.time() - start_time) * 1000)
+    
+    fetched = [[] for _ in oid_strings]
+    for pdu, oids, results in zip(pdus, oid_batches, pdu_results):
+        if not isinstance(results, Exception) and len(results) != len(oids):
+            results = EasySNMPError(f"PDU devolvió {len(results)} varbinds de {len(oids)} solicitados")
+        if isinstance(results, Exception):
+            logger.warning(f"   ⚠️ PDU fusionado de {len(oids)} OIDs falló: {str(results)}")
+            results = [results] * len(oids)
+        for position, onu_data in enumerate(pdu):
+            for job_index in range(jobs):
+                # Copia por job: el writer anota reintentos en onu_data
+                fetched[job_index].append((dict(onu_data), results[position * jobs + job_index], duration_ms))
+    
+    return fetched, len(pdus)
+
+
+@shared_task(queue='get_main', bind=True, time_limit=300, soft_time_limit=240)
+def fused_get_task(self, olt_id, job_executions):
+    """
+    Pasada GET fusionada de una unidad del dispatcher (execute_fused_get). Va
+    encadenada detrás de los discovery de la misma OLT.
+    
+    El soft_time_limit deja margen para cerrar la pasada: las ejecuciones
+    quedan FAILED con su reintento por separado y el semáforo de la OLT se
+    libera, en lugar de quedar RUNNING y con los permisos tomados hasta que
+    expire el lease.
+    """
+    try:
+        execute_fused_get(olt_id, job_executions, queue_name='get_main')
+    except Exception as exc:
+        # Cada ejecución ya quedó FAILED con su reintento programado
+        logger.error(f"❌ fused_get_task: pasada GET fusionada de la OLT {olt_id} falló: {str(exc)}")
+
+
+def execute_fused_get(olt_id, job_executions, queue_name='get_main'):
+    """
+    Ejecuta varios jobs GET vencidos en el mismo tick sobre la misma OLT como
+    una sola unidad de trabajo (fusión de jobs, ver el dispatcher):
+    
+    - Una sola adquisición del semáforo SNMP de la OLT y una sola sesión
+    - PDUs GET multi-varbind con los OIDs de todos los jobs (fetch_fused_values)
+    - Cada job conserva su Execution, su oid_config y su resumen
+    
+    Las ONUs que fallan vuelven al camino habitual de cada job: pollers
+    subdivididos (depth=1) con su execution_id. Si la unidad completa falla,
+    o se agota el soft_time_limit de fused_get_task en una OLT muy grande,
+    cada ejecución queda FAILED y se reintenta por separado (get_retry_task,
+    que reparte el trabajo en pollers); los lotes ya procesados quedan
+    guardados.
+    
+    Args:
+        olt_id: OLT común a todos los jobs
+        job_executions: Lista de (snmp_job_id, execution_id)
+    """
+    from snmp_jobs.models import SnmpJob
+    from hosts.models import OLT
+    from executions.models import Execution
+    from configuracion_avanzada.models import ConfiguracionSNMP
+    from snmp_client.semaphore import olt_snmp_slot
+    from snmp_client.breaker import allows_requests
+    
+    start_time = time.time()
+    jobs = SnmpJob.objects.select_related('oid').in_bulk([job_id for job_id, _ in job_executions])
+    executions = Execution.objects.in_bulk([execution_id for _, execution_id in job_executions])
+    
+    units = []
+    for job_id, execution_id in job_executions:
+        execution = executions.get(execution_id)
+        if execution is None or execution.status in ['INTERRUPTED', 'SUCCESS', 'FAILED']:
+            logger.warning(f"⚠️ Ejecución {execution_id} ya no está pendiente, se excluye de la unidad fusionada")
+            continue
+        units.append((jobs[job_id], execution))
+    if not units:
+        return
+    
+    # OLT con el circuito abierto (p. ej. falló el discovery de la misma unidad): sin pasada ni reintentos
+    if not allows_requests(olt_id):
+        logger.warning(f"🔴 execute_fused_get: OLT {olt_id} con circuito abierto, {len(units)} ejecuciones descartadas")
+        now = timezone.now()
+        for _, execution in units:
+            execution.status = 'FAILED'
+            execution.started_at = execution.finished_at = now
+            execution.duration_ms = 0
+            execution.error_message = f"OLT {olt_id} no responde (circuito abierto)"
+        Execution.objects.bulk_update(
+            [execution for _, execution in units], ['status', 'started_at', 'finished_at', 'duration_ms', 'error_message']
+        )
+        return
+    
+    logger.info(f"🧩 execute_fused_get: {len(units)} jobs GET en una pasada sobre OLT {olt_id}")
+    
+    now = timezone.now()
+    for _, execution in units:
+        execution.status = 'RUNNING'
+        execution.started_at = now
+        execution.worker_name = queue_name
+        execution.celery_task_id = execute_fused_get.__name__
+    Execution.objects.bulk_update(
+        [execution for _, execution in units], ['status', 'started_at', 'worker_name', 'celery_task_id']
+    )
+    
+    summaries = [
+        {'success_count': 0, 'error_count': 0, 'failed_onus': 0}
+        for _ in units
+    ]
+    batches = []
+    batches_done = 0
+    try:
+        olt = OLT.objects.get(id=olt_id)
+        # El dispatcher solo fusiona jobs sin run_options: todos comparten el snmp_config
+        snmp_config = build_snmp_config(ConfiguracionSNMP.get_config_for_tipo('get'), units[0][0], olt)
+        oid_strings = [job.oid.oid for job, _ in units]
+        oid_configs = [oid_config_for(job) for job, _ in units]
+        onu_list = active_onu_list(olt_id)
+        
+        adaptive = is_get_adaptive_enabled()
+        bounds = get_bounds(snmp_config)
+        if adaptive:
+            state = get_state(olt_id, bounds)
+            max_snmp_queries, batch_size = state['concurrency'], state['batch_size']
+        else:
+            max_snmp_queries = snmp_config.get('max_consultas_snmp_simultaneas', 5)
+            batch_size = snmp_config['tamano_lote_inicial']
+        permits = poller_permits(snmp_config, batch_size * len(units), max_snmp_queries)
+        pdus_sent = 0
+        fetch_ms_total = 0
+        batches = subdivide_batch(onu_list, batch_size)
+        
+        if onu_list:
+            with olt_snmp_slot(olt_id, max_snmp_queries, permits=permits) as semaphore:
+                for batch in batches:
+                    fetch_start = time.time()
+                    per_job, pdus = fetch_fused_values(olt, batch, oid_strings, snmp_config, semaphore.permits)
+                    fetch_ms = (time.time() - fetch_start) * 1000
+                    pdus_sent += pdus
+                    fetch_ms_total += fetch_ms
+                    
+                    record_get_timing(olt_id, pdus, fetch_ms)
+                    feed_breaker(olt_id, per_job[0])
+                    if adaptive:
+                        parallel = min(semaphore.permits, pdus) if is_snmp_async_enabled() else 1
+                        record_sample(
+                            olt_id, bounds, pdus, count_timed_out_pdus(per_job[0]),
+                            fetch_ms * parallel / pdus, snmp_config.get('timeout', 3)
+                        )
+                    
+                    for (job, execution), oid_config, fetched, summary in zip(units, oid_configs, per_job, summaries):
+                        success_count, error_count, failed_onus, _ = process_fetched_values(
+                            fetched, olt_id, oid_config, execution.id,
+                            ingest_method=snmp_config.get('metodo_ingesta')
+                        )
+                        summary['success_count'] += success_count
+                        summary['error_count'] += error_count
+                        summary['failed_onus'] += len(failed_onus)
+                        
+                        # Fallidas: pollers del job, como la subdivisión de un lote inicial
+                        for sublote in subdivide_batch(failed_onus, snmp_config.get('tamano_subdivision', SUBDIVISION_SIZE)):
+                            get_poller_task.apply_async(
+                                args=[sublote, olt_id, job.oid.oid, snmp_config, execution.id],
+                                kwargs={'oid_config': oid_config, 'depth': 1},
+                                countdown=snmp_config.get('delay_entre_reintentos', RETRY_DELAY)
+                            )
+                    batches_done += 1
+    except Exception as e:
+        error_message = str(e)
+        if isinstance(e, SoftTimeLimitExceeded):
+            error_message = (
+                f"Tiempo límite de la pasada fusionada: {batches_done}/{len(batches)} lotes procesados, "
+                f"el resto se reintenta por job"
+            )
+        logger.error(f"❌ Error en execute_fused_get (OLT {olt_id}): {error_message}")
+        finished_at = timezone.now()
+        for job, execution in units:
+            execution.status = 'FAILED'
+            execution.finished_at = finished_at
+            execution.duration_ms = int((time.time() - start_time) * 1000)
+            execution.error_message = error_message
+        Execution.objects.bulk_update(
+            [execution for _, execution in units], ['status', 'finished_at', 'duration_ms', 'error_message']
+        )
+        # Reintento de cada job por separado (sin fusión)
+        for job, execution in units:
+            if job.max_retries > 0:
+                get_retry_task.apply_async(
+                    args=[job.id, olt_id, execution.id, 1],
+                    countdown=job.retry_delay_seconds
+                )
+        raise
+    
+    finished_at = timezone.now()
+    fused = {
+        'jobs': [job.id for job, _ in units],
+        'oids': len(oid_strings),
+        'pdus': pdus_sent,
+        'fetch_ms': int(fetch_ms_total),
+    }
+    for (job, execution), summary in zip(units, summaries):
+        execution.status = 'SUCCESS'
+        execution.finished_at = finished_at
+        execution.duration_ms = int((time.time() - start_time) * 1000)
+        execution.result_summary = {
+            'total_onus': len(onu_list),
+            'oid': job.oid.oid,
+            'oid_name': job.oid.nombre,
+            'fused': fused,
+            **summary
+        }
+    Execution.objects.bulk_update(
+        [execution for _, execution in units], ['status', 'finished_at', 'duration_ms', 'result_summary']
+    )
+    
+    logger.info(
+        f"✅ execute_fused_get completado en {int((time.time() - start_time) * 1000)}ms: "
+        f"{len(units)} jobs, {len(onu_list)} ONUs, {pdus_sent} PDUs"
+    )
@@ -36,7 +36,7 @@ class SnmpJobAdmin(admin.ModelAdmin):
         """Redirigir la vista de edición a programar_tarea"""
         return self.programar_tarea_view(request, object_id)
     
-    list_display = ('nombre', 'marca', 'get_olts_count', 'get_oid_display', 'get_schedule_display', 'get_next_run_display', 'get_time_until_next_run', 'job_type', 'get_status_icon')
+    list_display = ('nombre', 'marca', 'get_olts_count', 'get_oid_display', 'get_schedule_display', 'get_next_run_display', 'get_time_until_next_run', 'get_phase_display', 'job_type', 'get_status_icon')
     list_display_links = ('nombre',)
     list_filter = ('marca', 'job_type', 'enabled')
     search_fields = ('nombre', 'descripcion')
@@ -44,6 +44,10 @@ class SnmpJobAdmin(admin.ModelAdmin):
     form = SnmpJobForm
     actions = ['deshabilitar_tareas_seleccionadas', 'habilitar_tareas_seleccionadas', 'mostrar_estadisticas_tareas', 'ejecutar_tareas_seleccionadas', 'deshabilitar_tarea_individual']
     
+    def get_queryset(self, request):
+        # job_hosts precargados para la columna de fase
+        return super().get_queryset(request).prefetch_related('job_hosts')
+    
     def get_olts_count(self, obj):
         """Retorna el número de OLTs asociadas a la tarea"""
         return obj.olts.count()
@@ -367,6 +371,13 @@ class SnmpJobAdmin(admin.ModelAdmin):
             return f"⏰ {time_until}"
     get_time_until_next_run.short_description = 'Tiempo Restante'
     get_time_until_next_run.admin_order_field = 'next_run_at'
+    
+    def get_phase_display(self, obj):
+        """Muestra el rango de fases (desfase por OLT dentro del intervalo)"""
+        from .phases import describe_job_phases
+        olt_ids = [job_host.olt_id for job_host in obj.job_hosts.all() if job_host.enabled]
+        return describe_job_phases(obj, olt_ids)
+    get_phase_display.short_description = 'Fase'
 
     def deshabilitar_tareas_seleccionadas(self, request, queryset):
         """Acción para deshabilitar tareas SNMP seleccionadas"""
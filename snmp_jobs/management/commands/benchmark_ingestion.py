@@ -0,0 +1,430 @@
+"""
+Benchmark de punta a punta de la ingesta SNMP contra una OLT simulada.
+
+Levanta en el proceso un agente SNMP (snmp_client.responder.LocalSnmpResponder)
+con tablas de índices estilo Huawei o ZTE, crea OLT / fórmula / OIDs / tareas
+de prueba y corre contra él, en este orden:
+
+- discovery_inicial: execute_discovery con todas las ONUs nuevas
+- discovery:         execute_discovery en régimen (ONUs ya conocidas)
+- get_main:          execute_get_main tal como está configurado (planner incluido)
+- pollers:           get_poller_task sobre todos los lotes (GETs dirigidos)
+
+Todo corre dentro de una transacción que se revierte al final: la BD queda
+como estaba. Las tareas Celery se ejecutan en línea (task_always_eager).
+
+Por fase informa ONUs/s, consultas SQL y PDUs SNMP por ONU, latencia p50/p99
+de la fase y de las consultas SQL, el pico de RSS del proceso y las corridas
+fallidas (con --loss alguna puede agotar los reintentos).
+"""
+import resource
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+class _Rollback(Exception):
+    """Revierte la transacción del benchmark"""
+
+
+# Tablas de índices de cada fabricante: (fórmula, índice SNMP de slot/puerto, OIDs)
+VENDOR_PROFILES = {
+    'huawei': {
+        'formula': {
+            'calculation_mode': 'linear',
+            'base_index': 4194304000,
+            'step_slot': 8192,
+            'step_port': 256,
+            'has_dot_notation': True,
+            'dot_is_onu_number': True,
+        },
+        'snmp_index': lambda slot, port: 4194304000 + slot * 8192 + port * 256,
+        'slots': 17,
+        'ports': 16,
+        'onus_per_port': 128,
+        'state_oid': '1.3.6.1.4.1.2011.6.128.1.1.2.46.1.15',
+        'description_oid': '1.3.6.1.4.1.2011.6.128.1.1.2.43.1.9',
+    },
+    'zte': {
+        'formula': {
+            'calculation_mode': 'bitshift',
+            'shift_slot_bits': 16,
+            'shift_port_bits': 8,
+            'mask_slot': '0xFF',
+            'mask_port': '0xFF',
+            'has_dot_notation': True,
+            'dot_is_onu_number': True,
+        },
+        'snmp_index': lambda slot, port: 0x10000000 | (slot << 16) | (port << 8),
+        'slots': 20,
+        'ports': 16,
+        'onus_per_port': 128,
+        'state_oid': '1.3.6.1.4.1.3902.1082.500.10.2.3.8.1.4',
+        'description_oid': '1.3.6.1.4.1.3902.1012.3.28.1.1.3',
+    },
+}
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * percentile / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _peak_rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _QueryRecorder:
+    """execute_wrapper que solo cuenta consultas y guarda su duración (sin el SQL)"""
+
+    def __init__(self):
+        self.durations_ms = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations_ms.append((time.perf_counter() - start) * 1000)
+
+
+def build_onu_table(profile, onus):
+    """raw_index_key de `onus` ONUs repartidas por slot/puerto como en la OLT real"""
+    keys = []
+    per_port = profile['onus_per_port']
+    for slot in range(1, profile['slots'] + 1):
+        for port in range(profile['ports']):
+            base = profile['snmp_index'](slot, port)
+            for onu in range(1, per_port + 1):
+                if len(keys) >= onus:
+                    return keys
+                keys.append(f"{base}.{onu}")
+    raise CommandError(
+        f"El perfil admite como máximo {profile['slots'] * profile['ports'] * per_port} ONUs"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark de discovery, execute_get_main y pollers GET contra una OLT SNMP simulada '
+        'en el proceso (la BD se revierte al terminar)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--onus',
+            type=int,
+            nargs='+',
+            default=[1000],
+            help='Cantidad de ONUs de la OLT simulada; varios valores corren varios escenarios (default: 1000)'
+        )
+        parser.add_argument(
+            '--vendor',
+            choices=sorted(VENDOR_PROFILES),
+            default='huawei',
+            help='Formato de la tabla de índices (default: huawei)'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Latencia de respuesta del agente en milisegundos (default: 0)'
+        )
+        parser.add_argument(
+            '--loss',
+            type=float,
+            default=0.0,
+            help='Fracción de requests que el agente descarta, 0-1 (default: 0)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=3,
+            help='Repeticiones de cada fase en régimen (default: 3)'
+        )
+        parser.add_argument(
+            '--ingest',
+            choices=['orm', 'copy'],
+            help='Forzar metodo_ingesta para descubrimiento y GET (default: el configurado)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=1,
+            help='Timeout SNMP en segundos para la OLT simulada (default: 1)'
+        )
+        parser.add_argument(
+            '--retries',
+            type=int,
+            default=3,
+            help='Reintentos SNMP para la OLT simulada; con --loss evita que un walk largo falle (default: 3)'
+        )
+        parser.add_argument(
+            '--phases',
+            nargs='+',
+            choices=['discovery', 'get_main', 'pollers'],
+            default=['discovery', 'get_main', 'pollers'],
+            help='Fases a medir (default: todas)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Semilla de la pérdida simulada (default: 1)'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations debe ser al menos 1')
+        if not 0 <= options['loss'] < 1:
+            raise CommandError('--loss debe estar entre 0 y 1')
+
+        profile = VENDOR_PROFILES[options['vendor']]
+
+        self.stdout.write(self.style.SUCCESS('🚀 BENCHMARK DE INGESTA SNMP'))
+        self.stdout.write(
+            f"Fabricante: {options['vendor']} | Latencia: {options['latency']}ms | "
+            f"Pérdida: {options['loss'] * 100:.1f}% | Iteraciones: {options['iterations']} | "
+            f"Ingesta: {options['ingest'] or 'configurada'} | Base: {connection.vendor}"
+        )
+
+        for onus in options['onus']:
+            self.stdout.write('=' * 78)
+            self.stdout.write(f"📊 {onus} ONUs")
+            rows = self.run_scenario(profile, onus, options)
+            self.print_rows(rows)
+
+    # ------------------------------------------------------------ escenario
+
+    def run_scenario(self, profile, onus, options):
+        from celery import current_app
+        from snmp_client.responder import LocalSnmpResponder
+
+        keys = build_onu_table(profile, onus)
+        values = {}
+        for position, raw_index_key in enumerate(keys):
+            values[f"{profile['state_oid']}.{raw_index_key}"] = 1 if position % 10 else 2
+            values[f"{profile['description_oid']}.{raw_index_key}"] = f"cliente-{position:06d}"
+
+        agent = LocalSnmpResponder(
+            values, delay=options['latency'] / 1000, loss=options['loss'], seed=options['seed']
+        ).start_in_thread()
+
+        eager = current_app.conf.task_always_eager
+        propagates = current_app.conf.task_eager_propagates
+        current_app.conf.task_always_eager = True
+        current_app.conf.task_eager_propagates = True
+        rows = []
+        olt_id = None
+        try:
+            with transaction.atomic():
+                fixtures = self.create_fixtures(profile, agent, options)
+                olt_id = fixtures['olt'].id
+                rows = self.run_phases(fixtures, agent, onus, options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            current_app.conf.task_always_eager = eager
+            current_app.conf.task_eager_propagates = propagates
+            agent.stop()
+            self.cleanup(olt_id)
+        return rows
+
+    def create_fixtures(self, profile, agent, options):
+        from brands.models import Brand
+        from configuracion_avanzada.models import ConfiguracionSNMP
+        from discovery.models import OnuStateLookup
+        from hosts.models import OLT
+        from oids.models import OID
+        from olt_models.models import OLTModel
+        from snmp_formulas.models import IndexFormula
+        from snmp_jobs.models import SnmpJob, SnmpJobHost
+
+        tag = f"bench-{uuid.uuid4().hex[:8]}"
+        marca = Brand.objects.create(nombre=tag, descripcion='Benchmark de ingesta')
+        modelo = OLTModel.objects.create(nombre=tag, marca=marca, descripcion='Benchmark de ingesta')
+        IndexFormula.objects.create(marca=marca, modelo=modelo, nombre=tag, **profile['formula'])
+        OnuStateLookup.objects.create(value=1, label='ACTIVO', marca=marca)
+        OnuStateLookup.objects.create(value=2, label='SUSPENDIDO', marca=marca)
+
+        olt = OLT.objects.create(
+            abreviatura=tag, marca=marca, modelo=modelo, ip_address=agent.address,
+            descripcion='OLT simulada', comunidad=agent.community
+        )
+        state_oid = OID.objects.create(
+            nombre=f'{tag}-estado', oid=profile['state_oid'], marca=marca, modelo=modelo, espacio='descubrimiento'
+        )
+        description_oid = OID.objects.create(
+            nombre=f'{tag}-descripcion', oid=profile['description_oid'], marca=marca, modelo=modelo,
+            espacio='descripcion'
+        )
+        # Deshabilitadas: el dispatcher nunca las ve (además la transacción no se confirma)
+        discovery_job = SnmpJob.objects.create(
+            nombre=f'{tag}-discovery', marca=marca, job_type='descubrimiento', interval_raw='5m',
+            oid=state_oid, enabled=False
+        )
+        get_job = SnmpJob.objects.create(
+            nombre=f'{tag}-get', marca=marca, job_type='get', interval_raw='5m',
+            oid=description_oid, enabled=False
+        )
+
+        # Timeout e ingesta de la OLT simulada (solo dentro de la transacción)
+        for tipo in ('descubrimiento', 'get'):
+            config = ConfiguracionSNMP.get_config_for_tipo(tipo)
+            if config is None or config.tipo_operacion != tipo:
+                config = ConfiguracionSNMP(nombre=f'{tag}-{tipo}', tipo_operacion=tipo)
+            config.timeout = options['timeout']
+            config.reintentos = options['retries']
+            if options['ingest']:
+                config.metodo_ingesta = options['ingest']
+            config.save()
+
+        return {
+            'olt': olt,
+            'discovery_host': SnmpJobHost.objects.create(snmp_job=discovery_job, olt=olt),
+            'get_host': SnmpJobHost.objects.create(snmp_job=get_job, olt=olt),
+            'discovery_job': discovery_job,
+            'get_job': get_job,
+        }
+
+    def run_phases(self, fixtures, agent, onus, options):
+        phases = options['phases']
+        iterations = options['iterations']
+        rows = []
+
+        if 'discovery' in phases or 'get_main' in phases or 'pollers' in phases:
+            # GET necesita las ONUs descubiertas
+            rows.append(self.measure('discovery_inicial', 1, onus, agent, lambda: self.run_discovery(fixtures)))
+        if 'discovery' in phases:
+            rows.append(self.measure('discovery', iterations, onus, agent, lambda: self.run_discovery(fixtures)))
+        if 'get_main' in phases:
+            rows.append(self.measure('get_main', iterations, onus, agent, lambda: self.run_get_main(fixtures)))
+        if 'pollers' in phases:
+            rows.append(self.measure('pollers', iterations, onus, agent, lambda: self.run_pollers(fixtures)))
+        return rows
+
+    def run_discovery(self, fixtures):
+        from snmp_jobs.tasks import execute_discovery
+
+        execution = self.new_execution(fixtures['discovery_job'], fixtures['discovery_host'])
+        execute_discovery(fixtures['discovery_job'].id, fixtures['olt'].id, execution.id)
+        execution.refresh_from_db()
+        if execution.status != 'SUCCESS':
+            raise CommandError(f"Discovery terminó en {execution.status}: {execution.error_message}")
+
+    def run_get_main(self, fixtures):
+        from snmp_get.tasks import execute_get_main
+
+        execution = self.new_execution(fixtures['get_job'], fixtures['get_host'])
+        execute_get_main(fixtures['get_job'].id, fixtures['olt'].id, execution.id)
+
+    def run_pollers(self, fixtures):
+        from configuracion_avanzada.models import ConfiguracionSNMP
+        from discovery.models import OnuStatus
+        from snmp_get.tasks import build_snmp_config, get_poller_task
+
+        job, olt = fixtures['get_job'], fixtures['olt']
+        execution = self.new_execution(job, fixtures['get_host'])
+        snmp_config = build_snmp_config(ConfiguracionSNMP.get_config_for_tipo('get'), job, olt)
+        onu_list = [
+            {'onu_index_id': onu_index_id, 'raw_index_key': raw_index_key, 'normalized_id': normalized_id}
+            for onu_index_id, raw_index_key, normalized_id in OnuStatus.objects.filter(
+                olt=olt, presence='ENABLED'
+            ).values_list('onu_index_id', 'onu_index__raw_index_key', 'onu_index__normalized_id')
+        ]
+        oid_config = {
+            'target_field': job.oid.target_field or 'snmp_description',
+            'keep_previous_value': job.oid.keep_previous_value,
+            'format_mac': job.oid.format_mac,
+            'espacio': job.oid.espacio
+        }
+        batch_size = snmp_config['tamano_lote_inicial']
+        for start in range(0, len(onu_list), batch_size):
+            get_poller_task.apply(kwargs={
+                'onu_batch': onu_list[start:start + batch_size],
+                'olt_id': olt.id,
+                'oid_string': job.oid.oid,
+                'snmp_config': snmp_config,
+                'execution_id': execution.id,
+                'oid_config': oid_config,
+            })
+
+    @staticmethod
+    def new_execution(job, job_host):
+        from executions.models import Execution
+        return Execution.objects.create(
+            snmp_job=job, job_host=job_host, olt=job_host.olt, status='PENDING', attempt=0
+        )
+
+    # ------------------------------------------------------------- medición
+
+    def measure(self, phase, iterations, onus, agent, run):
+        self.stdout.write(f"   ⏱️ {phase} ({iterations}x)...")
+        recorder = _QueryRecorder()
+        durations_ms = []
+        errors = 0
+        requests_before = agent.requests_received
+        with connection.execute_wrapper(recorder):
+            for _ in range(iterations):
+                start = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        run()
+                except Exception as e:
+                    errors += 1
+                    self.stdout.write(self.style.WARNING(f"      ❌ {e}"))
+                durations_ms.append((time.perf_counter() - start) * 1000)
+
+        median_ms = statistics.median(durations_ms)
+        return {
+            'fase': phase,
+            'errores': errors,
+            'onus_s': onus / (median_ms / 1000) if median_ms else 0.0,
+            'sql_onu': len(recorder.durations_ms) / iterations / onus,
+            'pdu_onu': (agent.requests_received - requests_before) / iterations / onus,
+            'p50_ms': median_ms,
+            'p99_ms': _percentile(durations_ms, 99),
+            'sql_p50_ms': _percentile(recorder.durations_ms, 50),
+            'sql_p99_ms': _percentile(recorder.durations_ms, 99),
+            'rss_mb': _peak_rss_mb(),
+        }
+
+    def print_rows(self, rows):
+        header = (
+            f"{'fase':<18} {'ONUs/s':>9} {'SQL/ONU':>8} {'PDU/ONU':>8} {'p50 ms':>9} {'p99 ms':>9} "
+            f"{'SQL p50':>8} {'SQL p99':>8} {'RSS MB':>8} {'errores':>8}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['fase']:<18} {row['onus_s']:>9.0f} {row['sql_onu']:>8.3f} {row['pdu_onu']:>8.3f} "
+                f"{row['p50_ms']:>9.0f} {row['p99_ms']:>9.0f} {row['sql_p50_ms']:>8.2f} "
+                f"{row['sql_p99_ms']:>8.2f} {row['rss_mb']:>8.0f} {row['errores']:>8}"
+            )
+
+    @staticmethod
+    def cleanup(olt_id):
+        """Estado en Redis de la OLT simulada (no lo revierte la transacción)"""
+        from snmp_client.pool import invalidate_session_pool
+
+        # Los memos del pool pueden tener timeout/reintentos de la configuración revertida
+        invalidate_session_pool('benchmark de ingesta')
+        if olt_id is None:
+            return
+        from snmp_client import breaker
+        from snmp_get.adaptive import reset_state
+        from snmp_get.planner import redis_client, _timings_key
+        reset_state([olt_id])
+        breaker.reset_state([olt_id])
+        redis_client.delete(_timings_key(olt_id))
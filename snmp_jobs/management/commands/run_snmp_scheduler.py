@@ -0,0 +1,47 @@
+"""
+Comando de gestión para correr el scheduler en memoria de SnmpJob
+"""
+import signal
+
+from django.core.management.base import BaseCommand
+
+from snmp_jobs.scheduler import JobHeapScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Scheduler de larga duración basado en un min-heap de next_run_at: despacha cada job '
+        'en su vencimiento exacto y se refresca por pub/sub de Redis. Mientras corre, el tick '
+        'de Celery Beat del dispatcher queda en espera como respaldo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            default=30,
+            help='Máximo de segundos que duerme el loop sin vencimientos (default: 30)',
+        )
+        parser.add_argument(
+            '--resync-interval',
+            type=int,
+            default=300,
+            help='Segundos entre recargas completas del heap desde la BD (default: 300)',
+        )
+
+    def handle(self, *args, **options):
+        stopping = []
+
+        def request_stop(signum, frame):
+            self.stdout.write(self.style.WARNING('\n⏹️ Deteniendo scheduler...'))
+            stopping.append(signum)
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.stdout.write(self.style.SUCCESS('🚀 Iniciando scheduler SNMP en memoria (Ctrl+C para detener)'))
+
+        scheduler = JobHeapScheduler(resync_interval=options['resync_interval'])
+        scheduler.run(max_sleep=options['max_sleep'], stop=lambda: bool(stopping))
+
+        self.stdout.write(self.style.SUCCESS('✅ Scheduler detenido'))
@@ -424,6 +424,12 @@ class SnmpJob(models.Model):
         
         super().save(*args, **kwargs)
         
+        # Notificar al scheduler en memoria (run_snmp_scheduler) para que refresque su heap
+        from django.db import transaction
+        from snmp_jobs.scheduler import publish_job_change
+        job_id = self.pk
+        transaction.on_commit(lambda: publish_job_change(job_id))
+        
         # DESPUÉS del save: Abortar ejecuciones si se deshabilitó la tarea
         if was_enabled is True and not self.enabled:
             # Usar transaction.on_commit para evitar deadlocks
@@ -454,6 +460,7 @@ class SnmpJob(models.Model):
         self.enabled = True
         self.last_run_at = None  # Resetear para que calcule desde ahora
         self.next_run_at = self.calculate_next_run(is_new_task=False)
+        # save() publica el cambio al scheduler en memoria
         self.save(update_fields=['enabled', 'last_run_at', 'next_run_at'])
     
     def enable_with_catchup_prevention(self):
@@ -0,0 +1,122 @@
+"""
+Colas de trabajo por OLT para el lock de discovery.
+
+execute_discovery toma el lock de Redis de la OLT sin esperar. Antes, si
+estaba ocupado lanzaba "Lock no disponible" y la ejecución quedaba FAILED
+con sus reintentos, así que la contención se convertía en una tormenta de
+fallos. Ahora el trabajo se estaciona en la cola de la OLT:
+
+- {prefijo}:{olt_id}        LIST  job_ids en orden de llegada
+- {prefijo}:{olt_id}:items  HASH  job_id → {execution_id, queue_name}
+- {prefijo}:olts            SET   OLTs con trabajo estacionado
+
+Una sola entrada por (job, OLT): si el job ya está en la cola, la ejecución
+nueva se fusiona con la estacionada (queda INTERRUPTED) y corre una sola vez.
+
+Quien libera el lock despacha la siguiente entrada (drain_olt_queue, desde
+transaction.on_commit: la siguiente ejecución ve lo ya confirmado). El tick
+del dispatcher y cada vuelta del scheduler en memoria (que cubre el caso en
+que beat se salta) drenan además las colas de OLTs sin lock (holder muerto,
+o lock liberado justo antes de estacionar).
+"""
+import json
+import logging
+
+from django.conf import settings
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+PARKED = 'parked'              # Resultado de execute_discovery cuando la ejecución quedó en cola
+
+QUEUE_PREFIX = 'snmp:olt_queue'
+QUEUED_OLTS_KEY = f"{QUEUE_PREFIX}:olts"
+QUEUE_TTL = 24 * 3600           # Colas abandonadas (OLT dada de baja) expiran solas
+
+redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
+
+# KEYS: lista, items, olts · ARGV: job_id, payload, ttl, olt_id
+# Devuelve {1, largo de la cola} si se estacionó o {0, payload existente} si se fusionó
+_PARK = """
+local existing = redis.call('HGET', KEYS[2], ARGV[1])
+if existing then
+    return {0, existing}
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+local length = redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[3]))
+redis.call('SADD', KEYS[3], ARGV[4])
+return {1, length}
+"""
+
+# KEYS: lista, items, olts · ARGV: olt_id
+# Devuelve {job_id, payload} ('' si el payload expiró) o nil si la cola está vacía
+_POP = """
+local job_id = redis.call('LPOP', KEYS[1])
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[3], ARGV[1])
+end
+if not job_id then
+    return nil
+end
+local payload = redis.call('HGET', KEYS[2], job_id) or ''
+redis.call('HDEL', KEYS[2], job_id)
+return {job_id, payload}
+"""
+
+_scripts = {}
+
+
+def _script(name, source):
+    if name not in _scripts:
+        _scripts[name] = redis_client.register_script(source)
+    return _scripts[name]
+
+
+def _keys(olt_id):
+    return [f"{QUEUE_PREFIX}:{olt_id}", f"{QUEUE_PREFIX}:{olt_id}:items", QUEUED_OLTS_KEY]
+
+
+def park(olt_id, snmp_job_id, execution_id, queue_name):
+    """
+    Estaciona la ejecución en la cola de la OLT.
+
+    Returns:
+        tuple: (True, largo de la cola) si quedó en cola, o
+               (False, execution_id estacionada) si se fusionó con ella
+    """
+    payload = json.dumps({'execution_id': execution_id, 'queue_name': queue_name})
+    parked, value = _script('park', _PARK)(
+        keys=_keys(olt_id), args=[snmp_job_id, payload, QUEUE_TTL, olt_id]
+    )
+    if parked:
+        return True, int(value)
+    return False, json.loads(value)['execution_id']
+
+
+def pop(olt_id):
+    """
+    Saca la siguiente entrada de la cola de la OLT.
+
+    Returns:
+        tuple | None: (snmp_job_id, execution_id, queue_name) o None si está vacía
+    """
+    while True:
+        entry = _script('pop', _POP)(keys=_keys(olt_id), args=[olt_id])
+        if not entry:
+            return None
+        job_id, payload = entry
+        if payload:
+            item = json.loads(payload)
+            return int(job_id), item['execution_id'], item['queue_name']
+        # Entrada sin payload (expiró el hash): seguir con la próxima
+
+
+def queued_olts():
+    """OLTs con trabajo estacionado"""
+    return [int(olt_id) for olt_id in redis_client.smembers(QUEUED_OLTS_KEY)]
+
+
+def queue_length(olt_id):
+    return redis_client.llen(_keys(olt_id)[0])
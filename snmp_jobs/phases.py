@@ -0,0 +1,113 @@
+"""
+Fases de programación: reparte las ejecuciones de un job a lo largo de su intervalo.
+
+En modo 'aligned' (comportamiento original) todas las OLTs de todos los jobs
+vencidos se encolan en el mismo tick. En modo 'spread' cada par (job, OLT)
+tiene un desfase determinístico dentro de la ventana del intervalo, y las
+ejecuciones de distintos jobs sobre la misma OLT se separan al menos
+schedule_olt_stagger_seconds. El dispatcher aplica el desfase como countdown
+de Celery, así la cadencia de cada (job, OLT) sigue siendo exactamente el
+intervalo del job.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+
+SCHEDULING_MODE_ALIGNED = 'aligned'
+SCHEDULING_MODE_SPREAD = 'spread'
+DEFAULT_INTERVAL_SECONDS = 300
+
+
+def job_interval_seconds(job):
+    """Intervalo nominal del job en segundos (interval_raw o distancia entre dos disparos cron)"""
+    seconds = job.interval_seconds or job._calculate_interval_seconds()
+    if seconds:
+        return seconds
+
+    if job.cron_expr and job.cron_expr.strip():
+        try:
+            from croniter import croniter
+            from django.utils import timezone
+
+            cron = croniter(job.cron_expr, timezone.now())
+            first = cron.get_next(datetime)
+            return int((cron.get_next(datetime) - first).total_seconds())
+        except Exception:
+            pass
+
+    return DEFAULT_INTERVAL_SECONDS
+
+
+def phase_fraction(job_id, olt_id):
+    """Fracción estable en [0, 1) para el par (job, OLT); no depende de PYTHONHASHSEED"""
+    digest = hashlib.blake2b(f"{job_id}:{olt_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def spread_window_seconds(job):
+    """Ventana sobre la que se reparten las fases del job"""
+    from configuracion_avanzada.services import get_schedule_spread_ratio, get_schedule_spread_max_seconds
+
+    window = job_interval_seconds(job) * float(get_schedule_spread_ratio())
+    return max(0.0, min(window, float(get_schedule_spread_max_seconds())))
+
+
+def assign_phase_offsets(entries):
+    """
+    Calcula el desfase (segundos) de cada ejecución de un tick.
+
+    Args:
+        entries: Lista de (job, olt_id)
+
+    Returns:
+        list: Desfase en segundos por entrada, en el mismo orden (todo 0 en modo aligned)
+    """
+    from configuracion_avanzada.services import get_scheduling_mode, get_schedule_olt_stagger_seconds
+
+    if get_scheduling_mode() != SCHEDULING_MODE_SPREAD or not entries:
+        return [0] * len(entries)
+
+    stagger = float(get_schedule_olt_stagger_seconds())
+    windows = {}
+    by_olt = defaultdict(list)
+    for position, (job, olt_id) in enumerate(entries):
+        if job.id not in windows:
+            windows[job.id] = spread_window_seconds(job)
+        by_olt[olt_id].append((phase_fraction(job.id, olt_id) * windows[job.id], position, job.id))
+
+    offsets = [0] * len(entries)
+    for olt_id, phases in by_olt.items():
+        # Escalonado por OLT: dos jobs sobre la misma OLT no arrancan a menos de `stagger`
+        previous = None
+        for base, position, job_id in sorted(phases):
+            offset = base if previous is None else max(base, previous + stagger)
+            offset = min(offset, windows[job_id])
+            offsets[position] = round(offset, 3)
+            previous = offset
+
+    return offsets
+
+
+def describe_job_phases(job, olt_ids):
+    """Texto para el admin con el rango de fases del job sobre sus OLTs"""
+    from configuracion_avanzada.services import get_scheduling_mode
+
+    if get_scheduling_mode() != SCHEDULING_MODE_SPREAD:
+        return "Alineada"
+    if not olt_ids:
+        return "-"
+
+    window = spread_window_seconds(job)
+    phases = sorted(phase_fraction(job.id, olt_id) * window for olt_id in olt_ids)
+    return f"+{_format_seconds(phases[0])} → +{_format_seconds(phases[-1])} (ventana {_format_seconds(window)})"
+
+
+def _format_seconds(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
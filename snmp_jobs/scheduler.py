@@ -0,0 +1,240 @@
+"""
+Scheduler en memoria para los SnmpJob (alternativa al polling de beat cada 10s).
+
+Mantiene un min-heap de (next_run_at, job_id) y duerme exactamente hasta el
+próximo vencimiento. Los cambios de jobs llegan por un canal pub/sub de Redis
+que publica SnmpJob.save() (y por lo tanto enable_from_now), así que en reposo
+no consulta la BD.
+
+Mientras el scheduler está vivo renueva un heartbeat en Redis y el tick
+periódico de beat (dispatcher_check_and_enqueue) se salta; si el proceso se
+cae, el heartbeat expira y beat vuelve a despachar solo.
+"""
+import heapq
+import json
+import logging
+import time
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_CHANNEL = "snmp:scheduler:jobs"
+SCHEDULER_HEARTBEAT_KEY = "snmp:scheduler:heartbeat"
+SCHEDULER_HEARTBEAT_TTL = 15  # segundos
+SCHEDULABLE_JOB_TYPES = ('descubrimiento', 'get')
+
+
+def _redis():
+    from snmp_jobs.tasks import redis_client
+    return redis_client
+
+
+def publish_job_change(job_id, reason='save'):
+    """Notifica al scheduler que un job cambió (alta, edición, habilitar/deshabilitar)"""
+    try:
+        _redis().publish(SCHEDULER_CHANNEL, json.dumps({'job_id': job_id, 'reason': reason}))
+    except Exception as e:
+        # Sin Redis el scheduler lo recoge en la siguiente resincronización completa
+        logger.warning(f"⚠️ No se pudo notificar cambio del job {job_id} al scheduler: {e}")
+
+
+def is_scheduler_active():
+    """True si hay un scheduler en memoria con heartbeat vigente"""
+    try:
+        return bool(_redis().exists(SCHEDULER_HEARTBEAT_KEY))
+    except Exception:
+        return False
+
+
+class JobHeapScheduler:
+    """
+    Min-heap de vencimientos con borrado perezoso: cada job tiene un único
+    vencimiento vigente en _deadlines; las entradas del heap que no coinciden
+    se descartan al llegar al tope.
+    """
+
+    def __init__(self, redis_client=None, resync_interval=300, retry_delay=None):
+        from configuracion_avanzada.services import get_dispatcher_interval
+
+        self.redis = redis_client or _redis()
+        self.resync_interval = resync_interval
+        # Jobs que siguen vencidos tras un tick (p. ej. ejecución manual pendiente)
+        # se reintentan con la misma cadencia que tenía beat
+        self.retry_delay = retry_delay or get_dispatcher_interval()
+
+        self._heap = []
+        self._deadlines = {}
+        self._last_resync = 0.0
+        self._pubsub = None
+
+    # ------------------------------------------------------------------ heap
+
+    def _set_deadline(self, job_id, deadline_ts):
+        self._deadlines[job_id] = deadline_ts
+        heapq.heappush(self._heap, (deadline_ts, job_id))
+
+    def _drop(self, job_id):
+        self._deadlines.pop(job_id, None)
+
+    def _apply_rows(self, rows, now_ts):
+        """Carga en el heap filas (id, enabled, job_type, next_run_at); devuelve los jobs vigentes"""
+        from snmp_jobs.models import SnmpJob
+
+        loaded = set()
+        for job_id, enabled, job_type, next_run_at in rows:
+            if not enabled or job_type not in SCHEDULABLE_JOB_TYPES:
+                self._drop(job_id)
+                continue
+            if next_run_at is None:
+                next_run_at = SnmpJob.objects.get(pk=job_id).calculate_next_run()
+            deadline_ts = next_run_at.timestamp()
+            if deadline_ts <= now_ts and self._deadlines.get(job_id, 0) > now_ts:
+                # Sigue vencido tras despacharlo: no reintentar en bucle
+                deadline_ts = self._deadlines[job_id]
+            if self._deadlines.get(job_id) != deadline_ts:
+                self._set_deadline(job_id, deadline_ts)
+            loaded.add(job_id)
+        return loaded
+
+    def load_all(self):
+        """Reconstruye el heap con todos los jobs habilitados (una sola consulta)"""
+        from snmp_jobs.models import SnmpJob
+
+        rows = SnmpJob.objects.filter(
+            enabled=True, job_type__in=SCHEDULABLE_JOB_TYPES
+        ).values_list('id', 'enabled', 'job_type', 'next_run_at')
+
+        self._heap, self._deadlines = [], {}
+        self._apply_rows(rows, time.time())
+        self._last_resync = time.monotonic()
+        logger.info(f"🗓️ Scheduler: {len(self._deadlines)} jobs cargados en el heap")
+
+    def refresh_jobs(self, job_ids):
+        """Relee de la BD solo los jobs indicados (eliminados o deshabilitados salen del heap)"""
+        from snmp_jobs.models import SnmpJob
+
+        job_ids = set(job_ids)
+        if not job_ids:
+            return
+        rows = SnmpJob.objects.filter(id__in=job_ids).values_list('id', 'enabled', 'job_type', 'next_run_at')
+        loaded = self._apply_rows(rows, time.time())
+        for job_id in job_ids - loaded:
+            self._drop(job_id)
+
+    def next_deadline(self):
+        """Próximo vencimiento vigente (timestamp) o None si el heap está vacío"""
+        while self._heap:
+            deadline_ts, job_id = self._heap[0]
+            if self._deadlines.get(job_id) == deadline_ts:
+                return deadline_ts
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now_ts):
+        """Saca del heap los jobs vencidos y devuelve sus IDs"""
+        due = []
+        while True:
+            deadline_ts = self.next_deadline()
+            if deadline_ts is None or deadline_ts > now_ts:
+                return due
+            _, job_id = heapq.heappop(self._heap)
+            del self._deadlines[job_id]
+            due.append(job_id)
+
+    # ----------------------------------------------------------------- loop
+
+    def _heartbeat(self):
+        try:
+            self.redis.set(SCHEDULER_HEARTBEAT_KEY, timezone.now().isoformat(), ex=SCHEDULER_HEARTBEAT_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Scheduler: no se pudo renovar heartbeat: {e}")
+
+    def _drain_idle_queues(self):
+        """
+        Drena las colas de OLTs sin lock en cada vuelta: con el scheduler vivo
+        el tick de beat se salta y run_dispatcher_tick solo corre cuando vence
+        algún job, así que el trabajo estacionado en la OLT de un holder caído
+        quedaría PENDING hasta entonces.
+        """
+        from snmp_jobs.tasks import drain_idle_olt_queues
+
+        try:
+            drain_idle_olt_queues()
+        except Exception as e:
+            logger.warning(f"⚠️ Scheduler: no se pudieron drenar las colas de OLTs: {e}")
+
+    def _subscribe(self):
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(SCHEDULER_CHANNEL)
+
+    def _wait_for_changes(self, timeout):
+        """Bloquea hasta timeout segundos o hasta recibir cambios; devuelve los job_ids cambiados"""
+        changed = set()
+        message = self._pubsub.get_message(timeout=max(timeout, 0))
+        while message:
+            try:
+                changed.add(int(json.loads(message['data'])['job_id']))
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"⚠️ Scheduler: mensaje inválido en {SCHEDULER_CHANNEL}: {message['data']!r}")
+            # Drenar lo que ya esté en el buffer sin bloquear
+            message = self._pubsub.get_message(timeout=0)
+        return changed
+
+    def dispatch_due(self, now_ts):
+        """Despacha los jobs vencidos (tick con lease + claim atómico) y los reprograma"""
+        from snmp_jobs.tasks import run_dispatcher_tick
+
+        due = self.pop_due(now_ts)
+        if not due:
+            return 0
+
+        logger.info(f"⏰ Scheduler: {len(due)} jobs vencidos, despachando")
+        run_dispatcher_tick()
+
+        # Provisorio: si el tick no los reclamó, reintentar tras retry_delay
+        retry_ts = time.time() + self.retry_delay
+        for job_id in due:
+            self._set_deadline(job_id, retry_ts)
+        self.refresh_jobs(due)
+        return len(due)
+
+    def run_once(self, max_sleep):
+        """Una vuelta del loop: heartbeat, colas de OLTs, despachar vencidos y dormir hasta el próximo vencimiento"""
+        self._heartbeat()
+        self._drain_idle_queues()
+
+        if time.monotonic() - self._last_resync >= self.resync_interval:
+            # Red de seguridad por cambios que no pasan por save() (QuerySet.update, SQL manual)
+            self.load_all()
+
+        self.dispatch_due(time.time())
+
+        deadline_ts = self.next_deadline()
+        # Despertar a tiempo para renovar el heartbeat aunque no haya vencimientos
+        timeout = min(max_sleep, SCHEDULER_HEARTBEAT_TTL / 3)
+        if deadline_ts is not None:
+            timeout = min(timeout, deadline_ts - time.time())
+
+        changed = self._wait_for_changes(timeout)
+        if changed:
+            logger.debug(f"🔄 Scheduler: refrescando jobs {sorted(changed)}")
+            self.refresh_jobs(changed)
+
+    def run(self, max_sleep=30, stop=None):
+        """Loop principal; stop es un callable opcional que devuelve True para terminar"""
+        self._subscribe()
+        self.load_all()
+        try:
+            while not (stop and stop()):
+                try:
+                    self.run_once(max_sleep)
+                except Exception as e:
+                    logger.error(f"❌ Scheduler: error en el loop: {e}")
+                    time.sleep(1)
+        finally:
+            try:
+                self.redis.delete(SCHEDULER_HEARTBEAT_KEY)
+                self._pubsub.close()
+            except Exception:
+                pass
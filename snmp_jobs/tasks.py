@@ -1,4 +1,6 @@
 import logging
+import time
+from collections import defaultdict
 from datetime import timedelta, datetime
 from django.utils import timezone
 from django.db import transaction
@@ -6,13 +8,15 @@ from celery import shared_task
 from redis.lock import Lock
 from redis import Redis
 from django.conf import settings
-from easysnmp import Session, EasySNMPError
+from easysnmp import EasySNMPError
 from croniter import croniter
-from configuracion_avanzada.services import get_snmp_timeout, get_snmp_retries
+from configuracion_avanzada.services import get_snmp_max_concurrent_queries
 
 from .models import SnmpJob, SnmpJobHost
+from .olt_queue import PARKED
 from executions.models import Execution
 from configuracion_avanzada.services import get_dispatcher_interval, get_max_concurrent_executions, is_retry_system_enabled
+from configuracion_avanzada.services import is_job_fusion_enabled
 
 logger = logging.getLogger(__name__)
 redis_client = Redis.from_url(settings.CELERY_BROKER_URL)
@@ -24,6 +28,92 @@ def get_redis_lock(olt_id, timeout=300):
     lock_key = f"lock:snmp:olt:{olt_id}"
     return Lock(redis_client, lock_key, timeout=timeout)
 
+def park_execution(execution, olt_id, queue_name):
+    """
+    OLT ocupada (lock tomado): estaciona la ejecución en la cola de la OLT en
+    lugar de fallar. Si el mismo job ya está en la cola, la ejecución nueva
+    se fusiona con la estacionada y queda INTERRUPTED.
+    
+    Returns:
+        str: olt_queue.PARKED
+    """
+    from snmp_jobs import olt_queue
+    
+    parked, value = olt_queue.park(olt_id, execution.snmp_job_id, execution.id, queue_name)
+    if parked:
+        execution.status = 'PENDING'
+        execution.result_summary = {'parked': True, 'queue_position': value}
+        execution.save(update_fields=['status', 'result_summary'])
+        logger.info(f"🅿️ OLT {olt_id} ocupada: ejecución {execution.id} en cola (posición {value})")
+    else:
+        execution.status = 'INTERRUPTED'
+        execution.error_message = f"Fusionada con la ejecución {value}, ya en cola para la OLT"
+        execution.finished_at = timezone.now()
+        execution.save(update_fields=['status', 'error_message', 'finished_at'])
+        logger.info(f"🔗 OLT {olt_id} ocupada: ejecución {execution.id} fusionada con la {value} en cola")
+    
+    # El lock pudo liberarse entre el intento y el estacionamiento: nadie más
+    # drenaría la cola (el despacho espera al commit del estado estacionado)
+    if not get_redis_lock(olt_id).locked():
+        drain_olt_queue(olt_id)
+    return olt_queue.PARKED
+
+
+def drain_olt_queue(olt_id):
+    """
+    Despacha la siguiente ejecución estacionada de la OLT (la llama quien
+    libera el lock). Las manuales vuelven a discovery_manual; el resto a
+    discovery_main, con sus reintentos normales.
+    
+    Se publica desde transaction.on_commit: si quien drena tiene una
+    transacción abierta (park_execution), la siguiente ejecución arranca
+    recién con el estado y el inventario confirmados; si la transacción se
+    revierte, la entrada sigue en la cola y la drena el próximo tick. Fuera
+    de una transacción se despacha en el acto.
+    """
+    transaction.on_commit(lambda: _dispatch_next_parked(olt_id), robust=True)
+
+
+def _dispatch_next_parked(olt_id):
+    """
+    Saca la siguiente entrada de la cola de la OLT y publica su tarea.
+    
+    Returns:
+        int | None: execution_id despachada
+    """
+    from snmp_jobs import olt_queue
+    
+    entry = olt_queue.pop(olt_id)
+    if entry is None:
+        return None
+    
+    snmp_job_id, execution_id, queue_name = entry
+    task = discovery_manual_task if queue_name == 'discovery_manual' else discovery_main_task
+    task.delay(snmp_job_id, olt_id, execution_id)
+    logger.info(f"🅿️ OLT {olt_id} liberada: despachando ejecución {execution_id} de la cola")
+    return execution_id
+
+
+def drain_idle_olt_queues():
+    """Drena las colas de OLTs sin lock (holder caído o liberado justo antes de estacionar)"""
+    from snmp_jobs import olt_queue
+    
+    for olt_id in olt_queue.queued_olts():
+        if not get_redis_lock(olt_id).locked():
+            drain_olt_queue(olt_id)
+
+
+def get_dispatcher_lease():
+    """
+    Obtiene el lease de Redis del dispatcher (un solo líder por tick).
+    
+    El TTL es 1.5 × intervalo del dispatcher: si el líder muere a mitad de un
+    tick, el lease expira antes del segundo tick siguiente, así que se pierde
+    como máximo un tick.
+    """
+    ttl = max(1, int(get_dispatcher_interval() * 1.5))
+    return Lock(redis_client, "lock:snmp:dispatcher", timeout=ttl)
+
 def calculate_next_run(interval_raw):
     """
     Calcula el próximo tiempo de ejecución basado en interval_raw
@@ -359,6 +449,177 @@ def cleanup_old_executions_task(self, days_old=7, batch_size=1000):
         logger.error(f"❌ Error durante la limpieza de ejecuciones antiguas: {e}")
         raise self.retry(exc=e, countdown=60, max_retries=3)
 
+DISPATCHER_METRICS_KEY = "metrics:dispatcher"
+DISPATCHER_TICKS_KEY = "metrics:dispatcher:tick_ms"
+DISPATCHER_TICKS_HISTORY = 1000
+
+
+def record_dispatcher_tick(duration_ms, jobs_count, executions_count):
+    """
+    Registra la duración del tick del dispatcher como métrica en Redis:
+    - hash metrics:dispatcher con los datos del último tick
+    - lista metrics:dispatcher:tick_ms con las últimas DISPATCHER_TICKS_HISTORY duraciones
+    """
+    try:
+        pipe = redis_client.pipeline()
+        pipe.hset(DISPATCHER_METRICS_KEY, mapping={
+            'last_tick_ms': duration_ms,
+            'last_tick_at': timezone.now().isoformat(),
+            'last_jobs': jobs_count,
+            'last_executions': executions_count,
+        })
+        pipe.lpush(DISPATCHER_TICKS_KEY, duration_ms)
+        pipe.ltrim(DISPATCHER_TICKS_KEY, 0, DISPATCHER_TICKS_HISTORY - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo registrar métrica del dispatcher: {e}")
+
+
+def claim_ready_jobs(jobs, now):
+    """
+    Reclama atómicamente los jobs listos: mueve last_run_at/next_run_at solo si
+    next_run_at sigue <= now, y devuelve los IDs que efectivamente se reclamaron.
+    
+    Si dos dispatchers se solapan, el segundo ya no encuentra next_run_at <= now
+    para los jobs del primero, así que cada job se encola exactamente una vez.
+    En PostgreSQL es un único UPDATE ... FROM (VALUES ...) RETURNING id.
+    
+    Args:
+        jobs: Jobs listos con job.next_run_at ya recalculado
+        now: Momento del tick
+        
+    Returns:
+        set: IDs de jobs reclamados por este tick
+    """
+    from django.db import connection
+    
+    if not jobs:
+        return set()
+    
+    if connection.vendor != 'postgresql':
+        # Fallback genérico: un compare-and-set por job
+        return {
+            job.id for job in jobs
+            if SnmpJob.objects.filter(
+                pk=job.pk, enabled=True, next_run_at__lte=now
+            ).update(last_run_at=now, next_run_at=job.next_run_at)
+        }
+    
+    values_sql = ', '.join(['(%s::bigint, %s::timestamptz)'] * len(jobs))
+    params = [now]
+    for job in jobs:
+        params.extend([job.id, job.next_run_at])
+    params.append(now)
+    
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {SnmpJob._meta.db_table} AS j
+            SET last_run_at = %s, next_run_at = v.next_run_at
+            FROM (VALUES {values_sql}) AS v(id, next_run_at)
+            WHERE j.id = v.id AND j.enabled AND j.next_run_at <= %s
+            RETURNING j.id
+            """,
+            params
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _main_task_signature(job, olt_id, execution_id):
+    """Firma Celery de la tarea principal según el tipo de job"""
+    if job.job_type == 'descubrimiento':
+        return discovery_main_task.si(job.id, olt_id, execution_id)
+    from snmp_get.tasks import get_main_task
+    return get_main_task.si(job.id, olt_id, execution_id)
+
+
+def _is_fusable(job):
+    """
+    Jobs que pueden ir en una unidad fusionada: discovery y GETs sin
+    run_options (los overrides de un job no se pueden aplicar a una sesión
+    compartida con otros jobs).
+    """
+    return job.job_type == 'descubrimiento' or (job.job_type == 'get' and not job.run_options)
+
+
+def _fused_task_signatures(entries):
+    """
+    Agrupa las ejecuciones del tick por OLT y desfase: si una OLT tiene dos o
+    más jobs fusionables que arrancan en el mismo momento, salen como una
+    sola unidad encadenada (ver _fused_chain). En modo spread cada (job, OLT)
+    conserva su fase: solo se fusionan los jobs con el mismo desfase, así que
+    la fusión no colapsa el reparto de las fases.
+    
+    Args:
+        entries: Lista de ((job, job_host, execution), offset)
+        
+    Returns:
+        tuple: (firmas fusionadas, entries que siguen por separado)
+    """
+    groups = defaultdict(list)
+    for entry in entries:
+        (job, job_host, _), offset = entry
+        if _is_fusable(job):
+            groups[(job_host.olt_id, offset)].append(entry)
+    
+    signatures = []
+    fused = set()
+    for (olt_id, offset), group_entries in groups.items():
+        if len(group_entries) < 2:
+            continue
+        discovery_executions = [
+            (job.id, execution.id) for (job, _, execution), _ in group_entries if job.job_type == 'descubrimiento'
+        ]
+        get_executions = [
+            (job.id, execution.id) for (job, _, execution), _ in group_entries if job.job_type == 'get'
+        ]
+        signatures.append(_fused_chain(olt_id, discovery_executions, get_executions, offset))
+        fused.update(id(entry) for entry in group_entries)
+        logger.info(
+            f"🧩 OLT {olt_id}: {len(discovery_executions)} discovery + {len(get_executions)} GET fusionados en una unidad"
+        )
+    
+    return signatures, [entry for entry in entries if id(entry) not in fused]
+
+
+def _fused_chain(olt_id, discovery_executions, get_executions, offset=0):
+    """
+    Unidad de trabajo fusionada: todos los jobs de la OLT que vencen juntos,
+    en secuencia y sin competir entre sí por el lock ni por el semáforo.
+    
+    1. Discovery primero, cada uno como su propia discovery_main_task (su
+       cola, su time_limit, su lock y sus reintentos), así los GET consultan
+       el inventario recién actualizado
+    2. Los GET en una sola pasada (fused_get_task): una adquisición del
+       semáforo y PDUs multi-varbind con los OIDs de todos los jobs; un único
+       GET va por get_main_task
+    
+    Cada job conserva su Execution y su resumen.
+    
+    Args:
+        olt_id: OLT común
+        discovery_executions: Lista de (snmp_job_id, execution_id) de discovery
+        get_executions: Lista de (snmp_job_id, execution_id) de GET
+        offset: Desfase común (countdown de la primera tarea)
+    """
+    from celery import chain
+    from snmp_get.tasks import fused_get_task, get_main_task
+    
+    tasks = [
+        discovery_main_task.si(snmp_job_id, olt_id, execution_id)
+        for snmp_job_id, execution_id in discovery_executions
+    ]
+    if len(get_executions) == 1:
+        snmp_job_id, execution_id = get_executions[0]
+        tasks.append(get_main_task.si(snmp_job_id, olt_id, execution_id))
+    elif get_executions:
+        tasks.append(fused_get_task.si(olt_id, get_executions))
+    
+    if offset:
+        tasks[0].set(countdown=offset)
+    return chain(*tasks)
+
+
 @shared_task
 def dispatcher_check_and_enqueue():
     """
@@ -368,9 +629,65 @@ def dispatcher_check_and_enqueue():
     1. Se ejecuta cada X segundos via Celery Beat (configurable)
     2. Solo procesa jobs que están listos (next_run_at <= now)
     3. Respeta intervalos (30s, 5m, 1h, 1d) y expresiones cron
-    4. Actualiza next_run_at SOLO después de encolar la tarea
+    4. Actualiza next_run_at SOLO después de crear las ejecuciones
     5. Soporta job_type: 'descubrimiento' y 'get'
+    6. Si corre el scheduler en memoria (run_snmp_scheduler), el tick de beat
+       no hace nada: queda solo como respaldo si el scheduler se cae
+    
+    Sin N+1: los jobs listos (con su chequeo de ejecuciones manuales pendientes)
+    salen de una sola consulta anotada y sus hosts de un prefetch con
+    select_related('olt'); las ejecuciones se crean con un bulk_create y las
+    tareas se publican como un group de Celery.
+    
+    Exactly-once: solo corre el tick que tiene el lease de Redis, y además cada
+    job se reclama con un UPDATE condicional (claim_ready_jobs) antes de crear
+    sus ejecuciones.
+    """
+    from snmp_jobs.scheduler import is_scheduler_active
+    
+    # Si el scheduler en memoria (manage.py run_snmp_scheduler) está vivo, él despacha
+    if is_scheduler_active():
+        logger.debug("⏭️ Dispatcher: scheduler en memoria activo, saltando tick de beat")
+        return
+    
+    run_dispatcher_tick()
+
+
+def run_dispatcher_tick():
     """
+    Ejecuta un tick del dispatcher con el lease de Redis tomado.
+    Lo usan la tarea periódica de beat y el scheduler en memoria.
+    """
+    tick_start = time.perf_counter()
+    
+    # Un solo dispatcher a la vez: si otro tick (u otro beat) tiene el lease, saltar
+    lease = get_dispatcher_lease()
+    try:
+        if not lease.acquire(blocking=False):
+            logger.info("⏭️ Dispatcher: otro tick tiene el lease, saltando")
+            return
+    except Exception as e:
+        logger.error(f"❌ Dispatcher: no se pudo obtener el lease de Redis: {e}")
+        return
+    
+    try:
+        _dispatch_ready_jobs(lease, tick_start)
+        drain_idle_olt_queues()
+    finally:
+        try:
+            lease.release()
+        except Exception as e:
+            # El lease ya expiró (tick más largo que el TTL); el claim atómico evita duplicados
+            logger.warning(f"⚠️ Dispatcher: no se pudo liberar el lease: {e}")
+
+
+def _dispatch_ready_jobs(lease, tick_start):
+    """Cuerpo del tick del dispatcher (se ejecuta con el lease tomado)"""
+    from celery import group
+    from django.db.models import Exists, OuterRef, Prefetch
+    from snmp_jobs.phases import assign_phase_offsets
+    from snmp_client.breaker import DECISION_PROBE, DECISION_RUN, dispatch_decision
+    
     logger.info("🔍 Dispatcher Inteligente: Revisando tareas habilitadas...")
     
     now = timezone.now()
@@ -380,78 +697,125 @@ def dispatcher_check_and_enqueue():
     now_lima = now.astimezone(lima_tz)
     logger.info(f"⏰ Hora actual (Perú): {now_lima.strftime('%Y-%m-%d %H:%M:%S')} (UTC: {now.strftime('%Y-%m-%d %H:%M:%S')})")
     
-    # Buscar jobs listos para ejecutar (SOLO automáticos, NO manuales)
-    # Incluir tanto 'descubrimiento' como 'get'
-    all_ready_jobs = SnmpJob.objects.filter(
-        enabled=True,  # ← CRÍTICO: Solo jobs habilitados
-        job_type__in=['descubrimiento', 'get'],  # Soportar ambos tipos
-        next_run_at__lte=now
+    # Jobs listos para ejecutar (SOLO automáticos), excluyendo los que tienen
+    # ejecuciones manuales pendientes, con sus hosts habilitados y OLTs precargadas
+    manual_pending = Execution.objects.filter(
+        snmp_job_id=OuterRef('pk'),
+        status__in=['PENDING', 'RUNNING'],
+        requested_by__isnull=False
+    )
+    ready_jobs = list(
+        SnmpJob.objects.filter(
+            enabled=True,  # ← CRÍTICO: Solo jobs habilitados
+            job_type__in=['descubrimiento', 'get'],  # Soportar ambos tipos
+            next_run_at__lte=now
+        ).annotate(
+            manual_pending=Exists(manual_pending)
+        ).filter(
+            manual_pending=False
+        ).prefetch_related(
+            Prefetch(
+                'job_hosts',
+                queryset=SnmpJobHost.objects.filter(enabled=True).select_related('olt'),
+                to_attr='enabled_job_hosts'
+            )
+        )
     )
-    
-    # Filtrar manualmente para excluir jobs con ejecuciones manuales pendientes
-    ready_jobs = []
-    for job in all_ready_jobs:
-        # Verificar si tiene ejecuciones manuales pendientes
-        manual_pending = Execution.objects.filter(
-            snmp_job=job,
-            status__in=['PENDING', 'RUNNING'],
-            requested_by__isnull=False
-        ).exists()
-        
-        if not manual_pending:
-            ready_jobs.append(job)
     
     logger.info(f"📊 Jobs listos para ejecutar: {len(ready_jobs)}")
     
-    total_created = 0
+    if not ready_jobs:
+        record_dispatcher_tick(int((time.perf_counter() - tick_start) * 1000), 0, 0)
+        return
+    
+    # Armar todas las ejecuciones (AUTOMÁTICAS - sin requested_by)
+    pending = []  # (job, job_host, execution)
+    breaker_decisions = {}  # olt_id → decisión del circuit breaker (una por tick)
     for job in ready_jobs:
-        logger.info(f"📋 Procesando job: {job.nombre} (Tipo: {job.job_type})")
-        logger.info(f"   Intervalo raw: {job.interval_raw}")
-        logger.info(f"   Cron expr: {job.cron_expr}")
-        logger.info(f"   Next run actual: {job.next_run_at}")
-        
-        # Obtener job_hosts habilitados para este job
-        job_hosts = job.job_hosts.filter(enabled=True)
-        logger.info(f"📡 Job hosts habilitados: {job_hosts.count()}")
-        
-        executions_created = 0
-        for job_host in job_hosts:
-            if job_host.olt.habilitar_olt:
-                # Crear registro de ejecución (AUTOMÁTICA - sin requested_by)
-                execution = Execution.objects.create(
-                    snmp_job=job,
-                    job_host=job_host,
-                    olt=job_host.olt,
-                    status='PENDING',
-                    attempt=0  # Tarea principal siempre es attempt 0
-                    # requested_by=None (implícito) - Ejecución automática
-                )
-                
-                logger.info(f"✅ Creada ejecución: {execution.id} para OLT {job_host.olt.abreviatura}")
-                
-                # Encolar la tarea según el tipo de job
-                if job.job_type == 'descubrimiento':
-                    task_result = discovery_main_task.delay(job.id, job_host.olt.id, execution.id)
-                    logger.info(f"🔍 Tarea DISCOVERY encolada: {task_result.id} en cola discovery_main")
-                elif job.job_type == 'get':
-                    from snmp_get.tasks import get_main_task
-                    task_result = get_main_task.delay(job.id, job_host.olt.id, execution.id)
-                    logger.info(f"📥 Tarea GET encolada: {task_result.id} en cola get_main")
-                
-                executions_created += 1
-                total_created += 1
-            else:
+        logger.info(f"📋 Procesando job: {job.nombre} (Tipo: {job.job_type}) | Intervalo: {job.interval_raw} | Cron: {job.cron_expr} | Next run: {job.next_run_at}")
+        logger.info(f"📡 Job hosts habilitados: {len(job.enabled_job_hosts)}")
+        
+        for job_host in job.enabled_job_hosts:
+            if not job_host.olt.habilitar_olt:
                 logger.warning(f"⚠️ OLT {job_host.olt.abreviatura} está deshabilitada, saltando")
+                continue
+            
+            # Circuit breaker: OLT que no responde → sin ejecuciones (a lo sumo una sonda)
+            if job_host.olt_id not in breaker_decisions:
+                breaker_decisions[job_host.olt_id] = dispatch_decision(job_host.olt_id)
+            if breaker_decisions[job_host.olt_id] != DECISION_RUN:
+                logger.warning(f"🔴 OLT {job_host.olt.abreviatura} con circuito abierto, saltando")
+                continue
+            
+            pending.append((job, job_host, Execution(
+                snmp_job=job,
+                job_host=job_host,
+                olt=job_host.olt,
+                status='PENDING',
+                attempt=0  # Tarea principal siempre es attempt 0
+            )))
         
-        # ACTUALIZAR last_run_at y next_run_at DESPUÉS de encolar
+        # Calcular last_run_at y next_run_at (se aplican al reclamar el job)
         job.last_run_at = now
         job.next_run_at = calculate_next_run(job)  # Usar la nueva función inteligente
-        job.save(update_fields=['last_run_at', 'next_run_at'])
+    
+    # Renovar el lease antes de escribir por si la consulta fue lenta
+    lease.reacquire()
+    
+    with transaction.atomic():
+        claimed_ids = claim_ready_jobs(ready_jobs, now)
+        if len(claimed_ids) < len(ready_jobs):
+            logger.warning(f"⚠️ {len(ready_jobs) - len(claimed_ids)} jobs ya fueron reclamados por otro dispatcher, saltando")
+            ready_jobs = [job for job in ready_jobs if job.id in claimed_ids]
+            pending = [entry for entry in pending if entry[0].id in claimed_ids]
         
+        Execution.objects.bulk_create([execution for _, _, execution in pending])
+    
+    # Publicar todas las tareas principales de una vez (después del commit).
+    # En modo spread cada (job, OLT) sale con su desfase como countdown.
+    if pending:
+        offsets = assign_phase_offsets([(job, job_host.olt_id) for job, job_host, _ in pending])
+        signatures = []
+        entries = list(zip(pending, offsets))
+        if is_job_fusion_enabled():
+            fused_signatures, entries = _fused_task_signatures(entries)
+            signatures.extend(fused_signatures)
+        for (job, job_host, execution), offset in entries:
+            signature = _main_task_signature(job, job_host.olt_id, execution.id)
+            if offset:
+                signature.set(countdown=offset)
+            signatures.append(signature)
+        group(signatures).apply_async()
+        if any(offsets):
+            logger.info(f"🌊 Ejecuciones repartidas en fases de 0 a {max(offsets):.0f}s")
+    
+    # Una sola sonda por OLT con el breaker en su turno de half_open
+    for olt_id, decision in breaker_decisions.items():
+        if decision == DECISION_PROBE:
+            logger.info(f"📡 OLT {olt_id}: enviando sonda de alcanzabilidad")
+            olt_probe_task.delay(olt_id)
+    
+    for job in ready_jobs:
         logger.info(f"⏰ Próxima ejecución de {job.nombre}: {job.next_run_at.strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info(f"📊 Ejecuciones creadas para {job.nombre}: {executions_created}")
     
-    logger.info(f"✅ Dispatcher completado. Total ejecuciones creadas: {total_created}")
+    tick_ms = int((time.perf_counter() - tick_start) * 1000)
+    record_dispatcher_tick(tick_ms, len(ready_jobs), len(pending))
+    
+    logger.info(f"✅ Dispatcher completado en {tick_ms}ms. Total ejecuciones creadas: {len(pending)}")
+
+@shared_task(queue='discovery_main', time_limit=30)
+def olt_probe_task(olt_id):
+    """
+    Sonda de alcanzabilidad de una OLT con el circuit breaker abierto:
+    un GET de sysUpTime.0. Si responde, el breaker se cierra y el próximo
+    tick del dispatcher vuelve a crear ejecuciones para la OLT.
+    """
+    from hosts.models import OLT
+    from snmp_client.breaker import probe_olt
+    
+    olt = OLT.objects.get(pk=olt_id)
+    return probe_olt(olt)
+
 
 @shared_task(queue='discovery_main', bind=True, time_limit=180, autoretry_for=(Exception,), retry_kwargs={'max_retries': 0})
 def discovery_main_task(self, snmp_job_id, olt_id, execution_id):
@@ -463,7 +827,9 @@ def discovery_main_task(self, snmp_job_id, olt_id, execution_id):
     logger.info(f"🚀 discovery_main_task: Iniciando para job {snmp_job_id}, OLT {olt_id}, execution {execution_id}")
     
     try:
-        execute_discovery(snmp_job_id, olt_id, execution_id, queue_name='discovery_main')
+        if execute_discovery(snmp_job_id, olt_id, execution_id, queue_name='discovery_main') == PARKED:
+            logger.info(f"🅿️ discovery_main_task: OLT ocupada, ejecución en cola")
+            return
         logger.info(f"✅ discovery_main_task: Completada exitosamente")
     except Exception as exc:
         # Log del error sin traceback para mantener logs limpios
@@ -487,8 +853,12 @@ def discovery_main_task(self, snmp_job_id, olt_id, execution_id):
                     execution.duration_ms = int((execution.finished_at - execution.started_at).total_seconds() * 1000)
                 execution.save()
             
+            from snmp_client.breaker import allows_requests
+            
             # SOLO enviar reintentos si NO es ejecución manual
-            if execution.requested_by is None:  # Ejecución automática (sin usuario)
+            if not allows_requests(olt_id):
+                logger.info(f"🔴 OLT {olt_id} con circuito abierto - NO se envían reintentos")
+            elif execution.requested_by is None:  # Ejecución automática (sin usuario)
                 # Enviar reintento con delay de 30s
                 discovery_retry_task.apply_async(
                     args=[snmp_job_id, olt_id, execution_id, 1],
@@ -514,7 +884,9 @@ def discovery_manual_task(self, snmp_job_id, olt_id, execution_id):
     logger.info(f"🚀 discovery_manual_task: Ejecución manual para job {snmp_job_id}, OLT {olt_id}, execution {execution_id}")
     
     try:
-        execute_discovery(snmp_job_id, olt_id, execution_id, queue_name='discovery_manual')
+        if execute_discovery(snmp_job_id, olt_id, execution_id, queue_name='discovery_manual') == PARKED:
+            logger.info(f"🅿️ discovery_manual_task: OLT ocupada, ejecución en cola")
+            return
         logger.info(f"✅ discovery_manual_task: Completada exitosamente")
     except Exception as exc:
         logger.error(f"❌ discovery_manual_task: {str(exc)}")
@@ -582,6 +954,18 @@ def discovery_retry_task(self, snmp_job_id, olt_id, execution_id, retry_number):
             execution.finished_at = timezone.now()
             execution.save()
             return
+        
+        # Verificar si la OLT tiene el circuito abierto (no responde)
+        from snmp_client.breaker import allows_requests
+        if not allows_requests(olt_id):
+            logger.info(f"🛑 Reintento {retry_number} cancelado: OLT '{olt.abreviatura}' con circuito abierto")
+            execution = Execution.objects.get(pk=execution_id)
+            execution.status = 'INTERRUPTED'
+            execution.error_message = f"OLT {olt.abreviatura} no responde (circuito abierto) durante reintento {retry_number}"
+            from django.utils import timezone
+            execution.finished_at = timezone.now()
+            execution.save()
+            return
             
     except Exception as check_exc:
         logger.error(f"❌ Error verificando estado en reintento {retry_number}: {check_exc}")
@@ -609,7 +993,10 @@ def discovery_retry_task(self, snmp_job_id, olt_id, execution_id, retry_number):
         
         logger.info(f"🔄 Creada nueva ejecución {retry_execution.id} para reintento {retry_number}")
         
-        execute_discovery(snmp_job_id, olt_id, retry_execution.id, queue_name='discovery_retry')
+        if execute_discovery(snmp_job_id, olt_id, retry_execution.id, queue_name='discovery_retry') == PARKED:
+            # Corre al liberarse la OLT (vía discovery_main, con su propia cadena de reintentos)
+            logger.info(f"🅿️ discovery_retry_task: OLT ocupada, reintento {retry_number} en cola")
+            return
         
         # Verificar el estado real de la nueva ejecución después de execute_discovery
         retry_execution.refresh_from_db()
@@ -666,222 +1053,255 @@ def execute_discovery(snmp_job_id, olt_id, execution_id, queue_name='discovery_m
     Ejecuta el descubrimiento SNMP para una OLT específica
     Maneja diferentes tipos de job: descubrimiento, walk, get, etc.
     
+    Tres etapas, para no tener una transacción abierta mientras se espera a
+    la OLT:
+    1. Transacción corta: toma la ejecución (select_for_update), el lock de
+       la OLT y la marca RUNNING
+    2. Sin transacción: el walk, que va al staging a medida que llega
+    3. Transacción corta: merge del staging (process_staged_walk) y estado
+       final de la ejecución
+    El lock se libera y la cola de la OLT se drena después del commit, así la
+    siguiente ejecución estacionada ve el merge confirmado.
+    
     Args:
         queue_name: 'discovery_main', 'discovery_retry', o 'manual_execution'
                    Si es 'manual_execution', NO se envían reintentos
+    
+    Returns:
+        PARKED si la OLT estaba ocupada y la ejecución quedó en su cola
+        (ver park_execution); None en otro caso
     """
-    try:
-        logger.info(f"🔍 execute_discovery INICIO - Job: {snmp_job_id}, OLT: {olt_id}, Exec: {execution_id}, Queue: {queue_name}")
+    from snmp_client.breaker import is_unreachable_error, record_failure, record_success
+    
+    logger.info(f"🔍 execute_discovery INICIO - Job: {snmp_job_id}, OLT: {olt_id}, Exec: {execution_id}, Queue: {queue_name}")
+    
+    with transaction.atomic():
+        execution = Execution.objects.select_for_update().get(pk=execution_id)
         
-        with transaction.atomic():
-            execution = Execution.objects.select_for_update().get(pk=execution_id)
-            
-            logger.info(f"🔍 execute_discovery OBJETOS OBTENIDOS - Job: {execution.snmp_job.nombre}, OLT: {execution.olt.abreviatura}, Status: {execution.status}")
-            
-            # Si ya está completada, salir
-            if execution.status in ['SUCCESS', 'FAILED']:
-                logger.info(f"🔍 execute_discovery SALIDA - Ejecución ya completada: {execution.status}")
-                return
-            
-            olt = execution.olt
-            job = execution.snmp_job
-            
-            # Obtener job_host si no existe
-            if not execution.job_host:
-                job_host, created = SnmpJobHost.objects.get_or_create(
-                    snmp_job=job,
-                    olt=olt,
-                    defaults={'enabled': True, 'consecutive_failures': 0}
-                )
-                execution.job_host = job_host
-                execution.save()
-            else:
-                job_host = execution.job_host
+        logger.info(f"🔍 execute_discovery OBJETOS OBTENIDOS - Job: {execution.snmp_job.nombre}, OLT: {execution.olt.abreviatura}, Status: {execution.status}")
+        
+        # Si ya está completada, salir
+        if execution.status in ['SUCCESS', 'FAILED']:
+            logger.info(f"🔍 execute_discovery SALIDA - Ejecución ya completada: {execution.status}")
+            return
+        
+        olt = execution.olt
+        job = execution.snmp_job
+        
+        # Obtener job_host si no existe
+        if not execution.job_host:
+            job_host, created = SnmpJobHost.objects.get_or_create(
+                snmp_job=job,
+                olt=olt,
+                defaults={'enabled': True, 'consecutive_failures': 0}
+            )
+            execution.job_host = job_host
+            execution.save()
+        else:
+            job_host = execution.job_host
 
-            # Verificar que la OLT esté habilitada ANTES y DURANTE la ejecución
-            if not job_host.enabled or not olt.habilitar_olt:
-                logger.info(f"🔍 execute_discovery OLT DESHABILITADA - {olt.abreviatura}")
-                execution.status = 'FAILED'
-                execution.error_message = f"OLT {olt.abreviatura} deshabilitada"
-                execution.finished_at = timezone.now()
-                execution.save()
-                return
+        # Verificar que la OLT esté habilitada ANTES y DURANTE la ejecución
+        if not job_host.enabled or not olt.habilitar_olt:
+            logger.info(f"🔍 execute_discovery OLT DESHABILITADA - {olt.abreviatura}")
+            execution.status = 'FAILED'
+            execution.error_message = f"OLT {olt.abreviatura} deshabilitada"
+            execution.finished_at = timezone.now()
+            execution.save()
+            return
+        
+        # Intentar obtener lock de Redis; si la OLT está ocupada, a su cola
+        lock = get_redis_lock(olt.id)
+        if not lock.acquire(blocking=False):
+            logger.warning(f"🔍 execute_discovery LOCK NO DISPONIBLE - {olt.abreviatura}")
+            return park_execution(execution, olt.id, queue_name)
+        
+        logger.info(f"🔍 execute_discovery LOCK OBTENIDO - {olt.abreviatura}")
+        
+        try:
+            # Marcar como en ejecución
+            execution.status = 'RUNNING'
+            execution.started_at = timezone.now()
+            execution.worker_name = queue_name
+            # NO modificar attempt aquí - ya fue establecido correctamente:
+            # - Ejecuciones principales: attempt=0 (dispatcher)
+            # - Reintentos: attempt=retry_number (discovery_retry_task)
+            execution.save()
+        except Exception:
+            lock.release()
+            raise
+    
+    service = None
+    try:
+        logger.info(f"🔍 execute_discovery EJECUTANDO - Status: RUNNING, Attempt: {execution.attempt}")
 
-            # Intentar obtener lock de Redis
-            lock = get_redis_lock(olt.id)
-            if not lock.acquire(blocking=False):
-                logger.warning(f"🔍 execute_discovery LOCK NO DISPONIBLE - {olt.abreviatura}")
-                raise Exception("Lock no disponible")
-            
-            logger.info(f"🔍 execute_discovery LOCK OBTENIDO - {olt.abreviatura}")
-            
-            try:
-                # Marcar como en ejecución
-                execution.status = 'RUNNING'
-                execution.started_at = timezone.now()
-                execution.worker_name = queue_name
-                # NO modificar attempt aquí - ya fue establecido correctamente:
-                # - Ejecuciones principales: attempt=0 (dispatcher)
-                # - Reintentos: attempt=retry_number (discovery_retry_task)
-                execution.save()
-                
-                logger.info(f"🔍 execute_discovery EJECUTANDO - Status: RUNNING, Attempt: {execution.attempt}")
+        # Verificar nuevamente que la OLT siga habilitada durante la ejecución
+        olt.refresh_from_db()
+        if not olt.habilitar_olt:
+            logger.info(f"OLT {olt.abreviatura} fue deshabilitada durante la ejecución, cancelando")
+            execution.status = 'FAILED'
+            execution.error_message = f"OLT {olt.abreviatura} deshabilitada durante ejecución"
+            execution.finished_at = timezone.now()
+            execution.save()
+            return
 
-                # Verificar nuevamente que la OLT siga habilitada durante la ejecución
-                olt.refresh_from_db()
-                if not olt.habilitar_olt:
-                    logger.info(f"OLT {olt.abreviatura} fue deshabilitada durante la ejecución, cancelando")
-                    execution.status = 'FAILED'
-                    execution.error_message = f"OLT {olt.abreviatura} deshabilitada durante ejecución"
-                    execution.finished_at = timezone.now()
-                    execution.save()
-                    return
-
-                # Ejecutar según el tipo de job
-                if job.job_type == 'descubrimiento':
-                    # Usar la nueva lógica de descubrimiento
-                    from discovery.services import execute_discovery_task, process_successful_discovery
-                    
-                    # Ejecutar walk y obtener resultados en memoria
-                    discovery_results = execute_discovery_task(execution_id)
-                    
-                    # Verificar si el walk fue exitoso
-                    if discovery_results.get('walk_successful', False) and not discovery_results.get('errors'):
-                        # SOLO si es exitoso, procesar y actualizar base de datos
-                        memory_data = discovery_results.get('memory_data', [])
-                        if memory_data:
-                            processing_results = process_successful_discovery(execution_id, memory_data)
-                            # Combinar resultados
-                            discovery_results.update(processing_results)
-                        
-                        # Marcar ejecución como exitosa
-                        execution.status = 'SUCCESS'
-                        logger.info(f"✅ Tarea descubrimiento SUCCESS - Datos procesados y guardados")
-                    else:
-                        # Si hay errores, marcar como FAILED
-                        execution.status = 'FAILED'
-                        execution.error_message = '; '.join(discovery_results.get('errors', ['Error desconocido en walk']))
-                        logger.error(f"❌ Tarea descubrimiento FAILED - No se procesaron datos")
-                    
-                    # Crear resumen serializable (solo tipos básicos)
-                    safe_summary = {
-                        'walk_successful': discovery_results.get('walk_successful', False),
-                        'total_found': discovery_results.get('total_found', 0),
-                        'enabled_count': discovery_results.get('enabled_count', 0),
-                        'disabled_count': discovery_results.get('disabled_count', 0),
-                        'new_index_created': discovery_results.get('new_index_created', 0),
-                        'errors': discovery_results.get('errors', []),
-                        'duration_ms': discovery_results.get('duration_ms', 0)
-                    }
-                    
-                    execution.result_summary = safe_summary
-                    execution.raw_output = {
-                        'job_type': 'descubrimiento',
-                        'olt_id': olt.id,
-                        'olt_name': olt.abreviatura,
-                        'task_oid': job.oid.oid,
-                        'discovery_results': safe_summary  # Solo datos serializables
-                    }
-                else:
-                    # Lógica tradicional para otros tipos de job (walk, get, etc.)
-                    session = Session(
-                        hostname=olt.ip_address, 
-                        community=olt.comunidad, 
-                        version=2,
-                        timeout=get_snmp_timeout(),
-                        retries=get_snmp_retries()
-                    )
-                    
-                    # Realizar SNMP walk tradicional
-                    results = session.walk(job.oid.oid)
-                    
-                    # Procesar resultados (lógica tradicional simplificada)
-                    records_processed = len(results)
+        # Walk fuera de transacción: las filas se confirman en el staging por
+        # lotes y las tablas vivas no se tocan hasta el merge
+        if job.job_type == 'descubrimiento':
+            # Usar la nueva lógica de descubrimiento, sobre la ejecución, la
+            # OLT y el job ya cargados (un solo servicio para walk y staging)
+            from discovery.services import DiscoveryService
+            service = DiscoveryService(execution)
+            
+            # Walk en streaming: los resultados quedan en la tabla de staging
+            discovery_results = service.execute_discovery_walk()
+        else:
+            # Lógica tradicional para otros tipos de job (walk, get, etc.)
+            from snmp_client.semaphore import olt_snmp_slot
+            from discovery.services import iter_olt_walk
+            walk_stats = {}
+            with olt_snmp_slot(olt.id, get_snmp_max_concurrent_queries('descubrimiento'), lease_seconds=200):
+                # GETBULK (con fallback a GETNEXT) según la configuración de descubrimiento
+                results = [row for page in iter_olt_walk(olt, job.oid.oid, walk_stats) for row in page]
+        
+        # Transacción corta: merge del staging y estado final, todo o nada
+        with transaction.atomic():
+            if job.job_type == 'descubrimiento':
+                # Verificar si el walk fue exitoso
+                if discovery_results.get('walk_successful', False) and not discovery_results.get('errors'):
+                    # SOLO si es exitoso, aplicar el staging a la base de datos
+                    if discovery_results.get('total_found'):
+                        processing_results = service.process_staged_walk()
+                        # Combinar resultados
+                        discovery_results.update(processing_results)
                     
                     # Marcar ejecución como exitosa
                     execution.status = 'SUCCESS'
-                    execution.result_summary = {
-                        'total_records': records_processed,
-                        'job_type': job.job_type,
-                        'queue_used': queue_name
-                    }
-                    execution.raw_output = {
-                        'job_type': job.job_type,
-                        'olt_id': olt.id,
-                        'olt_name': olt.abreviatura,
-                        'total_results': records_processed
-                    }
-                
-                execution.finished_at = timezone.now()
-                execution.duration_ms = int((execution.finished_at - execution.started_at).total_seconds() * 1000)
-                execution.save()
-                
-                # Actualizar estadísticas del job_host
-                job_host.consecutive_failures = 0
-                job_host.last_success_at = timezone.now()
-                job_host.save()
-                
-                logger.info(f"Descubrimiento exitoso para OLT {olt.abreviatura}")
-
-            except EasySNMPError as e:
-                # Manejar errores SNMP específicos con mensajes más claros
-                error_msg = str(e).lower()
-                if 'timeout' in error_msg or 'timed out' in error_msg:
-                    friendly_error = f"Timeout SNMP - OLT {olt.abreviatura} ({olt.ip_address}) no responde"
-                elif 'no such name' in error_msg or 'no such object' in error_msg:
-                    friendly_error = f"OID no encontrado - OLT {olt.abreviatura} ({olt.ip_address})"
-                elif 'authentication' in error_msg or 'community' in error_msg:
-                    friendly_error = f"Error de autenticación - Comunidad SNMP incorrecta para OLT {olt.abreviatura} ({olt.ip_address})"
-                elif 'connection' in error_msg or 'refused' in error_msg:
-                    friendly_error = f"Conexión rechazada - OLT {olt.abreviatura} ({olt.ip_address}) no disponible"
+                    logger.info(f"✅ Tarea descubrimiento SUCCESS - Datos procesados y guardados")
                 else:
-                    friendly_error = f"Error SNMP - OLT {olt.abreviatura} ({olt.ip_address}): {str(e)}"
-                
-                logger.error(f"❌ {friendly_error}")
-                
-                # Marcar ejecución como fallida
-                execution.status = 'FAILED'
-                execution.error_message = friendly_error
-                execution.finished_at = timezone.now()
-                execution.duration_ms = int((execution.finished_at - execution.started_at).total_seconds() * 1000)
-                execution.save()
-                
-                # Incrementar fallos consecutivos
-                job_host.consecutive_failures += 1
-                job_host.last_failure_at = timezone.now()
-                job_host.save()
-                
-                # Re-lanzar con mensaje amigable
-                raise Exception(friendly_error)
-                
-            except Exception as e:
-                # Manejar otros errores con mensaje genérico
-                friendly_error = f"Error interno - OLT {olt.abreviatura} ({olt.ip_address}): {str(e)}"
-                logger.error(f"❌ {friendly_error}")
-                
-                execution.status = 'FAILED'
-                execution.error_message = friendly_error
-                execution.finished_at = timezone.now()
-                execution.duration_ms = int((execution.finished_at - execution.started_at).total_seconds() * 1000)
-                execution.save()
+                    # Si hay errores, marcar como FAILED y descartar el staging
+                    service.discard_staged_walk()
+                    execution.status = 'FAILED'
+                    execution.error_message = '; '.join(discovery_results.get('errors', ['Error desconocido en walk']))
+                    logger.error(f"❌ Tarea descubrimiento FAILED - No se procesaron datos")
                 
-                # Incrementar fallos consecutivos
-                job_host.consecutive_failures += 1
-                job_host.last_failure_at = timezone.now()
-                job_host.save()
+                # Crear resumen serializable (solo tipos básicos)
+                safe_summary = {
+                    'walk_successful': discovery_results.get('walk_successful', False),
+                    'total_found': discovery_results.get('total_found', 0),
+                    'enabled_count': discovery_results.get('enabled_count', 0),
+                    'disabled_count': discovery_results.get('disabled_count', 0),
+                    'new_index_created': discovery_results.get('new_index_created', 0),
+                    'errors': discovery_results.get('errors', []),
+                    'duration_ms': discovery_results.get('duration_ms', 0),
+                    'reconcile_mode': discovery_results.get('reconcile_mode'),
+                    'timings_ms': discovery_results.get('timings_ms', {}),
+                    'walk': discovery_results.get('walk', {})
+                }
                 
-                # Re-lanzar con mensaje amigable
-                raise Exception(friendly_error)
+                execution.result_summary = safe_summary
+                execution.raw_output = {
+                    'job_type': 'descubrimiento',
+                    'olt_id': olt.id,
+                    'olt_name': olt.abreviatura,
+                    'task_oid': job.oid.oid,
+                    'discovery_results': safe_summary  # Solo datos serializables
+                }
+            else:
+                # Procesar resultados (lógica tradicional simplificada)
+                records_processed = len(results)
                 
-            finally:
-                # Liberar lock de Redis
-                lock.release()
-    
+                # Marcar ejecución como exitosa
+                execution.status = 'SUCCESS'
+                execution.result_summary = {
+                    'total_records': records_processed,
+                    'job_type': job.job_type,
+                    'queue_used': queue_name,
+                    'walk': walk_stats
+                }
+                execution.raw_output = {
+                    'job_type': job.job_type,
+                    'olt_id': olt.id,
+                    'olt_name': olt.abreviatura,
+                    'total_results': records_processed
+                }
+            
+            execution.finished_at = timezone.now()
+            execution.duration_ms = int((execution.finished_at - execution.started_at).total_seconds() * 1000)
+            execution.save()
+            
+            # Actualizar estadísticas del job_host
+            job_host.consecutive_failures = 0
+            job_host.last_success_at = timezone.now()
+            job_host.save()
+        
+        if execution.status == 'SUCCESS':
+            record_success(olt.id)
+        
+        logger.info(f"Descubrimiento exitoso para OLT {olt.abreviatura}")
+
+    except EasySNMPError as e:
+        # Manejar errores SNMP específicos con mensajes más claros
+        error_msg = str(e).lower()
+        if 'timeout' in error_msg or 'timed out' in error_msg:
+            friendly_error = f"Timeout SNMP - OLT {olt.abreviatura} ({olt.ip_address}) no responde"
+        elif 'no such name' in error_msg or 'no such object' in error_msg:
+            friendly_error = f"OID no encontrado - OLT {olt.abreviatura} ({olt.ip_address})"
+        elif 'authentication' in error_msg or 'community' in error_msg:
+            friendly_error = f"Error de autenticación - Comunidad SNMP incorrecta para OLT {olt.abreviatura} ({olt.ip_address})"
+        elif 'connection' in error_msg or 'refused' in error_msg:
+            friendly_error = f"Conexión rechazada - OLT {olt.abreviatura} ({olt.ip_address}) no disponible"
+        else:
+            friendly_error = f"Error SNMP - OLT {olt.abreviatura} ({olt.ip_address}): {str(e)}"
+        
+        logger.error(f"❌ {friendly_error}")
+        _fail_discovery_execution(execution, job_host, service, friendly_error)
+        
+        if is_unreachable_error(e):
+            record_failure(olt.id, friendly_error)
+        
+        # Re-lanzar con mensaje amigable
+        raise Exception(friendly_error)
+        
     except Exception as e:
-        # NO usar logger.exception para evitar traceback en logs
-        # El error ya fue manejado en los bloques EasySNMPError o Exception anteriores
-        # Solo re-lanzar para que discovery_main_task/discovery_retry_task lo capture
-        raise
+        # Manejar otros errores con mensaje genérico
+        friendly_error = f"Error interno - OLT {olt.abreviatura} ({olt.ip_address}): {str(e)}"
+        logger.error(f"❌ {friendly_error}")
+        _fail_discovery_execution(execution, job_host, service, friendly_error)
+        
+        if is_unreachable_error(e):
+            record_failure(olt.id, friendly_error)
+        
+        # Re-lanzar con mensaje amigable
+        raise Exception(friendly_error)
+        
+    finally:
+        # Fuera de toda transacción: liberar lock de Redis y pasar el turno a
+        # la cola de la OLT (el merge ya está confirmado o revertido)
+        lock.release()
+        drain_olt_queue(olt.id)
+
+
+def _fail_discovery_execution(execution, job_host, service, friendly_error):
+    """
+    Marca FAILED la ejecución (ya fuera de la transacción del merge, que se
+    revirtió si falló) y descarta el staging que haya quedado del walk.
+    """
+    if service is not None:
+        try:
+            service.discard_staged_walk()
+        except Exception as discard_exc:
+            logger.warning(f"⚠️ No se pudo descartar el staging de la ejecución {execution.id}: {discard_exc}")
+    
+    execution.status = 'FAILED'
+    execution.error_message = friendly_error
+    execution.finished_at = timezone.now()
+    execution.duration_ms = int((execution.finished_at - execution.started_at).total_seconds() * 1000)
+    execution.save()
+    
+    # Incrementar fallos consecutivos
+    job_host.consecutive_failures += 1
+    job_host.last_failure_at = timezone.now()
+    job_host.save()
 
 # Tarea de debug para testing
 @shared_task
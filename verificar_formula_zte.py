@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from snmp_formulas.models import IndexFormula
+from snmp_formulas.services import resolve_formula
 from olt_models.models import OLTModel
 from brands.models import Brand
 
@@ -54,7 +55,7 @@ def probar_casos_zte():
     
     try:
         zte = Brand.objects.get(nombre='ZTE')
-        formula = IndexFormula.objects.get(marca=zte, modelo__isnull=True)
+        formula = IndexFormula.objects.get(marca=zte, modelo__isnull=True).compile()
         
         # Casos de prueba basados en los datos proporcionados
         test_cases = [
@@ -171,28 +172,12 @@ def simular_olt_zte():
             normalized_id='temp'
         )
         
-        # Buscar fórmula (simular la lógica)
-        formula = None
-        
-        # PRIORIDAD 1: Marca + Modelo específico
-        if mock_olt.modelo:
-            formula = IndexFormula.objects.filter(
-                marca=mock_olt.marca,
-                modelo=mock_olt.modelo,
-                activo=True
-            ).first()
-        
-        # PRIORIDAD 2: Marca genérica
-        if not formula:
-            formula = IndexFormula.objects.filter(
-                marca=mock_olt.marca,
-                modelo__isnull=True,
-                activo=True
-            ).first()
+        # Buscar fórmula con el mismo resolver (cacheado) que usa discovery
+        formula = resolve_formula(mock_olt.marca.id, mock_olt.modelo.id if mock_olt.modelo else None)
         
         if formula:
             print(f"✅ Fórmula encontrada: {formula}")
-            print(f"   Prioridad: {'🥇 Específica' if mock_olt.modelo else '🥈 Genérica'}")
+            print(f"   Prioridad: {'🥇 Específica' if formula.priority == 'especifica' else '🥈 Genérica'}")
             
             # Calcular componentes
             result = formula.calculate_components('268566784')
@@ -33,6 +33,9 @@ def test_huawei_formula():
         print(f"   Formato: {formula.normalized_format}")
         print()
         
+        # Decodificador compilado (máscaras parseadas una sola vez)
+        decoder = formula.compile()
+        
         # Casos de prueba
         test_cases = [
             # (raw_index_key, expected_slot, expected_port, expected_logical)
@@ -48,7 +51,7 @@ def test_huawei_formula():
         
         all_passed = True
         for raw_index, exp_slot, exp_port, exp_logical in test_cases:
-            result = formula.calculate_components(raw_index)
+            result = decoder.calculate_components(raw_index)
             
             slot_ok = result['slot'] == exp_slot
             port_ok = result['port'] == exp_port
@@ -61,7 +64,7 @@ def test_huawei_formula():
             print(f"   Obtenido: slot={result['slot']}, port={result['port']}, logical={result['logical']}")
             
             # Mostrar ID normalizado
-            normalized = formula.get_normalized_id(result['slot'], result['port'], result['logical'])
+            normalized = decoder.get_normalized_id(result['slot'], result['port'], result['logical'])
             print(f"   Normalizado: {normalized}")
             print()
             
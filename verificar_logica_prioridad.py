@@ -17,6 +17,9 @@ from olt_models.models import OLTModel
 from brands.models import Brand
 from hosts.models import OLT
 from discovery.models import OnuIndexMap
+from snmp_formulas.services import (
+    get_formula_for_olt, PRIORITY_SPECIFIC, PRIORITY_BRAND, PRIORITY_UNIVERSAL
+)
 
 def mostrar_prioridad_formulas():
     """Muestra la lógica de prioridad de fórmulas"""
@@ -58,52 +61,20 @@ def simular_busqueda_formula(olt, raw_index_key="4194312448.2"):
     print(f"   Índice: {raw_index_key}")
     print("-" * 50)
     
-    formula_encontrada = None
-    prioridad_usada = None
+    # Misma resolución (cacheada) que usan discovery y la API
+    formula = get_formula_for_olt(olt)
     
-    # PRIORIDAD 1: Marca + Modelo específico
-    if olt.modelo:
-        formula = IndexFormula.objects.filter(
-            marca=olt.marca,
-            modelo=olt.modelo,
-            activo=True
-        ).first()
-        
-        if formula:
-            formula_encontrada = formula
-            prioridad_usada = "🥇 PRIORIDAD 1: Específica (marca + modelo)"
-            print(f"✅ {prioridad_usada}")
-            print(f"   Fórmula: {formula}")
-            return formula_encontrada, prioridad_usada
-    
-    # PRIORIDAD 2: Marca genérica
-    if olt.marca:
-        formula = IndexFormula.objects.filter(
-            marca=olt.marca,
-            modelo__isnull=True,
-            activo=True
-        ).first()
-        
-        if formula:
-            formula_encontrada = formula
-            prioridad_usada = "🥈 PRIORIDAD 2: Genérica por marca"
-            print(f"✅ {prioridad_usada}")
-            print(f"   Fórmula: {formula}")
-            return formula_encontrada, prioridad_usada
-    
-    # PRIORIDAD 3: Completamente genérica
-    formula = IndexFormula.objects.filter(
-        marca__isnull=True,
-        modelo__isnull=True,
-        activo=True
-    ).first()
+    etiquetas = {
+        PRIORITY_SPECIFIC: "🥇 PRIORIDAD 1: Específica (marca + modelo)",
+        PRIORITY_BRAND: "🥈 PRIORIDAD 2: Genérica por marca",
+        PRIORITY_UNIVERSAL: "🥉 PRIORIDAD 3: Completamente genérica",
+    }
     
     if formula:
-        formula_encontrada = formula
-        prioridad_usada = "🥉 PRIORIDAD 3: Completamente genérica"
+        prioridad_usada = etiquetas[formula.priority]
         print(f"✅ {prioridad_usada}")
         print(f"   Fórmula: {formula}")
-        return formula_encontrada, prioridad_usada
+        return formula, prioridad_usada
     
     # Sin fórmula
     prioridad_usada = "❌ SIN FÓRMULA"